@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# Fingerprints are sums of per-ticket hashes (mod 2**160): independent of
+# member order, and a ClusterSummary can extend one ticket at a time.
+FINGERPRINT_MOD = 1 << 160
+
+
+def message_digest(message):
+    return hashlib.sha1(message.encode("utf-8")).hexdigest()
+
+
+def ticket_hash(ticket_id, digest):
+    """One ticket's fingerprint term: sha1 of (ticket_id, sha1(message)) as an int."""
+    return int(hashlib.sha1(f"{ticket_id}:{digest}\n".encode("utf-8")).hexdigest(), 16)
+
+
+def cluster_fingerprint(tickets):
+    """
+    Identity of a cluster's membership (a TicketView): the sum of its
+    ticket hashes. Edits to a message change it too.
+    """
+    total = 0
+    for ticket_id, message in zip(tickets.ticket_ids.tolist(), tickets.messages):
+        total += ticket_hash(ticket_id, message_digest(message))
+    return format(total % FINGERPRINT_MOD, "040x")
+
+
+class AnalysisCache:
+    """
+    Persistent memo of the reason/decide/act outcome per cluster fingerprint.
+
+    Entries expire after `ttl_seconds`, the least recently used ones are
+    evicted past `max_entries`, and the whole cache is dropped when
+    `version` (prompt + rule versions) differs from the one on disk.
+    Safe to share between reasoning worker threads.
+    """
+
+    def __init__(self, path=".analysis_cache.json", version="", ttl_seconds=24 * 3600, max_entries=5000):
+        self.path = path
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = {}   # fingerprint -> {"created_at", "last_used", "outcome"}
+        self.reused = 0
+        self.recomputed = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"--> [CACHE] Warning: unreadable analysis cache {self.path}. Starting empty.")
+            return
+
+        if data.get("version") != self.version:
+            print("--> [CACHE] Prompt/rule version changed. Invalidating analysis cache.")
+            return
+        self.entries = data.get("entries", {})
+
+    def get(self, fingerprint):
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(fingerprint)
+            if entry is not None and now - entry["created_at"] > self.ttl_seconds:
+                del self.entries[fingerprint]
+                entry = None
+
+            if entry is None:
+                self.recomputed += 1
+                return None
+
+            entry["last_used"] = now
+            self.reused += 1
+            return entry["outcome"]
+
+    def put(self, fingerprint, outcome):
+        now = time.time()
+        with self._lock:
+            self.entries[fingerprint] = {"created_at": now, "last_used": now, "outcome": outcome}
+
+    def save(self):
+        with self._lock:
+            overflow = len(self.entries) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self.entries, key=lambda k: self.entries[k]["last_used"])[:overflow]
+                for fingerprint in oldest:
+                    del self.entries[fingerprint]
+
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.version, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,154 @@
+import json
+import os
+
+OUTPUT_PATH = "analysis_output.json"
+FORMAT_VERSION = 2
+
+
+def _atomic_write(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AnalysisOutput:
+    """
+    Versioned cluster output: a snapshot plus an append-only delta log.
+
+    Every run that changes anything gets the next sequence number `seq`.
+    Each cluster record carries the `seq` of the run that last changed it,
+    and removed clusters leave a tombstone with theirs. A run appends one
+    delta line holding only the changed records, removed ids and the new
+    cluster order. Once the delta log outgrows `compact_ratio` x the snapshot,
+    the snapshot is rewritten and the log emptied. Both rewrites go through
+    a temp file + rename, and a torn trailing delta line is ignored, so
+    readers always see some complete version.
+
+    Single writer (main.py runs are serialised by the daemon); any number
+    of readers.
+    """
+
+    def __init__(self, path=OUTPUT_PATH, compact=False, compact_ratio=1.0):
+        self.path = path
+        self.delta_path = os.path.splitext(path)[0] + ".delta.ndjson"
+        self.compact = compact
+        self.compact_ratio = compact_ratio
+
+    # --- READ ---
+    def load(self):
+        """Materialised state: {"seq", "clusters": {id: record}, "order", "removed": {id: seq}, "format"}."""
+        state = {"seq": 0, "clusters": {}, "order": [], "removed": {}, "format": None}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                # Pre-versioning output: a bare list, treated as seq 0
+                state["clusters"] = {c["id"]: dict(c, seq=0) for c in data}
+                state["order"] = [c["id"] for c in data]
+            else:
+                state["seq"] = data["seq"]
+                state["clusters"] = {c["id"]: c for c in data["clusters"]}
+                state["order"] = [c["id"] for c in data["clusters"]]
+                state["removed"] = data.get("removed", {})
+                state["format"] = data.get("format")
+
+        if os.path.exists(self.delta_path):
+            with open(self.delta_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Writer still appending
+                    delta = json.loads(line)
+                    if delta["seq"] > state["seq"]:
+                        self._apply(state, delta)
+        return state
+
+    def clusters(self):
+        """The current cluster list, in output order."""
+        state = self.load()
+        return [state["clusters"][cid] for cid in state["order"]]
+
+    def changes_since(self, seq):
+        """
+        What changed after run `seq`: clusters added or modified, ids removed
+        and the current order. `seq=0` returns everything.
+        """
+        state = self.load()
+        return {
+            "seq": state["seq"],
+            "since": seq,
+            "changed": [state["clusters"][cid] for cid in state["order"] if state["clusters"][cid]["seq"] > seq],
+            "removed": [cid for cid, removed_at in state["removed"].items() if removed_at > seq],
+            "order": state["order"],
+        }
+
+    @staticmethod
+    def _apply(state, delta):
+        seq = delta["seq"]
+        for record in delta["changed"]:
+            state["clusters"][record["id"]] = record
+            state["removed"].pop(record["id"], None)
+        for cid in delta["removed"]:
+            state["clusters"].pop(cid, None)
+            state["removed"][cid] = seq
+        state["order"] = delta["order"]
+        state["seq"] = seq
+
+    # --- WRITE ---
+    def write(self, clusters, archive=None):
+        """
+        Records a run's full cluster list, persisting only what changed.
+        Returns (seq, changed_ids, removed_ids); seq is unchanged and
+        nothing is written when the output is identical to the last run.
+        With a ClusterArchive, the last records of removed clusters are
+        archived before their tombstones are written.
+        """
+        state = self.load()
+        seq = state["seq"] + 1
+
+        changed = []
+        for record in clusters:
+            previous = state["clusters"].get(record["id"])
+            if previous is None or {k: v for k, v in previous.items() if k != "seq"} != record:
+                changed.append(dict(record, seq=seq))
+        order = [record["id"] for record in clusters]
+        current = set(order)
+        removed = [cid for cid in state["order"] if cid not in current]
+
+        if not changed and not removed and order == state["order"] and state["format"] == FORMAT_VERSION:
+            return state["seq"], [], []
+
+        if archive is not None:
+            archive.add([state["clusters"][cid] for cid in removed], seq)
+        delta = {"seq": seq, "changed": changed, "removed": removed, "order": order}
+        self._apply(state, delta)
+        line = json.dumps(delta, separators=(",", ":")) + "\n"
+
+        snapshot_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        delta_size = os.path.getsize(self.delta_path) if os.path.exists(self.delta_path) else 0
+        if state["format"] != FORMAT_VERSION or delta_size + len(line) > self.compact_ratio * snapshot_size:
+            self._write_snapshot(state)
+        else:
+            with open(self.delta_path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return seq, [record["id"] for record in changed], removed
+
+    def _write_snapshot(self, state):
+        snapshot = {
+            "format": FORMAT_VERSION,
+            "seq": state["seq"],
+            "clusters": [state["clusters"][cid] for cid in state["order"]],
+            "removed": state["removed"],
+        }
+        if self.compact:
+            text = json.dumps(snapshot, separators=(",", ":"))
+        else:
+            text = json.dumps(snapshot, indent=2)
+        # Snapshot first: a reader that still sees the old delta log skips
+        # every line at or below the new snapshot's seq.
+        _atomic_write(self.path, text)
+        _atomic_write(self.delta_path, "")
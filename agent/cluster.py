@@ -1,31 +1,208 @@
-from sklearn.cluster import DBSCAN
 import numpy as np
 
-def cluster_tickets(tickets, embeddings):
+from agent import dedup
+from agent.incremental_cluster import IncrementalDBSCAN
+from agent.neighbors import build_index, normalize
+from agent.sharded_cluster import sharded_dbscan
+
+EPS = 0.60
+MIN_SAMPLES = 3
+
+def cluster_tickets(tickets, embeddings, state_path=None, backend="brute", workers=1, groups=None):
     """
     Process: Clusters tickets based on semantic similarity using DBSCAN.
+    `tickets` is a TicketTable; returns {label: TicketView}. `embeddings`
+    has one row per ticket, or with `groups` (dedup.DuplicateGroups) one
+    row per group: each group is then clustered as a single point weighted
+    by its multiplicity, and every ticket takes its group's label.
+    With a state_path, the clusterer state is kept on disk between runs:
+    only tickets not seen before are inserted, and cluster ids stay stable.
+    `backend` picks the neighbour search: "brute" (exact) or "ivf" (approximate).
+    Without a state_path, workers > 1 runs the exact sharded multi-process DBSCAN.
     """
+    if groups is None:
+        groups = dedup.DuplicateGroups.identity(tickets)
+    tickets.embedding_rows[:] = groups.group_of  # Row of each ticket's vector in `embeddings`
+    if state_path is not None:
+        return cluster_tickets_incremental(tickets, embeddings, state_path, backend, groups)
+    if workers > 1:
+        return cluster_tickets_sharded(tickets, embeddings, workers, groups)
+    if backend != "brute":
+        return cluster_tickets_indexed(tickets, embeddings, backend, groups)
+
+    from sklearn.cluster import DBSCAN  # Heavy import; only the full-refit path needs it
+
     # --- DEMO MODE SETTINGS ---
     # eps=0.60:       Allows slightly "looser" matches (handles \n vs no \n)
     # min_samples=1:  CRITICAL FIX. Ensures NO ticket is ever hidden as "Noise".
     #                 Every single ticket will appear on the dashboard.
-    clustering = DBSCAN(eps=0.60, min_samples=3, metric='cosine').fit(embeddings)
-    
-    labels = clustering.labels_
-    
-    # Organize tickets into clusters
-    clusters = {}
-    
-    for ticket, label in zip(tickets, labels):
-        # In Demo Mode (min_samples=1), label will never be -1
-        label_key = int(label)
-            
-        if label_key not in clusters:
-            clusters[label_key] = []
-        clusters[label_key].append(ticket)
-    
+    clustering = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES, metric='cosine').fit(embeddings,
+                                                                               sample_weight=groups.weights)
+
+    labels = clustering.labels_[groups.group_of]
+
+    # Organize tickets into clusters (row-index views, no copies)
+    clusters = tickets.group(labels)
+
     print(f"--> [INTERNAL] Clustering Stats (Demo Mode):")
+    print(f"    - Total Tickets:  {len(tickets)} ({len(groups)} distinct)")
+    print(f"    - Clusters Found: {len(clusters)}")
+
+    return clusters
+
+def dbscan_from_neighbors(neighborhoods, min_samples=MIN_SAMPLES, weights=None):
+    """
+    DBSCAN labelling from precomputed eps-neighbourhoods (each list includes
+    the point itself). Visits points in order like sklearn, so cluster
+    numbering follows first appearance. Optional per-point `weights` count
+    towards min_samples (sklearn's sample_weight).
+    """
+    if weights is None:
+        is_core = np.array([len(n) >= min_samples for n in neighborhoods], dtype=bool)
+    else:
+        is_core = np.array([weights[n].sum() >= min_samples for n in neighborhoods], dtype=bool)
+    labels = np.full(len(neighborhoods), -1, dtype=np.int64)
+    next_label = 0
+
+    for start in range(len(neighborhoods)):
+        if labels[start] != -1 or not is_core[start]:
+            continue
+        labels[start] = next_label
+        stack = [start]
+        while stack:
+            row = stack.pop()
+            for q in neighborhoods[row]:
+                if labels[q] == -1:
+                    labels[q] = next_label
+                    if is_core[q]:
+                        stack.append(q)
+        next_label += 1
+
+    return labels
+
+def cluster_tickets_indexed(tickets, embeddings, backend="ivf", groups=None):
+    """
+    Process: Full DBSCAN pass where eps-neighbourhoods come from a neighbour
+    index instead of sklearn's brute-force pairwise distances.
+    """
+    if groups is None:
+        groups = dedup.DuplicateGroups.identity(tickets)
+    index = build_index(backend)
+    index.add_batch(embeddings)
+    neighborhoods = index.query_radius_batch(normalize(embeddings), EPS)
+    labels = dbscan_from_neighbors(neighborhoods, weights=groups.weights)
+
+    clusters = tickets.group(labels[groups.group_of])
+
+    print(f"--> [INTERNAL] Clustering Stats ({backend} index):")
+    print(f"    - Total Tickets:  {len(tickets)} ({len(groups)} distinct)")
+    print(f"    - Clusters Found: {len(clusters)}")
+
+    return clusters
+
+def cluster_tickets_sharded(tickets, embeddings, workers=2, groups=None):
+    """
+    Process: Full DBSCAN pass split into coarse shards over a process pool,
+    with embeddings in shared memory. Same labels as the sklearn path.
+    """
+    if groups is None:
+        groups = dedup.DuplicateGroups.identity(tickets)
+    labels = sharded_dbscan(embeddings, EPS, MIN_SAMPLES, workers=workers, sample_weight=groups.weights)
+
+    clusters = tickets.group(labels[groups.group_of])
+
+    print(f"--> [INTERNAL] Clustering Stats (sharded, {workers} workers):")
+    print(f"    - Total Tickets:  {len(tickets)} ({len(groups)} distinct)")
+    print(f"    - Clusters Found: {len(clusters)}")
+
+    return clusters
+
+def cluster_tickets_incremental(tickets, embeddings, state_path=".cluster_state.npz", backend="brute",
+                                groups=None):
+    """
+    Process: Incremental DBSCAN. Reconciles the saved state with the current
+    ticket set (insert new, drop deleted) instead of refitting everything.
+    """
+    if groups is None:
+        groups = dedup.DuplicateGroups.identity(tickets)
+    state = load_state(state_path, backend)
+
+    current_ids = set(tickets.ticket_ids.tolist())
+    stale = [k for k in state.member_row if k not in current_ids]
+    for key in stale:
+        state.remove(key)
+
+    inserted = insert_tickets(state, tickets, lambda view: embeddings[groups.group_of[view.rows]], groups)
+    state.save(state_path)
+    clusters = group_tickets(state, tickets)
+
+    print("--> [INTERNAL] Clustering Stats (Incremental):")
     print(f"    - Total Tickets:  {len(tickets)}")
+    print(f"    - New / Removed:  {inserted} / {len(stale)}")
     print(f"    - Clusters Found: {len(clusters)}")
-    
-    return clusters
\ No newline at end of file
+
+    return clusters
+
+def load_state(state_path=".cluster_state.npz", backend="brute"):
+    return IncrementalDBSCAN.load(state_path, eps=EPS, min_samples=MIN_SAMPLES, backend=backend)
+
+def insert_tickets(state, tickets, embed_fn, groups=None):
+    """
+    Inserts tickets (TicketTable/View) the clusterer has not seen yet
+    (idempotent). Returns the count. Tickets are collapsed by `groups`
+    (default: exact duplicates, see agent/dedup.py): a ticket whose group
+    key is already a point only adds weight to it, so embed_fn(TicketView)
+    is only called for the tickets that open a new point.
+    """
+    if groups is None:
+        groups = dedup.collapse(tickets)
+    ticket_ids = tickets.ticket_ids.tolist()
+    new = [i for i, ticket_id in enumerate(ticket_ids) if ticket_id not in state]
+
+    opening = {}  # Group key -> first new ticket carrying it
+    for i in new:
+        key = groups.keys[i]
+        if key not in state.row_of and key not in opening:
+            opening[key] = i
+    positions = list(opening.values())
+    vectors = embed_fn(tickets.view(positions)) if positions else ()
+    vector_of = dict(zip(positions, vectors))
+
+    for i in new:
+        state.insert(groups.keys[i], vector_of.get(i), member=ticket_ids[i])
+    return len(new)
+
+def reconcile_state(state, tickets, embed_fn, near_threshold=None):
+    """
+    Makes `state` index exactly the tickets in `tickets` (e.g. the live
+    window): drops indexed tickets that are gone (expired or deleted) and
+    inserts the ones it lacks (window widened), embedding only the new
+    distinct texts via embed_fn(TicketView). Work is O(indexed + live),
+    never O(history). Returns (inserted, removed).
+    """
+    live_ids = tickets.ticket_ids
+    indexed = np.fromiter(state.member_row, dtype=np.int64, count=len(state.member_row))
+    stale = indexed[~np.isin(indexed, live_ids)]
+    for key in stale.tolist():
+        state.remove(key)
+
+    missing = np.nonzero(~np.isin(live_ids, indexed))[0]
+    if len(missing):
+        view = tickets.view(missing)
+        insert_tickets(state, view, embed_fn, dedup.collapse(view, near_threshold))
+    return len(missing), len(stale)
+
+def group_tickets(state, tickets):
+    """Groups a TicketTable by each ticket's current cluster id in `state`."""
+    member_row, labels = state.member_row, state.labels
+    return tickets.group([labels[member_row[ticket_id]] for ticket_id in tickets.ticket_ids.tolist()])
+
+def index_vectors(state, tickets):
+    """
+    Points the table's embedding_rows at the clusterer's own vector rows and
+    returns that matrix, so the log path needs no embedding pass of its own.
+    Duplicates share their point's row.
+    """
+    member_row = state.member_row
+    tickets.embedding_rows[:] = [member_row[ticket_id] for ticket_id in tickets.ticket_ids.tolist()]
+    return state.index.vectors
@@ -0,0 +1,40 @@
+import datetime
+import json
+import os
+
+from agent.instrument import tail_ndjson
+
+ARCHIVE_PATH = "cluster_archive.ndjson"
+
+
+class ClusterArchive:
+    """
+    Append-only NDJSON archive of closed clusters.
+
+    A cluster closes when it leaves the analysis output: its tickets all
+    expired from the sliding window, or it was merged/dissolved by a
+    re-clustering. The last published record is kept, stamped with the
+    output seq that removed it and the close time, so the live output and
+    every per-run cost stay bounded by live volume while history remains
+    queryable.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+
+    def add(self, records, seq):
+        """Archives the last published `records` of clusters removed by output run `seq`."""
+        if not records:
+            return 0
+        closed_at = datetime.datetime.now().isoformat()
+        lines = "".join(json.dumps(dict(record, closed_seq=seq, closed_at=closed_at), separators=(",", ":")) + "\n"
+                        for record in records)
+        with open(self.path, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(records)
+
+    def recent(self, limit=50):
+        """The last `limit` closed clusters, newest first."""
+        return tail_ndjson(self.path, limit)[::-1]
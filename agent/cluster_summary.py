@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+from agent import keywords
+from agent.analysis_cache import FINGERPRINT_MOD, message_digest, ticket_hash
+from agent.neighbors import normalize
+
+SUMMARY_PATH = ".cluster_summaries.json"
+
+TOP_K = 5             # Representative tickets handed to reasoning
+CANDIDATES = 32       # Tickets kept ranked by centroid similarity (representative pool)
+ERROR_SAMPLES = 8     # Size of the error-sample sketch
+SAMPLE_CHARS = 120
+
+
+def _priority(sample):
+    # Deterministic bottom-k sketch: the same samples win whatever the insertion order
+    return hashlib.sha1(sample.encode("utf-8")).hexdigest()
+
+
+class ClusterSummary:
+    """
+    Compact, incrementally maintained digest of one cluster.
+
+      * size, ticket ids, merchant set
+      * keyword histogram (tickets per keyword hit) -> the cluster's rules
+      * centroid (normalised vector sum) and the CANDIDATES tickets nearest
+        to it; the best TOP_K distinct texts are the representatives, the
+        first the medoid (nearest to the centroid)
+      * error-sample sketch: at most ERROR_SAMPLES distinct error snippets
+      * membership fingerprint, extended per ticket
+
+    `add` only looks at the joining tickets (plus the candidate pool), and
+    everything downstream reads this summary, so reasoning and repro cost
+    stay bounded however large the cluster grows.
+    """
+
+    def __init__(self, cluster_id):
+        self.cluster_id = cluster_id
+        self.ticket_ids = []
+        self.merchants = set()
+        self.keyword_counts = Counter()
+        self.vector_sum = None          # float64 (dim,), None without vectors
+        self.candidates = []            # Ticket ids, nearest to the centroid first
+        self.representatives = []       # [(ticket_id, message)], best TOP_K candidates
+        self.error_sketch = {}          # Sample text -> priority
+        self._fingerprint = 0
+
+    # --- DERIVED ---
+    @property
+    def size(self):
+        return len(self.ticket_ids)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def centroid(self):
+        return None if self.vector_sum is None else normalize(self.vector_sum)
+
+    @property
+    def medoid(self):
+        return self.representatives[0] if self.representatives else None
+
+    @property
+    def fingerprint(self):
+        return format(self._fingerprint, "040x")
+
+    @property
+    def error_samples(self):
+        return sorted(self.error_sketch, key=self.error_sketch.get)
+
+    def keyword_hits(self):
+        return frozenset(self.keyword_counts)
+
+    def text(self, sep=" "):
+        """Prompt body: the representatives' messages, not the whole cluster."""
+        return sep.join(message for _, message in self.representatives)
+
+    # --- UPDATE ---
+    def _offer_error(self, sample):
+        if sample in self.error_sketch:
+            return
+        self.error_sketch[sample] = _priority(sample)
+        if len(self.error_sketch) > ERROR_SAMPLES:
+            del self.error_sketch[max(self.error_sketch, key=self.error_sketch.get)]
+
+    def add(self, view, vectors=None):
+        """
+        Folds the tickets of a TicketView into the summary. `vectors` is the
+        run's embedding matrix, indexed by the table's embedding_rows.
+        """
+        table = view.table
+        ids = view.ticket_ids.tolist()
+        codes = view.message_codes
+        self.ticket_ids.extend(ids)
+        self.merchants.update(view.merchant_ids.tolist())
+
+        # Keyword histogram, error samples and message digests: once per distinct text
+        digests = {}
+        unique_codes, counts = np.unique(codes, return_counts=True)
+        for code, count in zip(unique_codes.tolist(), counts.tolist()):
+            message = table.pool[code]
+            hits = table.keywords_of_code(code)
+            for kw in hits:
+                self.keyword_counts[kw] += count
+            if "error_sample" in keywords.fired_rules(hits):
+                self._offer_error(message[:SAMPLE_CHARS])
+            digests[code] = message_digest(message)
+        for ticket_id, code in zip(ids, codes.tolist()):
+            self._fingerprint = (self._fingerprint + ticket_hash(ticket_id, digests[code])) % FINGERPRINT_MOD
+
+        self._rank(view, vectors)
+
+    def _rank(self, view, vectors):
+        """Re-ranks the candidate pool plus the joining tickets against the updated centroid."""
+        table = view.table
+        old_rows = table.rows_of(self.candidates)
+        rows = np.concatenate([old_rows[old_rows >= 0], view.rows])
+
+        if vectors is not None and len(view):
+            joined = normalize(vectors[view.embedding_rows]).astype(np.float64).sum(axis=0)
+            self.vector_sum = joined if self.vector_sum is None else self.vector_sum + joined
+        if self.vector_sum is not None and vectors is not None:
+            scores = normalize(vectors[table.embedding_rows[rows]]) @ self.centroid
+            # Nearest first; ties keep the older ticket
+            rows = rows[np.lexsort((table.ticket_ids[rows], -scores))]
+
+        rows = rows[:CANDIDATES]
+        self.candidates = table.ticket_ids[rows].tolist()
+        # Best TOP_K distinct texts: duplicates of a message add nothing to the prompt
+        seen = set()
+        self.representatives = []
+        for ticket_id, code in zip(self.candidates, table.message_codes[rows].tolist()):
+            if code not in seen and len(self.representatives) < TOP_K:
+                seen.add(code)
+                self.representatives.append((ticket_id, table.pool[code]))
+
+    @classmethod
+    def from_view(cls, cluster_id, view, vectors=None):
+        summary = cls(cluster_id)
+        summary.add(view, vectors)
+        return summary
+
+    # --- PERSISTENCE ---
+    def to_dict(self):
+        return {
+            "cluster_id": self.cluster_id,
+            "ticket_ids": self.ticket_ids,
+            "merchants": list(self.merchants),
+            "keyword_counts": dict(self.keyword_counts),
+            "vector_sum": None if self.vector_sum is None else self.vector_sum.tolist(),
+            "candidates": self.candidates,
+            "representatives": self.representatives,
+            "error_sketch": self.error_sketch,
+            "fingerprint": self.fingerprint,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data["cluster_id"])
+        summary.ticket_ids = data["ticket_ids"]
+        summary.merchants = set(data["merchants"])
+        summary.keyword_counts = Counter(data["keyword_counts"])
+        if data["vector_sum"] is not None:
+            summary.vector_sum = np.asarray(data["vector_sum"], dtype=np.float64)
+        summary.candidates = data["candidates"]
+        summary.representatives = [tuple(r) for r in data["representatives"]]
+        summary.error_sketch = data["error_sketch"]
+        summary._fingerprint = int(data["fingerprint"], 16)
+        return summary
+
+
+class ClusterSummaries:
+    """
+    Summaries for every live cluster, carried across runs (with a `path`).
+
+    `update` extends a cluster's summary with just its new tickets when
+    the cluster only gained members since the last run (the common case
+    with stable incremental cluster ids), and rebuilds it when members
+    left (split, merge, expiry). Summaries of vanished clusters are dropped.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.summaries = {}
+        self.extended = 0
+        self.rebuilt = 0
+        self._load()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"--> [SUMMARY] Warning: unreadable cluster summaries {self.path}. Rebuilding.")
+            return
+        self.summaries = {int(label): ClusterSummary.from_dict(s) for label, s in data.items()}
+
+    def update(self, clusters, vectors=None):
+        """{label: TicketView} -> {label: ClusterSummary} for every non-noise cluster."""
+        live = {}
+        for label, view in clusters.items():
+            if label == -1:
+                continue
+            summary = self.summaries.get(label)
+            if summary is not None:
+                joined = ~np.isin(view.ticket_ids, summary.ticket_ids)
+                if len(view) - np.count_nonzero(joined) == summary.size:
+                    # Every previous member is still here: fold in the newcomers only
+                    if joined.any():
+                        summary.add(view.table.view(view.rows[joined]), vectors)
+                        self.extended += 1
+                    live[label] = summary
+                    continue
+            live[label] = ClusterSummary.from_view(label, view, vectors)
+            self.rebuilt += 1
+        self.summaries = live
+        return live
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({str(label): s.to_dict() for label, s in self.summaries.items()}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -1,14 +1,18 @@
-def generate_alternatives(selected_root_cause, cluster_text):
+from agent import keywords
+
+def generate_alternatives(selected_root_cause, cluster_text, keyword_hits=None):
     """
     REASON (Counterfactual): Generates 'Why not X?' arguments.
     Crucial for explainability and reducing hallucination.
     """
-    text = cluster_text.lower()
+    if keyword_hits is None:
+        keyword_hits = keywords.scan(cluster_text)
+    rules = keywords.fired_rules(keyword_hits)
     alternatives = []
 
     # Hypothesis 1: Platform Issue
     if selected_root_cause != "Platform Issue / Regression":
-        if "500" not in text and "outage" not in text:
+        if "platform_evidence" not in rules:
             alternatives.append({
                 "hypothesis": "Platform Issue / Regression",
                 "reason_rejected": "No server-side error codes (5xx) or 'outage' keywords detected in ticket text."
@@ -21,7 +25,7 @@ def generate_alternatives(selected_root_cause, cluster_text):
 
     # Hypothesis 2: Documentation Gap
     if selected_root_cause != "Documentation Gap":
-        if "example" not in text and "docs" not in text:
+        if "docs_evidence" not in rules:
             alternatives.append({
                 "hypothesis": "Documentation Gap",
                 "reason_rejected": "Users are reporting errors, not asking for clarification or missing links."
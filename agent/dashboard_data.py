@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+from collections import Counter
+
+from agent import observe
+from agent.analysis_output import AnalysisOutput
+from agent.incident_store import STORE_DIR, IncidentStore
+from agent.merchant_index import INDEX_PATH, MerchantIndex
+
+
+def _page(items, page, page_size):
+    """1-based page of a list, plus the total item count."""
+    start = max(page - 1, 0) * page_size
+    return items[start:start + page_size], len(items)
+
+
+class DashboardData:
+    """
+    Change-aware, in-memory view of tickets and cluster output for the dashboard.
+
+    Each accessor first calls `refresh()`, which only stats files:
+      * the NDJSON ticket log is read from the last byte offset onwards
+        (re-read in full only if it shrank or was replaced);
+      * tickets.json, the analysis snapshot + delta log and the merchant
+        index are re-parsed only when their size/mtime stamp changes.
+    Summary metrics are aggregated once per reload, and cluster/ticket lists
+    are served as filtered pages. One instance is meant to be shared across
+    Streamlit sessions, hence the lock.
+    """
+
+    def __init__(self, ticket_log=observe.TICKET_LOG, ticket_json="tickets.json", output=None,
+                 merchant_index_path=INDEX_PATH, incident_root=STORE_DIR):
+        self.ticket_log = ticket_log
+        self.ticket_json = ticket_json
+        self.output = output or AnalysisOutput()
+        self._lock = threading.RLock()
+
+        self.tickets = []
+        self.merchant_counts = Counter()
+        self.tickets_by_merchant = {}  # merchant_id -> tickets in log order
+        self.ticket_position = {}      # ticket_id -> index in self.tickets
+        self._ticket_source = None
+        self._ticket_offset = 0
+        self._ticket_stamp = None
+
+        self.clusters = []
+        self.cluster_by_id = {}
+        self.cluster_of_ticket = {}    # ticket_id -> cluster id
+        self._cluster_rank = {}        # cluster id -> position in output order
+        self.seq = None
+        self._cluster_stamp = None
+        self._cluster_summary = {}
+
+        self.merchant_index_path = merchant_index_path
+        self.merchant_index = None
+        self._merchant_stamp = None
+
+        self.incident_root = incident_root
+        self._incidents = None         # IncidentStore, opened on first use
+
+    # --- CHANGE DETECTION ---
+    def refresh(self):
+        with self._lock:
+            self._refresh_tickets()
+            self._refresh_clusters()
+            self._refresh_merchant_index()
+
+    def _reset_tickets(self, source):
+        self.tickets = []
+        self.merchant_counts = Counter()
+        self.tickets_by_merchant = {}
+        self.ticket_position = {}
+        self._ticket_source = source
+        self._ticket_offset = 0
+
+    def _add_tickets(self, batch):
+        start = len(self.tickets)
+        self.tickets.extend(batch)
+        self.ticket_position.update((t['ticket_id'], start + i) for i, t in enumerate(batch))
+        self.merchant_counts.update(t['merchant_id'] for t in batch)
+        for t in batch:
+            self.tickets_by_merchant.setdefault(t['merchant_id'], []).append(t)
+
+    def _refresh_tickets(self):
+        if os.path.exists(self.ticket_log):
+            stat = os.stat(self.ticket_log)
+            identity = (self.ticket_log, stat.st_ino)
+            if self._ticket_source != identity or stat.st_size < self._ticket_offset:
+                self._reset_tickets(identity)
+            if stat.st_size > self._ticket_offset:
+                for batch, offset in observe.iter_ticket_batches(self.ticket_log, self._ticket_offset):
+                    self._add_tickets(batch)
+                    self._ticket_offset = offset
+            return
+
+        stamp = observe.file_stamps([self.ticket_json])
+        if self._ticket_source == self.ticket_json and stamp == self._ticket_stamp:
+            return
+        self._reset_tickets(self.ticket_json)
+        self._ticket_stamp = stamp
+        if os.path.exists(self.ticket_json):
+            with open(self.ticket_json, "r") as f:
+                self._add_tickets(json.load(f))
+
+    def _refresh_clusters(self):
+        stamp = observe.file_stamps([self.output.path, self.output.delta_path])
+        if stamp == self._cluster_stamp:
+            return
+        state = self.output.load()
+        self._cluster_stamp = stamp
+        self.seq = state["seq"]
+        self.clusters = [state["clusters"][cid] for cid in state["order"]]
+        self.cluster_by_id = state["clusters"]
+        self._cluster_rank = {cid: i for i, cid in enumerate(state["order"])}
+        self.cluster_of_ticket = {tid: c['id'] for c in self.clusters for tid in c['ticket_ids']}
+        self._cluster_summary = {
+            "clusters": len(self.clusters),
+            "clustered_tickets": len(self.cluster_of_ticket),
+            "risk": dict(Counter(c['risk'] for c in self.clusters)),
+            # Every "High ..." label the policy emits (e.g. "High (Production Impact)")
+            "high_risk": sum(1 for c in self.clusters if c['risk'].startswith("High")),
+            "stage": dict(Counter(c['stage'] for c in self.clusters)),
+        }
+
+    def _refresh_merchant_index(self):
+        stamp = observe.file_stamps([self.merchant_index_path])
+        if stamp == self._merchant_stamp:
+            return
+        self._merchant_stamp = stamp
+        exists = os.path.exists(self.merchant_index_path)
+        self.merchant_index = MerchantIndex(self.merchant_index_path) if exists else None
+
+    # --- QUERIES ---
+    def summary(self):
+        """Pre-aggregated headline metrics."""
+        self.refresh()
+        with self._lock:
+            return dict(self._cluster_summary, tickets=len(self.tickets), merchants=len(self.merchant_counts),
+                        seq=self.seq)
+
+    def cluster(self, cluster_id):
+        self.refresh()
+        with self._lock:
+            return self.cluster_by_id.get(cluster_id)
+
+    def incident(self, incident_id):
+        """
+        One repro pack by incident id. The store is opened (index loaded)
+        once; later lookups only index packs appended since, then seek.
+        """
+        with self._lock:
+            if self._incidents is None:
+                self._incidents = IncidentStore(self.incident_root)
+            store = self._incidents
+        return store.get(incident_id)
+
+    def merchant_view(self, merchant_id):
+        """
+        Clusters, incident ids and tickets affecting one merchant, via the
+        merchant index (O(affected clusters)). Output written before the
+        index existed falls back to scanning each cluster's merchant list.
+        """
+        self.refresh()
+        with self._lock:
+            index = self.merchant_index
+            if index is not None:
+                hits = index.lookup(merchant_id)
+                ids = sorted((c for c in hits["clusters"] if c in self.cluster_by_id), key=self._cluster_rank.get)
+                clusters = [self.cluster_by_id[c] for c in ids]
+                return {"clusters": clusters, "incidents": hits["incidents"], "ticket_ids": hits["tickets"]}
+
+            clusters = [c for c in self.clusters if merchant_id in c['merchants']]
+        return {"clusters": clusters,
+                "incidents": [c['repro_pack']['id'] for c in clusters if c.get('repro_pack')],
+                "ticket_ids": []}
+
+    def cluster_page(self, page=1, page_size=20, risk=None, stage=None, search=None):
+        """Filtered clusters in output order -> (page items, total matches)."""
+        self.refresh()
+        with self._lock:
+            items = self.clusters
+        if risk:
+            items = [c for c in items if c['risk'] == risk]
+        if stage:
+            items = [c for c in items if c['stage'] == stage]
+        if search:
+            needle = search.lower()
+            items = [c for c in items if needle in c['title'].lower()]
+        return _page(items, page, page_size)
+
+    def ticket_page(self, page=1, page_size=50, merchant_id=None, cluster_id=None, search=None, newest_first=True):
+        """Filtered tickets -> (page items, total matches). Each item gains its cluster id (or None)."""
+        self.refresh()
+        with self._lock:
+            cluster_of_ticket = self.cluster_of_ticket
+            if cluster_id is not None:
+                # The cluster's member ids -> their tickets, in log order: O(cluster), not O(all tickets)
+                cluster = self.cluster_by_id.get(cluster_id)
+                position = self.ticket_position
+                rows = sorted(position[tid] for tid in (cluster['ticket_ids'] if cluster else ()) if tid in position)
+                items = [self.tickets[row] for row in rows]
+                if merchant_id is not None:
+                    items = [t for t in items if t['merchant_id'] == merchant_id]
+            elif merchant_id is not None:
+                items = list(self.tickets_by_merchant.get(merchant_id, ()))
+            else:
+                items = self.tickets
+        if search:
+            needle = search.lower()
+            items = [t for t in items if needle in t['message'].lower()]
+        if newest_first:
+            items = items[::-1]
+
+        rows, total = _page(items, page, page_size)
+        return [{"ticket_id": t['ticket_id'], "merchant_id": t['merchant_id'], "message": t['message'],
+                 "cluster": cluster_of_ticket.get(t['ticket_id'])} for t in rows], total
@@ -0,0 +1,117 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+# MinHash / LSH shape for near-duplicate detection: NUM_PERM hash functions
+# in BANDS bands (candidate pairs agree on a whole band, i.e. Jaccard
+# roughly above (1 / BANDS) ** (BANDS / NUM_PERM)); candidates are then
+# confirmed against the requested threshold.
+NUM_PERM = 64
+BANDS = 16
+SHINGLE = 5
+_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_text(message):
+    """Case- and whitespace-insensitive form of a message (what counts as an exact duplicate)."""
+    return _SPACE.sub(" ", message).strip().lower()
+
+
+def text_key(normalized):
+    """Clusterer point key for a normalised text."""
+    return "d:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def minhash(normalized):
+    """MinHash signature (NUM_PERM uint64) over the text's character shingles."""
+    padded = normalized if len(normalized) >= SHINGLE else normalized.ljust(SHINGLE)
+    shingles = {padded[i:i + SHINGLE] for i in range(len(padded) - SHINGLE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def near_duplicate_reps(texts, threshold):
+    """
+    For each normalised text, the index of the earliest text it is a near
+    duplicate of (estimated character-shingle Jaccard >= threshold), or
+    its own index. LSH banding keeps this O(texts * BANDS).
+    """
+    rows_per_band = NUM_PERM // BANDS
+    reps = list(range(len(texts)))
+    signatures = []
+    buckets = {}
+    for i, text in enumerate(texts):
+        signature = minhash(text)
+        signatures.append(signature)
+        for band in range(BANDS):
+            bucket = (band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+            j = buckets.setdefault(bucket, i)
+            if j != i and reps[i] == i and np.mean(signatures[j] == signature) >= threshold:
+                reps[i] = reps[j]
+    return reps
+
+
+class DuplicateGroups:
+    """
+    Tickets (rows of a TicketTable or TicketView) collapsed into groups of
+    duplicates:
+      * keys       group key per ticket (the clusterer's point key)
+      * group_of   group index per ticket
+      * rep_rows   first ticket of each group (positions in `tickets`)
+      * weights    tickets per group (the multiplicity DBSCAN counts)
+    """
+
+    def __init__(self, keys, group_of, rep_rows, weights):
+        self.keys = keys
+        self.group_of = group_of
+        self.rep_rows = rep_rows
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.rep_rows)
+
+    @classmethod
+    def identity(cls, tickets):
+        """No collapsing: one group per ticket, keyed by ticket id (the pre-dedup behaviour)."""
+        n = len(tickets)
+        rows = np.arange(n, dtype=np.int64)
+        return cls(tickets.ticket_ids.tolist(), rows, rows, np.ones(n, dtype=np.int64))
+
+
+def collapse(tickets, near_threshold=None):
+    """
+    Groups tickets whose normalised texts are identical and, with a
+    `near_threshold` (0-1), near-duplicates of an earlier text. Work is per
+    distinct message in the table's pool, not per ticket.
+    """
+    table = getattr(tickets, "table", tickets)
+    codes = tickets.message_codes
+    unique_codes, first_pos, inverse = np.unique(codes, return_index=True, return_inverse=True)
+
+    # Distinct texts in order of first appearance, so the earliest ticket's text represents a group
+    order = np.argsort(first_pos, kind="stable")
+    normalized = [normalize_text(table.pool[c]) for c in unique_codes[order].tolist()]
+    if near_threshold is not None:
+        reps = near_duplicate_reps(normalized, near_threshold)
+        normalized = [normalized[r] for r in reps]
+    code_keys = [text_key(text) for text in normalized]
+
+    group_index = {}
+    code_group = np.empty(len(unique_codes), dtype=np.int64)
+    for position, key in zip(order.tolist(), code_keys):
+        code_group[position] = group_index.setdefault(key, len(group_index))
+    group_of = code_group[inverse.ravel()]
+    keys = list(group_index)
+
+    rep_rows = np.full(len(keys), len(codes), dtype=np.int64)
+    np.minimum.at(rep_rows, group_of, np.arange(len(codes), dtype=np.int64))
+    weights = np.bincount(group_of, minlength=len(keys))
+    return DuplicateGroups([keys[g] for g in group_of.tolist()], group_of, rep_rows, weights)
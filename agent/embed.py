@@ -1,14 +1,136 @@
-from sentence_transformers import SentenceTransformer
+import threading
 
-# Initialize model once to avoid reloading
-model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
 
-def generate_embeddings(tickets):
+from agent.embed_cache import EmbeddingCache
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Built on first use (not at import), then reused for the process lifetime.
+# Importing torch/sentence-transformers alone costs seconds, so entry points
+# that never encode (no new tickets, read-only checks) skip it entirely.
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+def set_model(model, name=None):
+    """
+    Replaces the encoder (anything with encode() and
+    get_sentence_embedding_dimension()), e.g. an offline stand-in. `name`
+    keys the embedding cache so vectors from different encoders never mix.
+    """
+    global _model, MODEL_NAME
+    with _model_lock:
+        _model = model
+        if name is not None:
+            MODEL_NAME = name
+
+def __getattr__(name):
+    # Keeps `embed.model` working for existing callers, lazily
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+DEFAULT_BATCH_SIZE = 256
+OUTPUT_DTYPES = ("float32", "float16", "int8")
+
+def quantize_int8(vectors):
+    """Symmetric per-row int8 quantisation. Returns (codes, float32 scales)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def dequantize_int8(codes, scales):
+    return codes.astype(np.float32) * scales[:, None]
+
+def encode_batched(messages, out=None, batch_size=DEFAULT_BATCH_SIZE, num_threads=None,
+                   dtype="float32", bucket_by_length=True):
+    """
+    Process (bounded memory): Encodes messages in fixed-size batches and
+    writes each batch straight into a preallocated output array, so only
+    one batch of activations is alive at a time.
+
+    - bucket_by_length: batches are cut from the messages sorted by length,
+      so short tickets are not padded up to the longest message in the run.
+    - out: optional preallocated (n, dim) array or np.memmap of `dtype`.
+    - dtype: "float32", "float16", or "int8" (returns (codes, scales)).
+    - num_threads: caps torch intra-op threads for this process.
     """
-    Process: Converts ticket messages to vector embeddings.
+    if dtype not in OUTPUT_DTYPES:
+        raise ValueError(f"dtype must be one of {OUTPUT_DTYPES}, got {dtype}")
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+
+    n = len(messages)
+    model = get_model()
+    dim = model.get_sentence_embedding_dimension()
+    if out is None:
+        out = np.empty((n, dim), dtype=np.dtype(dtype))
+    elif out.shape != (n, dim) or out.dtype != np.dtype(dtype):
+        raise ValueError(f"out must have shape {(n, dim)} and dtype {dtype}")
+    scales = np.ones(n, dtype=np.float32) if dtype == "int8" else None
+
+    order = np.argsort([len(m) for m in messages], kind="stable") if bucket_by_length else np.arange(n)
+
+    for start in range(0, n, batch_size):
+        idx = order[start:start + batch_size]
+        batch = [messages[i] for i in idx]
+        vectors = np.asarray(model.encode(batch, batch_size=len(batch)), dtype=np.float32)
+
+        if dtype == "int8":
+            out[idx], scales[idx] = quantize_int8(vectors)
+        else:
+            out[idx] = vectors
+
+    return (out, scales) if dtype == "int8" else out
+
+def generate_embeddings(tickets, cache_dir=".embedding_cache", max_cache_entries=250000,
+                        batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Process: Converts ticket messages (a TicketTable or TicketView) to
+    vector embeddings, one row per ticket. Messages already seen (same
+    text + model) are read from the on-disk cache, so only new tickets go
+    through the model. Pass cache_dir=None to bypass the cache. Encoding
+    runs in length-bucketed batches.
     """
-    messages = [t['message'] for t in tickets]
-    embeddings = model.encode(messages)
-    
-    print(f"--> [INTERNAL] Generated embeddings for {len(messages)} tickets.")
-    return embeddings
\ No newline at end of file
+    messages = tickets.messages
+
+    if cache_dir is None:
+        embeddings = encode_batched(messages, batch_size=batch_size)
+        print(f"--> [INTERNAL] Generated embeddings for {len(messages)} tickets.")
+        return embeddings
+
+    cache = EmbeddingCache(cache_dir, model_name=MODEL_NAME, max_entries=max_cache_entries)
+    embeddings, missing = cache.lookup(messages)
+
+    if missing:
+        # Encode each unseen text once, even if several tickets repeat it
+        new_messages = list(dict.fromkeys(messages[i] for i in missing))
+        new_vectors = encode_batched(new_messages, batch_size=batch_size)
+        cache.store(new_messages, new_vectors)
+
+        if embeddings is None:
+            embeddings = np.zeros((len(messages), new_vectors.shape[1]), dtype=np.float32)
+        row_of = {m: i for i, m in enumerate(new_messages)}
+        for i in missing:
+            embeddings[i] = new_vectors[row_of[messages[i]]]
+
+    cache.save()
+
+    stats = cache.stats()
+    print(f"--> [INTERNAL] Generated embeddings for {len(messages)} tickets "
+          f"(cache hits: {stats['hits']}, misses: {stats['misses']}, evicted: {stats['evictions']}).")
+    if embeddings is None:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    return embeddings
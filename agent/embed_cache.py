@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"
+LAST_USED_FILE = "last_used.i64"
+
+# Process-wide memo of message -> cache key per model, so a long-lived
+# process (daemon, batch runner) hashes each distinct text once. Cleared
+# when it grows past KEY_MEMO_LIMIT.
+KEY_MEMO_LIMIT = 500000
+_key_memo = {}
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store for ticket embeddings.
+
+    Vectors live in a memory-mapped float32 matrix (one row per entry) and an
+    index file maps sha1(model_name + message) -> row. Each row's last-used
+    clock lives in a parallel memory-mapped int64 array, so cache hits only
+    touch those slots in place; the JSON index is rewritten only when
+    entries are added or evicted. When the store grows past `max_entries`,
+    the least recently used rows are evicted and recycled for new entries.
+    """
+
+    def __init__(self, cache_dir=".embedding_cache", model_name="all-MiniLM-L6-v2", max_entries=250000):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.dim = None
+        self.capacity = 0
+        self.size = 0       # High-water mark of rows ever used in the matrix
+        self.clock = 0      # Logical time, bumped once per lookup batch
+        self.entries = {}   # key -> row
+        self.free_rows = []
+        self.vectors = None
+        self.last_used = None  # row -> clock of its last lookup or insert
+        self._dirty = False    # Index needs rewriting (entries added / evicted)
+        self._touched = False  # last_used slots written since the last save
+
+        self._load()
+
+    # --- KEYING ---
+    def key(self, message):
+        memo = _key_memo.setdefault(self.model_name, {})
+        key = memo.get(message)
+        if key is None:
+            if len(memo) >= KEY_MEMO_LIMIT:
+                memo.clear()
+            payload = f"{self.model_name}\0{message}".encode("utf-8")
+            key = memo[message] = hashlib.sha1(payload).hexdigest()
+        return key
+
+    # --- PERSISTENCE ---
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _vectors_path(self):
+        return os.path.join(self.cache_dir, VECTORS_FILE)
+
+    def _last_used_path(self):
+        return os.path.join(self.cache_dir, LAST_USED_FILE)
+
+    def _map(self):
+        """(Re-)maps the vector matrix and the last-used array at the current capacity."""
+        self.vectors = np.memmap(self._vectors_path(), dtype=np.float32, mode="r+",
+                                 shape=(self.capacity, self.dim))
+        mode = "r+b" if os.path.exists(self._last_used_path()) else "w+b"
+        with open(self._last_used_path(), mode) as f:
+            f.truncate(self.capacity * 8)
+        self.last_used = np.memmap(self._last_used_path(), dtype=np.int64, mode="r+", shape=(self.capacity,))
+
+    def _load(self):
+        if not os.path.exists(self._index_path()) or not os.path.exists(self._vectors_path()):
+            return
+
+        with open(self._index_path(), "r") as f:
+            index = json.load(f)
+
+        # A different model produces incompatible vectors; start fresh.
+        if index.get("model") != self.model_name:
+            print(f"--> [CACHE] Model changed ({index.get('model')} -> {self.model_name}). Discarding cache.")
+            return
+
+        self.dim = index["dim"]
+        self.capacity = index["capacity"]
+        self.size = index["size"]
+        self.clock = index["clock"]
+        self.entries = index["entries"]
+        self.free_rows = index["free_rows"]
+        legacy = bool(self.entries) and isinstance(next(iter(self.entries.values())), list)
+        self._map()
+        if legacy:
+            # Older indexes stored [row, last_used] per entry; move the clocks out
+            for key, (row, last_used) in self.entries.items():
+                self.entries[key] = row
+                self.last_used[row] = last_used
+            self._dirty = self._touched = True
+        if self.size:
+            self.clock = max(self.clock, int(self.last_used[:self.size].max()))
+
+    def _grow(self, min_capacity):
+        """Extends the backing file (capacity doubling) and re-maps it."""
+        new_capacity = max(min_capacity, self.capacity * 2, 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.last_used.flush()
+            self.vectors = self.last_used = None
+
+        mode = "r+b" if os.path.exists(self._vectors_path()) else "w+b"
+        with open(self._vectors_path(), mode) as f:
+            f.truncate(new_capacity * self.dim * 4)
+
+        self.capacity = new_capacity
+        self._map()
+
+    def save(self):
+        """
+        Flushes last-used clocks (only the touched pages) and, if entries
+        were added or evicted, the vectors and the index.
+        """
+        if self.vectors is None:
+            return
+        if self._touched:
+            self.last_used.flush()
+            self._touched = False
+        if not self._dirty:
+            return
+
+        self.vectors.flush()
+        index = {
+            "model": self.model_name,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "size": self.size,
+            "clock": self.clock,
+            "entries": self.entries,
+            "free_rows": self.free_rows,
+        }
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+        self._dirty = False
+
+    # --- LOOKUP / INSERT ---
+    def lookup(self, messages):
+        """
+        Returns (vectors, missing) where `vectors` holds cached rows (zeros for
+        misses) and `missing` lists the positions that still need encoding.
+        """
+        self.clock += 1
+        missing = []
+        found_pos = []
+        found_rows = []
+
+        # Hash each distinct text once, however many tickets repeat it
+        row_of = {message: self.entries.get(self.key(message)) for message in dict.fromkeys(messages)}
+        for i, message in enumerate(messages):
+            row = row_of[message]
+            if row is None:
+                missing.append(i)
+            else:
+                found_pos.append(i)
+                found_rows.append(row)
+
+        self.hits += len(found_pos)
+        self.misses += len(missing)
+        if found_pos:
+            self.last_used[found_rows] = self.clock
+            self._touched = True
+
+        if self.dim is None:
+            return None, missing
+
+        out = np.zeros((len(messages), self.dim), dtype=np.float32)
+        if found_pos:
+            out[found_pos] = self.vectors[found_rows]
+        return out, missing
+
+    def store(self, messages, vectors):
+        """Inserts freshly encoded vectors, evicting LRU entries past the size bound."""
+        if not messages:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match cache dim {self.dim}")
+
+        for message, vector in zip(messages, vectors):
+            key = self.key(message)
+            if key in self.entries:
+                continue
+
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                if self.size >= self.capacity:
+                    self._grow(self.size + 1)
+                row = self.size
+                self.size += 1
+
+            self.vectors[row] = vector
+            self.last_used[row] = self.clock
+            self.entries[key] = row
+
+        self._dirty = self._touched = True
+        self._evict()
+
+    def _evict(self):
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return
+
+        # Oldest `last_used` first; entries touched in this batch are kept
+        # unless the batch alone exceeds the bound.
+        keys = list(self.entries)
+        rows = np.fromiter(self.entries.values(), dtype=np.int64, count=len(keys))
+        victims = np.argsort(self.last_used[rows], kind="stable")[:overflow]
+        for i in victims.tolist():
+            del self.entries[keys[i]]
+            self.free_rows.append(int(rows[i]))
+
+        self.evictions += len(victims)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,324 @@
+import bisect
+import glob
+import json
+import os
+import queue
+import threading
+
+try:
+    import fcntl  # POSIX advisory locks for concurrent writers
+except ImportError:
+    fcntl = None
+
+STORE_DIR = "repro_packs"
+LOG_NAME = "incidents.ndjson"
+INDEX_NAME = "incidents.index.json"
+
+
+def _meta(record):
+    """The indexed fields of a repro pack."""
+    return {
+        "fingerprint": record.get("cluster_fingerprint"),
+        "cluster_id": record.get("cluster_id"),
+        "root_cause": record.get("suspected_root_cause"),
+        "merchants": record.get("affected_merchants") or [],
+        "generated_at": record.get("generated_at") or "",
+    }
+
+
+class IncidentStore:
+    """
+    Append-only store of repro packs: one NDJSON log plus an index.
+
+    `add` returns at once; a background thread appends queued packs in
+    batches (one lock + fsync per batch) and records their byte offsets.
+    Packs are indexed by incident id, cluster fingerprint, root cause,
+    merchant and generation time, so lookups seek straight to the record
+    instead of opening every file.
+
+    One incident per (cluster id, root cause): a pack for a cluster that
+    already has an incident with that root cause takes the existing id and
+    is appended as the incident's new version (the log keeps every version;
+    the index and reads follow the latest). A pack whose cluster
+    fingerprint is unchanged is not written again.
+
+    The index file is only a cache of the log: on open the store loads it
+    and scans whatever was appended after it (by this or another process).
+    """
+
+    def __init__(self, root=STORE_DIR, batch_size=256):
+        self.root = os.path.abspath(root)  # Stable if the process changes directory
+        self.log_path = os.path.join(self.root, LOG_NAME)
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        self.batch_size = batch_size
+
+        self.entries = {}           # incident_id -> meta + "offset" (None while queued)
+        self.by_fingerprint = {}    # cluster fingerprint -> incident_id
+        self.by_cluster = {}        # (cluster id, root cause) -> incident_id
+        self.by_root_cause = {}     # root cause -> set(incident_id)
+        self.by_merchant = {}       # merchant_id -> set(incident_id)
+        self.by_time = []           # sorted [(generated_at, incident_id)]
+        self.pending = {}           # incident_id -> record not yet on disk
+        self.indexed_size = 0       # Log bytes covered by the index
+
+        self._lock = threading.RLock()
+        self._queue = queue.Queue()
+        self._writer = None
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load()
+
+    # --- INDEX MAINTENANCE ---
+    def _index(self, incident_id, meta, offset):
+        """Indexes a pack, replacing the index entries of an earlier version of the incident."""
+        if incident_id in self.entries:
+            self._unindex(incident_id)
+        self.entries[incident_id] = dict(meta, offset=offset)
+        if meta["fingerprint"]:
+            self.by_fingerprint[meta["fingerprint"]] = incident_id
+        if meta.get("cluster_id") is not None:
+            self.by_cluster[(meta["cluster_id"], meta["root_cause"])] = incident_id
+        self.by_root_cause.setdefault(meta["root_cause"], set()).add(incident_id)
+        for merchant_id in meta["merchants"]:
+            self.by_merchant.setdefault(merchant_id, set()).add(incident_id)
+        bisect.insort(self.by_time, (meta["generated_at"], incident_id))
+
+    def _unindex(self, incident_id):
+        entry = self.entries.pop(incident_id)
+        if self.by_fingerprint.get(entry["fingerprint"]) == incident_id:
+            del self.by_fingerprint[entry["fingerprint"]]
+        key = (entry.get("cluster_id"), entry["root_cause"])
+        if self.by_cluster.get(key) == incident_id:
+            del self.by_cluster[key]
+        self.by_root_cause.get(entry["root_cause"], set()).discard(incident_id)
+        for merchant_id in entry["merchants"]:
+            self.by_merchant.get(merchant_id, set()).discard(incident_id)
+        i = bisect.bisect_left(self.by_time, (entry["generated_at"], incident_id))
+        if i < len(self.by_time) and self.by_time[i] == (entry["generated_at"], incident_id):
+            del self.by_time[i]
+
+    def _load(self):
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # An index describing more bytes than the log has is stale
+            if data.get("log_size", 0) <= log_size:
+                for incident_id, entry in data.get("entries", {}).items():
+                    self._index(incident_id, entry, entry["offset"])
+                self.indexed_size = data.get("log_size", 0)
+        self._scan_tail()
+
+    def _scan_tail(self):
+        """Indexes records appended past `indexed_size`. Caller holds the lock (or is __init__)."""
+        if not os.path.exists(self.log_path):
+            return
+        offset = self.indexed_size
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    record = json.loads(line)
+                    self._index(record["incident_id"], _meta(record), offset)
+                offset += len(line)
+        self.indexed_size = offset
+
+    def refresh(self):
+        """Picks up packs appended by other processes since the last look."""
+        with self._lock:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.indexed_size:
+                self._scan_tail()
+
+    def save_index(self):
+        with self._lock:
+            entries = {i: e for i, e in self.entries.items() if e["offset"] is not None}
+            payload = {"log_size": self.indexed_size, "entries": entries}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.index_path)
+
+    # --- WRITES ---
+    def find_by_fingerprint(self, fingerprint):
+        """The stored pack for a cluster fingerprint, or None."""
+        with self._lock:
+            incident_id = self.by_fingerprint.get(fingerprint)
+        return self.get(incident_id) if incident_id else None
+
+    def find_by_cluster(self, cluster_id, root_cause):
+        """The latest pack of a cluster's incident with this root cause, or None."""
+        self.refresh()
+        with self._lock:
+            incident_id = self.by_cluster.get((cluster_id, root_cause))
+        return self.get(incident_id) if incident_id else None
+
+    def add(self, record):
+        """
+        Queues a pack for writing and indexes it immediately. Returns the
+        incident id: the existing one if the fingerprint is known, or if
+        the cluster already has an incident with this root cause (the pack
+        is then queued as that incident's new version).
+        """
+        with self._lock:
+            fingerprint = record.get("cluster_fingerprint")
+            if fingerprint and fingerprint in self.by_fingerprint:
+                return self.by_fingerprint[fingerprint]
+
+            existing = self.by_cluster.get((record.get("cluster_id"), record.get("suspected_root_cause")))
+            if existing is not None and record.get("cluster_id") is not None:
+                record = dict(record, incident_id=existing, first_generated_at=self._first_generated_at(existing))
+            incident_id = record["incident_id"]
+            self.pending[incident_id] = record
+            self._index(incident_id, _meta(record), None)
+            self._queue.put(record)
+
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="incident-writer", daemon=True)
+                self._writer.start()
+        return incident_id
+
+    def _first_generated_at(self, incident_id):
+        """When an incident's first version was generated. Caller holds the lock."""
+        records = self._read_records([incident_id])
+        if not records:
+            return self.entries[incident_id]["generated_at"]
+        return records[0].get("first_generated_at") or records[0].get("generated_at")
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]  # None: close() asked to stop
+            try:
+                if records:
+                    self._append(records)
+            except Exception as e:
+                print(f"--> [ACT] Error: failed to write {len(records)} repro packs: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(records) < len(batch):
+                return
+
+    def _append(self, batch):
+        lines = [(json.dumps(record) + "\n").encode("utf-8") for record in batch]
+        with open(self.log_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    # Index anything another process appended first
+                    self._scan_tail()
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(b"".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        with self._lock:
+            for record, line in zip(batch, lines):
+                incident_id = record["incident_id"]
+                # A newer version still queued stays the one reads see
+                if self.pending.get(incident_id) is record:
+                    del self.pending[incident_id]
+                    self.entries[incident_id]["offset"] = offset
+                offset += len(line)
+            self.indexed_size = offset
+
+    def flush(self):
+        """Blocks until every queued pack is on disk, then persists the index."""
+        self._queue.join()
+        self.save_index()
+
+    def close(self):
+        """Writes every queued pack, stops the writer thread and persists the index."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+        self.save_index()
+
+    # --- QUERIES ---
+    def _read_records(self, incident_ids):
+        with self._lock:
+            located = [(self.pending.get(i), self.entries[i]["offset"]) for i in incident_ids if i in self.entries]
+
+        records = []
+        f = None
+        try:
+            for pending, offset in located:
+                if pending is not None:
+                    records.append(pending)
+                elif offset is not None:
+                    if f is None:
+                        f = open(self.log_path, "rb")
+                    f.seek(offset)
+                    records.append(json.loads(f.readline()))
+        finally:
+            if f is not None:
+                f.close()
+        return records
+
+    def get(self, incident_id):
+        """One pack by incident id, or None."""
+        self.refresh()
+        records = self._read_records([incident_id])
+        return records[0] if records else None
+
+    def query(self, root_cause=None, merchant_id=None, since=None, until=None, limit=None):
+        """
+        Packs matching every given filter, newest first. `since`/`until`
+        are ISO timestamps compared against `generated_at` (inclusive).
+        """
+        self.refresh()
+        with self._lock:
+            lo = 0 if since is None else bisect.bisect_left(self.by_time, (since, ""))
+            hi = len(self.by_time) if until is None else bisect.bisect_right(self.by_time, (until, "\uffff"))
+            candidates = [incident_id for _, incident_id in reversed(self.by_time[lo:hi])]
+
+            if root_cause is not None:
+                keep = self.by_root_cause.get(root_cause, set())
+                candidates = [i for i in candidates if i in keep]
+            if merchant_id is not None:
+                keep = self.by_merchant.get(merchant_id, set())
+                candidates = [i for i in candidates if i in keep]
+        if limit is not None:
+            candidates = candidates[:limit]
+        return self._read_records(candidates)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.entries)
+
+    # --- LEGACY ---
+    def import_legacy_packs(self):
+        """
+        One-shot import of the old one-file-per-incident INC-*.json packs.
+        The files are left in place; already-imported ids are skipped.
+        """
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(self.root, "INC-*.json"))):
+            with open(path, "r") as f:
+                record = json.load(f)
+            with self._lock:
+                if record.get("incident_id") in self.entries:
+                    continue
+            self.add(record)
+            imported += 1
+        self.flush()
+        print(f"--> [ACT] Imported {imported} legacy repro packs into {self.log_path}.")
+        return imported
+
@@ -0,0 +1,322 @@
+import json
+import os
+
+import numpy as np
+
+from agent.neighbors import build_index, normalize
+
+
+class IncrementalDBSCAN:
+    """
+    Incremental DBSCAN over cosine distance with persistent state.
+
+    Keeps the neighbourhood graph (rows within `eps`), neighbour counts and
+    label assignments between runs, so a new ticket only touches its own
+    neighbourhood instead of refitting the whole corpus. With the exact
+    ("brute") neighbour backend it produces the same core/cluster structure
+    as sklearn's DBSCAN(metric='cosine'); the "ivf" backend trades a little
+    recall for sub-linear neighbourhood queries.
+
+    Cluster ids are stable: a new cluster takes the next unused id, a merge
+    keeps the oldest (smallest) id, and a split keeps the id on the
+    component holding the oldest row.
+
+    Points are weighted: several members (tickets) can share one point
+    (e.g. duplicate messages, see agent/dedup.py). A point counts its
+    weight (member count) towards min_samples, like sklearn's
+    sample_weight, and inserting a member into an existing point skips
+    the neighbourhood query altogether. With one member per point this is
+    plain DBSCAN.
+    """
+
+    def __init__(self, eps=0.60, min_samples=3, backend="brute"):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.backend = backend
+
+        self.index = build_index(backend)   # Owns the normalised vectors, row -> vector
+        self.keys = []              # Point key per row (ticket_id, or a dedup key)
+        self.row_of = {}            # Point key -> row
+        self.member_row = {}        # Member (ticket_id) -> row
+        self.weights = []           # Row -> member count (0 once removed)
+        self.mass = []              # Row -> own weight + neighbours' weights
+        self.neighbors = []         # Row -> set of rows within eps (excluding self)
+        self.labels = []            # Row -> cluster id, -1 for noise
+        self.members = {}           # Cluster id -> set of rows
+        self.next_id = 0
+
+    # --- HELPERS ---
+    def _is_core(self, row):
+        # sklearn counts the point itself towards min_samples
+        return self.mass[row] >= self.min_samples
+
+    def _shift_mass(self, rows, delta):
+        """Adds `delta` to the mass of `rows`; returns the rows that became and stopped being core."""
+        gained, lost = [], []
+        for r in rows:
+            before = self.mass[r]
+            self.mass[r] = before + delta
+            if before < self.min_samples <= before + delta:
+                gained.append(r)
+            elif before >= self.min_samples > before + delta:
+                lost.append(r)
+        return gained, lost
+
+    def _reweight(self, row, delta):
+        """Adds `delta` members to an existing point and repairs the clusters around it."""
+        self.weights[row] += delta
+        gained, lost = self._shift_mass([row, *self.neighbors[row]], delta)
+        for c in gained:
+            self._expand_core(c)
+        for cluster_id in sorted({self.labels[r] for r in lost if self.labels[r] != -1}):
+            self._resplit(cluster_id)
+
+    def _set_label(self, row, cluster_id):
+        old = self.labels[row]
+        if old == cluster_id:
+            return
+        if old != -1:
+            self.members[old].discard(row)
+            if not self.members[old]:
+                del self.members[old]
+        self.labels[row] = cluster_id
+        if cluster_id != -1:
+            self.members.setdefault(cluster_id, set()).add(row)
+
+    def _new_cluster_id(self):
+        cluster_id = self.next_id
+        self.next_id += 1
+        return cluster_id
+
+    def _merge(self, src, dst):
+        rows = self.members.pop(src, set())
+        for row in rows:
+            self.labels[row] = dst
+        self.members.setdefault(dst, set()).update(rows)
+
+    def _expand_core(self, row):
+        """`row` has just become a core point: join, create or merge clusters."""
+        ids = {self.labels[q] for q in self.neighbors[row]
+               if self.labels[q] != -1 and self._is_core(q)}
+
+        if ids:
+            cluster_id = min(ids)
+            for other in ids - {cluster_id}:
+                self._merge(other, cluster_id)
+        else:
+            cluster_id = self._new_cluster_id()
+
+        self._set_label(row, cluster_id)
+        for q in self.neighbors[row]:
+            if self.labels[q] == -1:
+                self._set_label(q, cluster_id)
+
+    def _attach_border(self, row):
+        """Assigns a non-core row to a neighbouring core's cluster, or noise."""
+        for q in sorted(self.neighbors[row]):
+            if self._is_core(q) and self.labels[q] != -1:
+                self._set_label(row, self.labels[q])
+                return
+        self._set_label(row, -1)
+
+    def _resplit(self, cluster_id):
+        """Recomputes the core components of one cluster after a removal."""
+        rows = set(self.members.get(cluster_id, ()))
+        if not rows:
+            return
+
+        cores = {r for r in rows if self._is_core(r)}
+        components = []
+        seen = set()
+        for start in sorted(cores):
+            if start in seen:
+                continue
+            component = []
+            stack = [start]
+            seen.add(start)
+            while stack:
+                r = stack.pop()
+                component.append(r)
+                for q in self.neighbors[r]:
+                    if q in cores and q not in seen:
+                        seen.add(q)
+                        stack.append(q)
+            components.append(component)
+
+        # The component containing the oldest core keeps the id
+        for i, component in enumerate(components):
+            new_id = cluster_id if i == 0 else self._new_cluster_id()
+            for r in component:
+                self._set_label(r, new_id)
+
+        for r in sorted(rows - cores):
+            self._attach_border(r)
+
+    # --- PUBLIC API ---
+    def insert(self, key, vector, member=None):
+        """
+        Adds `member` (default: the key itself) to the point `key`. A new
+        key becomes a new point at `vector`; an existing one just gains
+        weight (`vector` is ignored and may be None). Idempotent per member.
+        Returns the member's label.
+        """
+        member = key if member is None else member
+        if member in self.member_row:
+            return self.labels[self.member_row[member]]
+        row = self.row_of.get(key)
+        if row is not None:
+            self.member_row[member] = row
+            self._reweight(row, 1)
+            return self.labels[row]
+
+        vector = normalize(vector)
+        nbrs = self.index.query_radius(vector, self.eps)
+
+        row = self.index.add(vector)
+        self.keys.append(key)
+        self.row_of[key] = row
+        self.member_row[member] = row
+        self.weights.append(1)
+        self.mass.append(1 + sum(self.weights[q] for q in nbrs))
+        self.neighbors.append(set(nbrs))
+        self.labels.append(-1)
+
+        for q in nbrs:
+            self.neighbors[q].add(row)
+        # Neighbours that crossed the threshold on exactly this insert
+        new_cores, _ = self._shift_mass(nbrs, 1)
+        if self._is_core(row):
+            new_cores.append(row)
+
+        for c in new_cores:
+            self._expand_core(c)
+
+        if self.labels[row] == -1:
+            self._attach_border(row)
+
+        return self.labels[row]
+
+    def remove(self, member):
+        """Drops a member; its point goes with its last member."""
+        row = self.member_row.pop(member, None)
+        if row is None:
+            return
+        if self.weights[row] > 1:
+            self._reweight(row, -1)
+            return
+        del self.row_of[self.keys[row]]
+
+        old_label = self.labels[row]
+        was_core = self._is_core(row)
+        nbrs = self.neighbors[row]
+        self._set_label(row, -1)
+        self.neighbors[row] = set()
+        self.weights[row] = self.mass[row] = 0
+        self.index.remove(row)
+
+        affected = {old_label} if was_core and old_label != -1 else set()
+        for q in nbrs:
+            self.neighbors[q].discard(row)
+        # Dropped below the core threshold on exactly this removal
+        _, lost = self._shift_mass(nbrs, -1)
+        affected.update(self.labels[q] for q in lost if self.labels[q] != -1)
+
+        for cluster_id in sorted(affected):
+            self._resplit(cluster_id)
+
+        # Border points of the removed row may have lost their only core
+        for q in nbrs:
+            if not self._is_core(q):
+                self._attach_border(q)
+
+    def label_of(self, member):
+        return self.labels[self.member_row[member]]
+
+    def __contains__(self, member):
+        return member in self.member_row
+
+    def __len__(self):
+        # Members (tickets), not points
+        return len(self.member_row)
+
+    # --- PERSISTENCE ---
+    def save(self, path):
+        """Writes a compacted snapshot (removed rows are dropped)."""
+        rows = sorted(self.row_of.values())
+        remap = {old: new for new, old in enumerate(rows)}
+        members = list(self.member_row)
+
+        indptr = [0]
+        indices = []
+        for r in rows:
+            indices.extend(sorted(remap[q] for q in self.neighbors[r]))
+            indptr.append(len(indices))
+
+        meta = {
+            "eps": self.eps,
+            "min_samples": self.min_samples,
+            "next_id": self.next_id,
+            "keys": [self.keys[r] for r in rows],
+        }
+        dim = self.index.vectors.shape[1] if self.index.vectors is not None else 0
+
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.array(json.dumps(meta)),
+            vectors=self.index.get(rows) if rows else np.zeros((0, dim), dtype=np.float32),
+            labels=np.array([self.labels[r] for r in rows], dtype=np.int64),
+            indptr=np.array(indptr, dtype=np.int64),
+            indices=np.array(indices, dtype=np.int64),
+            members=np.array(members, dtype=np.int64),
+            member_rows=np.array([remap[self.member_row[m]] for m in members], dtype=np.int64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, eps=0.60, min_samples=3, backend="brute"):
+        """
+        Restores a snapshot; returns a fresh instance if params differ or no
+        file exists. The neighbour index is rebuilt from the saved vectors, so
+        the backend may change between runs.
+        """
+        if not os.path.exists(path):
+            return cls(eps, min_samples, backend)
+
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["eps"] != eps or meta["min_samples"] != min_samples:
+                print("--> [CLUSTER] Clustering params changed. Rebuilding state from scratch.")
+                return cls(eps, min_samples, backend)
+
+            state = cls(eps, min_samples, backend)
+            vectors = data["vectors"]
+            labels = data["labels"].tolist()
+            indptr = data["indptr"]
+            indices = data["indices"]
+            # Snapshots from before weighted points: one member per point, keyed by itself
+            if "member_rows" in data.files:
+                members, member_rows = data["members"].tolist(), data["member_rows"]
+            else:
+                members, member_rows = meta["keys"], np.arange(len(labels), dtype=np.int64)
+
+        n = len(labels)
+        state.next_id = meta["next_id"]
+        state.keys = meta["keys"]
+        state.row_of = {k: i for i, k in enumerate(state.keys)}
+        state.member_row = dict(zip(members, member_rows.tolist()))
+        weights = np.bincount(member_rows, minlength=n)
+        owner = np.repeat(np.arange(n), np.diff(indptr))
+        mass = weights + np.bincount(owner, weights=weights[indices], minlength=n).astype(np.int64)
+        state.weights = weights.tolist()
+        state.mass = mass.tolist()
+        state.labels = labels
+        state.neighbors = [set(indices[indptr[i]:indptr[i + 1]].tolist()) for i in range(n)]
+        for row, label in enumerate(labels):
+            if label != -1:
+                state.members.setdefault(label, set()).add(row)
+
+        if n:
+            state.index.add_batch(vectors)
+
+        return state
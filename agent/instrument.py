@@ -0,0 +1,136 @@
+import cProfile
+import datetime
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+METRICS_PATH = "run_metrics.ndjson"
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RunMetrics:
+    """
+    Per-stage instrumentation for one pipeline run.
+
+    Each `with metrics.stage(name) as counts:` block records wall time, CPU
+    time (all threads of the process), the process peak RSS at stage end and
+    whatever item counts the block puts into `counts`. With `trace_memory`
+    the peak Python allocation inside each stage is measured too
+    (tracemalloc; adds overhead). With `profile_path` the whole run is
+    profiled with cProfile and the stats are dumped there.
+
+    `finish()` appends the run as one JSON line to `path`.
+    """
+
+    def __init__(self, path=METRICS_PATH, trace_memory=False, profile_path=None):
+        self.path = path
+        self.trace_memory = trace_memory
+        self.profile_path = profile_path
+        self.stages = []
+        self.counts = {}
+        self.status = "ok"
+        self.error = None
+        self.started_at = datetime.datetime.now().isoformat()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+        self._profiler = None
+        if profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        counts = {}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield counts
+        finally:
+            record = {
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall, 6),
+                "cpu_s": round(time.process_time() - cpu, 6),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            }
+            if self.trace_memory:
+                record["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            record["counts"] = counts
+            self.stages.append(record)
+            self.counts.update(counts)
+
+    def finish(self, status=None):
+        if status is not None:
+            self.status = status
+        run = {
+            "started_at": self.started_at,
+            "status": self.status,
+            "wall_s": round(time.perf_counter() - self._start_wall, 6),
+            "cpu_s": round(time.process_time() - self._start_cpu, 6),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "counts": self.counts,
+            "stages": self.stages,
+        }
+        if self.error is not None:
+            run["error"] = self.error
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            print(f"--> [METRICS] cProfile stats written to {self.profile_path}")
+        if self.trace_memory:
+            tracemalloc.stop()
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps(run) + "\n")
+
+        breakdown = ", ".join(f"{s['stage']} {s['wall_s']:.3f}s" for s in self.stages)
+        print(f"--> [METRICS] Run {self.status} in {run['wall_s']:.3f}s ({breakdown or 'no stages'}).")
+        return run
+
+
+def load_run_history(path=METRICS_PATH, limit=50):
+    """The last `limit` runs from the metrics file, oldest first. Reads only the tail."""
+    return tail_ndjson(path, limit)
+
+
+def tail_ndjson(path, limit=50, chunk_size=65536):
+    """The last `limit` records of an NDJSON file, oldest first, read backwards from EOF."""
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0 and tail.count(b"\n") <= limit:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+
+    lines = tail.split(b"\n")
+    if pos > 0:
+        lines = lines[1:]  # First line may be cut mid-record
+    records = []
+    for line in lines[-(limit + 1):]:
+        line = line.strip()
+        if line:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Torn line from a concurrent writer
+    return records[-limit:]
@@ -0,0 +1,58 @@
+import re
+
+# --- KEYWORD RULES (data, not code) ---
+# Every substring check used by reason, llm_mock, counterfactual and
+# repro_pack is declared here. A rule fires when any of its keywords
+# occurs (case-insensitive substring) in the text.
+RULES = {
+    # reason.analyze_cluster
+    "stage_live":        ("traffic", "timeout", "peak", "latency", "production", "outage", "500"),
+    "stage_integration": ("checkout", "order", "webhook", "payment", "cart"),
+    "docs_gap":          ("documentation", "example", "where can i find", "docs", "schema"),
+    "platform_failure":  ("timeout", "internal error", "500", "latency", "failure"),
+
+    # llm_mock.analyze_cluster_semantically
+    "llm_live":          ("production", "500", "outage"),
+    "llm_docs":          ("docs", "example", "how to"),
+    "checkout":          ("checkout",),
+    "error":             ("error",),
+
+    # counterfactual.generate_alternatives
+    "platform_evidence": ("500", "outage"),
+    "docs_evidence":     ("example", "docs"),
+
+    # repro_pack.generate_repro_pack
+    "payment":           ("payment",),
+    "cart":              ("cart",),
+    "error_sample":      ("500", "error", "timeout"),
+}
+
+def _compile(rules):
+    keywords = sorted({kw for kws in rules.values() for kw in kws}, key=len, reverse=True)
+
+    # Zero-width lookahead so matches may overlap ("internal error" and
+    # "error"); longest alternative first at each position.
+    pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in keywords) + "))")
+
+    # A keyword found at a position also implies every keyword it contains,
+    # which covers shorter alternatives starting at the same position.
+    implied = {kw: frozenset(other for other in keywords if other in kw) for kw in keywords}
+
+    keyword_rules = {kw: frozenset(r for r, kws in rules.items() if kw in kws) for kw in keywords}
+    return pattern, implied, keyword_rules
+
+_PATTERN, _IMPLIED, _KEYWORD_RULES = _compile(RULES)
+
+def scan(text):
+    """Keywords present in `text`, found in a single regex pass."""
+    found = set()
+    for match in _PATTERN.finditer(text.lower()):
+        found |= _IMPLIED[match.group(1)]
+    return frozenset(found)
+
+def fired_rules(keywords):
+    """Names of all rules triggered by a set of keyword hits."""
+    fired = set()
+    for kw in keywords:
+        fired |= _KEYWORD_RULES[kw]
+    return frozenset(fired)
@@ -1,11 +1,22 @@
 import json
+import random
+import threading
+import time
 
-def analyze_cluster_semantically(cluster_text):
+from agent import keywords
+
+# Bump when the prompt/response logic changes (invalidates cached analyses)
+PROMPT_VERSION = "1"
+
+def analyze_cluster_semantically(cluster_text, keyword_hits=None):
     """
     REASON (LLM-Hybrid): Simulates an LLM call to infer context from text.
-    Returns structured JSON validation.
+    Returns structured JSON validation. Pass precomputed `keyword_hits`
+    (TicketView.keyword_hits) to skip re-scanning the text.
     """
-    text = cluster_text.lower()
+    if keyword_hits is None:
+        keyword_hits = keywords.scan(cluster_text)
+    rules = keywords.fired_rules(keyword_hits)
     
     # Mock LLM Reasoning Logic (Simulating semantic understanding)
     response = {
@@ -15,21 +26,21 @@ def analyze_cluster_semantically(cluster_text):
         "confidence": 0.65
     }
 
-    if "production" in text or "500" in text or "outage" in text:
+    if "llm_live" in rules:
         response = {
             "stage": "Stage 3: Live / Scale",
             "root_cause": "Platform Issue / Regression",
             "reasoning": "Keywords '500 error' and 'production' indicate a server-side failure affecting live traffic.",
             "confidence": 0.92
         }
-    elif "docs" in text or "example" in text or "how to" in text:
+    elif "llm_docs" in rules:
         response = {
             "stage": "Stage 2: Integration",
             "root_cause": "Documentation Gap",
             "reasoning": "Users are requesting examples and schema definitions, implying missing information in developer guides.",
             "confidence": 0.85
         }
-    elif "checkout" in text and "error" not in text:
+    elif "checkout" in rules and "error" not in rules:
         # Edge case: Integration questions about checkout
         response = {
             "stage": "Stage 2: Integration",
@@ -38,4 +49,21 @@ def analyze_cluster_semantically(cluster_text):
             "confidence": 0.75
         }
 
-    return response
\ No newline at end of file
+    return response
+
+def make_latency_llm(mean_latency=0.8, jitter=0.25, seed=None):
+    """
+    Offline stand-in for a remote model endpoint: sleeps for a randomised
+    network/inference delay, then answers exactly like the mock above.
+    Used to measure the concurrent reasoning loop without a real LLM.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def analyze(cluster_text, keyword_hits=None):
+        with lock:
+            delay = max(0.0, rng.gauss(mean_latency, mean_latency * jitter))
+        time.sleep(delay)
+        return analyze_cluster_semantically(cluster_text, keyword_hits)
+
+    return analyze
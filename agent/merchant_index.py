@@ -0,0 +1,94 @@
+import json
+import os
+
+INDEX_PATH = "merchant_index.json"
+
+
+class MerchantIndex:
+    """
+    Inverted index merchant_id -> clusters, incidents and tickets.
+
+    Postings are kept per cluster (cluster id -> incident id and each
+    merchant's ticket ids in it), so re-indexing a cluster first drops its
+    old postings and touches nothing else. The merchant -> clusters map is
+    derived on load; a lookup is O(clusters affecting that merchant).
+    Stored next to the analysis output with the output seq it reflects.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.seq = None
+        self.postings = {}      # cluster id -> {"incident": id|None, "tickets": {merchant_id: [ticket_id]}}
+        self.by_merchant = {}   # merchant_id -> set(cluster id)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"--> [INDEX] Warning: unreadable merchant index {self.path}. Rebuilding.")
+            return
+        self.seq = data.get("seq")
+        for cluster_id, posting in data.get("clusters", {}).items():
+            # Merchant ids are stored as [id, tickets] pairs to keep their JSON type
+            tickets = {merchant_id: ticket_ids for merchant_id, ticket_ids in posting["tickets"]}
+            self._add(cluster_id, posting.get("incident"), tickets)
+
+    def _add(self, cluster_id, incident_id, tickets):
+        self.postings[cluster_id] = {"incident": incident_id, "tickets": tickets}
+        for merchant_id in tickets:
+            self.by_merchant.setdefault(merchant_id, set()).add(cluster_id)
+
+    def remove_cluster(self, cluster_id):
+        posting = self.postings.pop(cluster_id, None)
+        if posting is None:
+            return
+        for merchant_id in posting["tickets"]:
+            clusters = self.by_merchant.get(merchant_id)
+            if clusters is not None:
+                clusters.discard(cluster_id)
+                if not clusters:
+                    del self.by_merchant[merchant_id]
+
+    def update_cluster(self, cluster_obj, cluster_tickets):
+        """(Re)indexes one frontend cluster object and the TicketView it was built from."""
+        tickets = {}
+        for merchant_id, ticket_id in zip(cluster_tickets.merchant_ids.tolist(), cluster_tickets.ticket_ids.tolist()):
+            tickets.setdefault(merchant_id, []).append(ticket_id)
+        incident = cluster_obj['repro_pack']['id'] if cluster_obj.get('repro_pack') else None
+        self.remove_cluster(cluster_obj['id'])
+        self._add(cluster_obj['id'], incident, tickets)
+
+    def retain(self, cluster_ids):
+        """Drops every cluster not in `cluster_ids` (dissolved since the last run)."""
+        keep = set(cluster_ids)
+        for cluster_id in [c for c in self.postings if c not in keep]:
+            self.remove_cluster(cluster_id)
+
+    def lookup(self, merchant_id):
+        """Clusters, incidents and ticket ids affecting one merchant."""
+        cluster_ids = sorted(self.by_merchant.get(merchant_id, ()))
+        incidents = [self.postings[c]["incident"] for c in cluster_ids if self.postings[c]["incident"]]
+        tickets = [t for c in cluster_ids for t in self.postings[c]["tickets"][merchant_id]]
+        return {"clusters": cluster_ids, "incidents": incidents, "tickets": tickets}
+
+    def __len__(self):
+        return len(self.by_merchant)
+
+    def save(self, seq=None):
+        if seq is not None:
+            self.seq = seq
+        payload = {
+            "seq": self.seq,
+            "clusters": {
+                cluster_id: {"incident": posting["incident"], "tickets": list(posting["tickets"].items())}
+                for cluster_id, posting in self.postings.items()
+            },
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,207 @@
+import numpy as np
+
+
+def normalize(vectors):
+    """L2-normalises rows so cosine distance is 1 - dot product."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class BruteForceIndex:
+    """
+    Exact cosine radius search over L2-normalised vectors.
+    Every query is one matrix-vector product against all live rows.
+    """
+
+    name = "brute"
+
+    def __init__(self):
+        self.n = 0              # Rows allocated (including removed ones)
+        self.n_alive = 0
+        self.vectors = None     # (capacity, dim) float32
+        self.alive = np.zeros(0, dtype=bool)
+
+    def _reserve(self, n, dim):
+        if self.vectors is None:
+            capacity = max(1024, 1 << max(n - 1, 0).bit_length())
+            self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+            self.alive = np.zeros(capacity, dtype=bool)
+        elif n > len(self.vectors):
+            capacity = max(n, len(self.vectors) * 2)
+            vectors = np.zeros((capacity, dim), dtype=np.float32)
+            vectors[:self.n] = self.vectors[:self.n]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self.n] = self.alive[:self.n]
+            self.vectors, self.alive = vectors, alive
+
+    def add_batch(self, vectors):
+        """Appends normalised vectors; returns their row numbers."""
+        vectors = normalize(np.atleast_2d(vectors))
+        start, end = self.n, self.n + len(vectors)
+        self._reserve(end, vectors.shape[1])
+        self.vectors[start:end] = vectors
+        self.alive[start:end] = True
+        self.n = end
+        self.n_alive += len(vectors)
+        return np.arange(start, end)
+
+    def add(self, vector):
+        return int(self.add_batch(vector)[0])
+
+    def remove(self, row):
+        if self.alive[row]:
+            self.alive[row] = False
+            self.vectors[row] = 0.0
+            self.n_alive -= 1
+
+    def get(self, rows):
+        return self.vectors[rows]
+
+    def query_radius(self, vector, eps):
+        """Live rows within cosine distance `eps` of `vector` (already normalised)."""
+        if self.n == 0:
+            return []
+        sims = self.vectors[:self.n] @ vector
+        return np.nonzero((1.0 - sims <= eps) & self.alive[:self.n])[0].tolist()
+
+    def query_radius_batch(self, vectors, eps, block=1024):
+        """query_radius for many vectors, blocked into matrix-matrix products."""
+        results = []
+        for start in range(0, len(vectors), block):
+            sims = vectors[start:start + block] @ self.vectors[:self.n].T
+            mask = (1.0 - sims <= eps) & self.alive[:self.n]
+            results.extend(np.nonzero(row)[0].tolist() for row in mask)
+        return results
+
+
+class IVFIndex(BruteForceIndex):
+    """
+    Approximate cosine radius search (inverted file).
+
+    Rows are bucketed by their nearest centroid from a spherical k-means
+    coarse quantizer; a query only scans the `nprobe` closest buckets.
+    Until `min_train` rows exist it behaves exactly like brute force. The
+    quantizer is retrained whenever the live corpus grows 4x, so the
+    amortised cost per insert stays constant.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nprobe=8, min_train=2048, seed=0):
+        super().__init__()
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.rng = np.random.default_rng(seed)
+
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int64)   # Row -> bucket
+        self.lists = []                             # Bucket -> set of rows
+        self._list_arrays = {}                      # Bucket -> cached np.array of rows
+        self.trained_at = 0
+
+    def _train(self):
+        rows = np.nonzero(self.alive[:self.n])[0]
+        nlist = max(8, int(np.sqrt(self.nprobe * len(rows))))
+        sample_size = min(len(rows), max(nlist * 20, 4096), 65536)
+        sample = self.vectors[self.rng.choice(rows, sample_size, replace=False)]
+        self.centroids = _spherical_kmeans(sample, nlist, iters=8, rng=self.rng)
+
+        self.assign = np.full(len(self.vectors), -1, dtype=np.int64)
+        self.lists = [set() for _ in range(len(self.centroids))]
+        self._list_arrays = {}
+        self._assign_rows(rows)
+        self.trained_at = len(rows)
+
+    def _assign_rows(self, rows, block=4096):
+        if len(self.assign) < len(self.vectors):
+            assign = np.full(len(self.vectors), -1, dtype=np.int64)
+            assign[:len(self.assign)] = self.assign
+            self.assign = assign
+
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            buckets = np.argmax(self.vectors[chunk] @ self.centroids.T, axis=1)
+            self.assign[chunk] = buckets
+            for row, bucket in zip(chunk.tolist(), buckets.tolist()):
+                self.lists[bucket].add(row)
+                self._list_arrays.pop(bucket, None)
+
+    def _bucket_rows(self, bucket):
+        rows = self._list_arrays.get(bucket)
+        if rows is None:
+            rows = np.fromiter(self.lists[bucket], dtype=np.int64, count=len(self.lists[bucket]))
+            self._list_arrays[bucket] = rows
+        return rows
+
+    def add_batch(self, vectors):
+        rows = super().add_batch(vectors)
+        if self.centroids is None:
+            if self.n_alive >= self.min_train:
+                self._train()
+        elif self.n_alive > 4 * self.trained_at:
+            self._train()
+        else:
+            self._assign_rows(rows)
+        return rows
+
+    def remove(self, row):
+        if self.alive[row] and self.centroids is not None:
+            bucket = self.assign[row]
+            self.lists[bucket].discard(row)
+            self._list_arrays.pop(bucket, None)
+        super().remove(row)
+
+    def _probe(self, vector, probes, eps):
+        rows = np.concatenate([self._bucket_rows(b) for b in probes])
+        if len(rows) == 0:
+            return []
+        sims = self.vectors[rows] @ vector
+        return np.sort(rows[1.0 - sims <= eps]).tolist()
+
+    def query_radius(self, vector, eps):
+        if self.centroids is None:
+            return super().query_radius(vector, eps)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+        return self._probe(vector, probes, eps)
+
+    def query_radius_batch(self, vectors, eps, block=1024):
+        if self.centroids is None:
+            return super().query_radius_batch(vectors, eps, block)
+        nprobe = min(self.nprobe, len(self.centroids))
+        results = []
+        for start in range(0, len(vectors), block):
+            chunk = vectors[start:start + block]
+            probes = np.argpartition(-(chunk @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            results.extend(self._probe(v, p, eps) for v, p in zip(chunk, probes))
+        return results
+
+
+def _spherical_kmeans(x, k, iters, rng):
+    """Lloyd iterations on the unit sphere (centroids re-normalised each step)."""
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = sums / norms[:, None]
+    return centroids
+
+
+BACKENDS = {
+    BruteForceIndex.name: BruteForceIndex,
+    IVFIndex.name: IVFIndex,
+}
+
+
+def build_index(backend="brute", **kwargs):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown neighbour backend '{backend}'. Choose from {sorted(BACKENDS)}.")
+    return BACKENDS[backend](**kwargs)
@@ -1,19 +1,245 @@
+import datetime
 import json
 import os
 
+from agent.ticket_table import TABLE_PATH, TicketTable
+
+try:
+    import fcntl  # POSIX advisory locks for concurrent appenders
+except ImportError:
+    fcntl = None
+
+TICKET_LOG = "tickets.ndjson"
+CHECKPOINT_FILE = ".ticket_checkpoint.json"
+
 def load_tickets(filepath="tickets.json"):
     """
     OBSERVE: Reads the raw support tickets from the file system.
+    Accepts either the legacy JSON array or the NDJSON ticket log.
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Could not find {filepath}")
-    
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    
+
+    if filepath.endswith(".ndjson"):
+        data = []
+        for batch, _ in iter_ticket_batches(filepath):
+            data.extend(batch)
+    else:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+
     print(f"--> [OBSERVE] Loaded {len(data)} tickets.")
     return data
 
+def load_ticket_table(filepath="tickets.json", table_path=TABLE_PATH, batch_size=1000):
+    """
+    OBSERVE (Columnar): Loads tickets into a TicketTable persisted at
+    `table_path`. For the NDJSON log only the bytes appended since the
+    table was saved are parsed; the legacy JSON array is re-read only when
+    its size/mtime changes. A replaced or truncated log starts over.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Could not find {filepath}")
+
+    table, meta = TicketTable.load(table_path)
+    st = os.stat(filepath)
+    if filepath.endswith(".ndjson"):
+        source = {"path": filepath, "inode": st.st_ino}
+        offset = meta["offset"] if meta and meta.get("source") == source and st.st_size >= meta["offset"] else 0
+        if offset == 0:
+            table = TicketTable()
+        start_rows = len(table)
+        for batch, end_offset in iter_ticket_batches(filepath, offset, batch_size):
+            table.extend(batch)
+            offset = end_offset
+        changed = meta is None or meta.get("source") != source or meta["offset"] != offset
+        new_meta = {"source": source, "offset": offset}
+        new_rows = len(table) - start_rows
+    else:
+        source = {"path": filepath, "stamp": [st.st_size, st.st_mtime_ns]}
+        changed = not meta or meta.get("source") != source
+        if changed:
+            with open(filepath, 'r') as f:
+                table = TicketTable.from_tickets(json.load(f))
+        new_meta = {"source": source}
+        new_rows = len(table) if changed else 0
+
+    if changed:
+        table.save(table_path, new_meta)
+    print(f"--> [OBSERVE] Loaded {len(table)} tickets ({new_rows} parsed, {len(table.pool)} distinct messages).")
+    return table
+
+# --- APPEND-ONLY TICKET LOG ---
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _ticket_id(line):
+    """The ticket id of one log line, or None if it is not a complete record."""
+    try:
+        return json.loads(line)["ticket_id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def _last_ticket_id(f, chunk_size=4096):
+    """
+    Reads backwards from EOF to the last (= highest) ticket id; 0 for an
+    empty log. Must hold the lock: a trailing line without its newline is
+    then a crashed writer's partial write. It is truncated away (or just
+    terminated, if the record itself is whole), and unparseable lines are
+    skipped, so one torn write cannot wedge every later append.
+    """
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    tail = b""
+    pos = end
+    repaired = False
+    while pos > 0:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        tail = f.read(step) + tail
+        if not repaired:
+            cut = tail.rfind(b"\n")
+            if cut == -1 and pos > 0:
+                continue
+            fragment = tail[cut + 1:]
+            if fragment.strip():
+                ticket_id = _ticket_id(fragment)
+                if ticket_id is not None:
+                    f.write(b"\n")
+                    return ticket_id
+                f.truncate(pos + cut + 1)
+                print(f"--> [OBSERVE] Dropped a partial trailing line ({len(fragment)} bytes) from {f.name}.")
+            tail = tail[:cut + 1]
+            repaired = True
+        # tail ends at a line boundary; its first line is only whole at the start of the file
+        lines = tail.split(b"\n")[:-1]
+        for line in reversed(lines if pos == 0 else lines[1:]):
+            if line.strip():
+                ticket_id = _ticket_id(line)
+                if ticket_id is not None:
+                    return ticket_id
+        tail = lines[0] + b"\n" if pos > 0 and lines else b""
+    return 0
+
+def append_ticket(merchant_id, message, log_path=TICKET_LOG):
+    """
+    OBSERVE (Ingest): Appends one ticket to the log as a single JSON line,
+    stamped with its creation time (ISO, local). The id is assigned under an
+    exclusive lock, so concurrent writers never collide or interleave
+    partial lines. Cost is O(1) in log size.
+    """
+    with open(log_path, "a+b") as f:
+        _lock(f)
+        try:
+            ticket = {
+                "ticket_id": _last_ticket_id(f) + 1,
+                "merchant_id": int(merchant_id),
+                "message": message,
+                "created_at": datetime.datetime.now().isoformat(),
+            }
+            f.seek(0, os.SEEK_END)
+            f.write((json.dumps(ticket) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            _unlock(f)
+    return ticket
+
+def iter_ticket_batches(log_path=TICKET_LOG, start_offset=0, batch_size=1000):
+    """
+    OBSERVE (Streaming): Lazily yields (tickets, end_offset) batches from the
+    log, starting at a byte offset. A trailing partial line (writer still
+    appending) is left for the next read.
+    """
+    if not os.path.exists(log_path):
+        return
+
+    batch = []
+    offset = start_offset
+    with open(log_path, "rb") as f:
+        f.seek(start_offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch, offset
+                batch = []
+
+    if batch:
+        yield batch, offset
+
+def load_checkpoint(checkpoint_path=CHECKPOINT_FILE, log_path=TICKET_LOG):
+    """Returns the byte offset the agent has processed up to (0 if unknown or stale)."""
+    if not os.path.exists(checkpoint_path):
+        return 0
+
+    with open(checkpoint_path, 'r') as f:
+        offset = json.load(f).get("offset", 0)
+
+    # Log was replaced or truncated behind our back: start over
+    if not os.path.exists(log_path) or os.path.getsize(log_path) < offset:
+        print("--> [OBSERVE] Warning: checkpoint is past end of ticket log. Resetting.")
+        return 0
+    return offset
+
+def save_checkpoint(offset, checkpoint_path=CHECKPOINT_FILE):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"offset": offset}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def migrate_json_to_log(json_path="tickets.json", log_path=TICKET_LOG):
+    """
+    One-shot migration of the legacy JSON array into the NDJSON log.
+    Refuses to overwrite an existing log.
+    """
+    if os.path.exists(log_path):
+        print(f"--> [OBSERVE] {log_path} already exists. Skipping migration.")
+        return 0
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"Could not find {json_path}")
+
+    with open(json_path, 'r') as f:
+        tickets = json.load(f)
+
+    # The log is kept in ticket_id order so the last record always holds the
+    # highest id (append_ticket derives the next id from it).
+    tickets.sort(key=lambda t: t['ticket_id'])
+
+    tmp_path = log_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        for ticket in tickets:
+            f.write(json.dumps(ticket) + "\n")
+    os.replace(tmp_path, log_path)
+
+    print(f"--> [OBSERVE] Migrated {len(tickets)} tickets from {json_path} to {log_path}.")
+    return len(tickets)
+
+def ensure_ticket_log(json_path="tickets.json", log_path=TICKET_LOG):
+    """Migrates the legacy JSON array the first time anything writes to the log."""
+    if not os.path.exists(log_path) and os.path.exists(json_path):
+        migrate_json_to_log(json_path, log_path)
+
+def file_stamps(paths):
+    """Cheap change detection: {path: [size, mtime_ns]} (None if missing). No file reads."""
+    stamps = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps[path] = [st.st_size, st.st_mtime_ns]
+        except FileNotFoundError:
+            stamps[path] = None
+    return stamps
+
 def load_system_signals(filepath="system_signals.json"):
     """
     OBSERVE (Phase 2): Reads simulated infrastructure signals.
@@ -21,12 +247,12 @@ def load_system_signals(filepath="system_signals.json"):
     if not os.path.exists(filepath):
         print(f"--> [OBSERVE] Warning: {filepath} not found. Skipping signals.")
         return {} # Return empty dict safely
-    
+
     with open(filepath, 'r') as f:
         data = json.load(f)
-    
+
     # FIX: Use 'current_value' if 'value' doesn't exist (handles new schema)
     val = data.get('current_value', data.get('value', 'N/A'))
-    
+
     print(f"--> [OBSERVE] Loaded system signal: {data.get('signal')} ({val}%)")
-    return data
\ No newline at end of file
+    return data
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# --- DECISION POLICY (data, not code) ---
+# Stage / root-cause inference, action + risk mapping, restraint and the
+# repro-pack gate live in policy.json. It is loaded and compiled once, at
+# import: every distinct stage / root-cause string is reduced to a small
+# integer class (which table rows and substring conditions it matches), and
+# every (stage class, root-cause class) cell of the decision table is
+# resolved ahead of time. Deciding is then an index lookup, per cluster
+# (decide / restrain / needs_repro) or for a whole batch (evaluate).
+POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy.json")
+
+
+def _confidence(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _features(text, substrings):
+    """Bitmask of the `substrings` that occur in `text`."""
+    mask = 0
+    for bit, substring in enumerate(substrings):
+        if substring in text:
+            mask |= 1 << bit
+    return mask
+
+
+class Policy:
+    """A compiled policy table (see policy.json for the format)."""
+
+    def __init__(self, table):
+        self.table = table
+        self.version = hashlib.sha1(json.dumps(table, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+        inference = table["inference"]
+        self.inference = [(kind, spec["default"], [tuple(rule) for rule in spec["rules"]])
+                          for kind, spec in inference.items()]
+
+        decision = table["decision"]
+        overrides = decision.get("stage_overrides", [])
+        repro = table["repro"]
+        self.repro_min = repro["min_confidence"]
+
+        # Substring conditions, one bit each in a stage / root-cause class
+        self.stage_features = list(dict.fromkeys([o["stage_contains"] for o in overrides] + [repro["stage_contains"]]))
+        self.cause_features = [repro["root_cause_contains"]]
+        self.causes = list(decision["by_root_cause"])
+        self.cause_row = {cause: i for i, cause in enumerate(self.causes)}
+        n_stage = 1 << len(self.stage_features)
+        n_cause = (len(self.causes) + 1) << len(self.cause_features)
+        self._stage_classes = {}
+        self._cause_classes = {}
+
+        # Resolve every cell: the root-cause row's (action, risk), then the stage overrides in order
+        outcomes = {}
+        self._cells = [[0] * n_cause for _ in range(n_stage)]
+        for stage_class in range(n_stage):
+            for cause_class in range(n_cause):
+                row = cause_class >> len(self.cause_features)
+                entry = decision["by_root_cause"][self.causes[row]] if row < len(self.causes) else decision["default"]
+                action, risk = entry["action"], entry["risk"]
+                for override in overrides:
+                    bit = 1 << self.stage_features.index(override["stage_contains"])
+                    if stage_class & bit and risk not in override.get("unless_risk", []):
+                        risk = override["risk"]
+                        keep = override.get("keep_action_containing")
+                        if keep is None or keep not in action:
+                            action = override["action"]
+                self._cells[stage_class][cause_class] = outcomes.setdefault((action, risk), len(outcomes))
+        self.outcomes = list(outcomes)
+        self._cell_array = np.array(self._cells, dtype=np.int64)
+
+        repro_stage = 1 << self.stage_features.index(repro["stage_contains"])
+        stage_ok = (np.arange(n_stage) & repro_stage) != 0
+        cause_ok = (np.arange(n_cause) & 1) != 0
+        self._repro_array = stage_ok[:, None] & cause_ok[None, :]
+        self._repro_cells = self._repro_array.tolist()
+
+        # Restraint: first rule whose risk list and confidence bound both hold
+        restraint = table["restraint"]
+        self.default_confidence = restraint["default_confidence"]
+        self.restraint_rules = [
+            (frozenset(rule["risk"]) if "risk" in rule else None, rule.get("confidence_below"),
+             rule["action_not_taken"], rule["reason"], "{confidence}" in rule["reason"])
+            for rule in restraint["rules"]
+        ]
+        if self.restraint_rules[-1][:2] != (None, None):
+            raise ValueError("policy: the last restraint rule must be unconditional")
+        risks = list(dict.fromkeys(risk for _, risk in self.outcomes))
+        self._outcome_risk = np.array([risks.index(risk) for _, risk in self.outcomes], dtype=np.int64)
+        self._restraint_risk = np.array([[allowed is None or risk in allowed for risk in risks]
+                                         for allowed, *_ in self.restraint_rules], dtype=bool)
+        self._restraint_below = np.array([np.inf if below is None else below
+                                          for _, below, *_ in self.restraint_rules])
+        self._restraint_unbounded = np.array([below is None for _, below, *_ in self.restraint_rules])
+
+    # --- CLASSES (memoised per distinct string) ---
+    def _stage_class(self, stage):
+        cls = self._stage_classes.get(stage)
+        if cls is None:
+            cls = self._stage_classes.setdefault(stage, _features(stage, self.stage_features))
+        return cls
+
+    def _cause_class(self, root_cause):
+        cls = self._cause_classes.get(root_cause)
+        if cls is None:
+            row = self.cause_row.get(root_cause, len(self.causes))
+            cls = (row << len(self.cause_features)) | _features(root_cause, self.cause_features)
+            cls = self._cause_classes.setdefault(root_cause, cls)
+        return cls
+
+    # --- ONE CLUSTER ---
+    def infer(self, rules):
+        """{"stage": .., "root_cause": ..} from fired keyword rules (first matching table rule wins)."""
+        inferred = {}
+        for kind, default, kind_rules in self.inference:
+            inferred[kind] = next((value for rule, value in kind_rules if rule in rules), default)
+        return inferred
+
+    def decide(self, analysis):
+        action, risk = self.outcomes[self._cells[self._stage_class(analysis['stage'])]
+                                                [self._cause_class(analysis['root_cause'])]]
+        return {"recommended_action": action, "risk_level": risk}
+
+    def restrain(self, risk_level, confidence):
+        conf_val = _confidence(confidence, self.default_confidence)
+        for allowed, below, action, reason, templated in self.restraint_rules:
+            if (allowed is None or risk_level in allowed) and (below is None or conf_val < below):
+                return {"action_not_taken": action,
+                        "reason": reason.format(confidence=conf_val) if templated else reason}
+
+    def needs_repro(self, analysis):
+        cell = self._repro_cells[self._stage_class(analysis.get('stage', ''))][
+            self._cause_class(analysis.get('root_cause', ''))]
+        return cell and _confidence(analysis.get('confidence', 0), 0.0) >= self.repro_min
+
+    # --- A BATCH OF CLUSTERS ---
+    def _classes(self, values, lookup):
+        distinct = {value: lookup(value) for value in set(values)}
+        return np.fromiter(map(distinct.__getitem__, values), dtype=np.int64, count=len(values))
+
+    def evaluate(self, analyses):
+        """
+        Scores a list of cluster analyses in one pass: one class lookup per
+        distinct stage / root-cause string, then array indexing for the
+        decision cell, restraint rule and repro gate. Returns PolicyScores;
+        its rows match decide / restrain / needs_repro per analysis.
+        """
+        stage = self._classes([a.get('stage', '') for a in analyses], self._stage_class)
+        cause = self._classes([a.get('root_cause', '') for a in analyses], self._cause_class)
+        raw = [a.get('confidence') for a in analyses]
+        try:
+            # Fast path: every confidence numeric (None / missing would turn into NaN here)
+            conf = np.array(raw, dtype=np.float64)
+            parsed = not np.isnan(conf).any()
+        except (TypeError, ValueError):
+            parsed = False
+        if parsed:
+            repro_conf = conf
+        else:
+            # Same parsing as restrain (unparsable -> default) and needs_repro (missing -> 0)
+            conf = np.array([_confidence(value, self.default_confidence) for value in raw], dtype=np.float64)
+            repro_conf = np.array([_confidence(a.get('confidence', 0), 0.0) for a in analyses], dtype=np.float64)
+
+        outcome = self._cell_array[stage, cause]
+        # Rules without a confidence bound ignore it (a NaN confidence fails every bound)
+        in_bound = (conf[None, :] < self._restraint_below[:, None]) | self._restraint_unbounded[:, None]
+        holds = self._restraint_risk[:, self._outcome_risk[outcome]] & in_bound
+        holds[-1] = True  # Nothing else held: the last rule is the catch-all
+        repro = self._repro_array[stage, cause] & (repro_conf >= self.repro_min)
+        return PolicyScores(self, outcome, holds.argmax(axis=0), repro, conf)
+
+
+class PolicyScores:
+    """
+    Policy.evaluate output, one row per analysis:
+      * outcome     index into policy.outcomes ((action, risk) pairs)
+      * rule        index of the restraint rule that applies
+      * repro       whether a repro pack is warranted
+      * confidence  parsed confidence (as used by restraint)
+    decision(i) / restraint(i) build the same dicts as Policy.decide / restrain.
+    """
+
+    def __init__(self, policy, outcome, rule, repro, confidence):
+        self.policy = policy
+        self.outcome = outcome
+        self.rule = rule
+        self.repro = repro
+        self.confidence = confidence
+
+    def __len__(self):
+        return len(self.outcome)
+
+    def decision(self, i):
+        action, risk = self.policy.outcomes[self.outcome[i]]
+        return {"recommended_action": action, "risk_level": risk}
+
+    def restraint(self, i):
+        _, _, action, reason, templated = self.policy.restraint_rules[self.rule[i]]
+        return {"action_not_taken": action,
+                "reason": reason.format(confidence=float(self.confidence[i])) if templated else reason}
+
+    def decisions(self):
+        return [self.decision(i) for i in range(len(self))]
+
+    def restraints(self):
+        return [self.restraint(i) for i in range(len(self))]
+
+
+def load_policy(path=POLICY_PATH):
+    with open(path, "r") as f:
+        return Policy(json.load(f))
+
+
+POLICY = load_policy()
@@ -1,21 +1,16 @@
+from agent import keywords
+from agent.policy import POLICY
+
 def analyze_cluster(cluster_label, tickets):
     """
     REASON: Infers context/problem. Handles Noise (-1) explicitly.
     """
-    combined_text = " ".join([t['message'].lower() for t in tickets])
-    
-    # --- DEFAULT INFERENCE LOGIC (Preserved) ---
-    stage = "Stage 1: Setup & Auth"
-    if any(w in combined_text for w in ['traffic', 'timeout', 'peak', 'latency', 'production', 'outage', '500']):
-        stage = "Stage 3: Live / Scale"
-    elif any(w in combined_text for w in ['checkout', 'order', 'webhook', 'payment', 'cart']):
-        stage = "Stage 2: Integration"
-    
-    root_cause = "Merchant Configuration Error"
-    if any(w in combined_text for w in ['documentation', 'example', 'where can i find', 'docs', 'schema']):
-        root_cause = "Documentation Gap"
-    elif any(w in combined_text for w in ['timeout', 'internal error', '500', 'latency', 'failure']):
-        root_cause = "Platform Issue / Regression"
+    rules = keywords.fired_rules(tickets.keyword_hits())
+
+    # --- DEFAULT INFERENCE LOGIC (policy table) ---
+    inferred = POLICY.infer(rules)
+    stage = inferred["stage"]
+    root_cause = inferred["root_cause"]
 
     # Base confidence calculation
     confidence = min(0.6 + (len(tickets) * 0.1), 0.95)
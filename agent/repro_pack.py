@@ -1,14 +1,54 @@
-import json
-import os
-import time
 import datetime
+import threading
 import uuid  # FIX 1: Import UUID
 
-def generate_repro_pack(analysis, tickets, system_signals):
+from agent import keywords
+from agent.incident_store import IncidentStore
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The process-wide incident store, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IncidentStore()
+        return _store
+
+def flush_store():
+    """Waits for queued packs to reach disk (no-op if no pack was generated)."""
+    if _store is not None:
+        _store.flush()
+
+def close_store():
+    """
+    Closes the process-wide store (queued packs written, writer thread
+    stopped) and drops it; the next use reopens it (e.g. after a chdir).
+    """
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+def generate_repro_pack(analysis, summary, system_signals, store=None):
     """
     ACT (Engineering Handoff): Generates a JSON artifact for engineers.
     Now supports unique IDs and preliminary vs full repro contexts.
+    Built from the cluster's ClusterSummary (keyword histogram, merchant
+    set, error-sample sketch), so cost does not grow with cluster size.
+    Packs are queued on the incident store (written in the background).
+    A cluster whose exact membership already has a pack reuses it; one
+    that changed but already has an incident for this root cause updates
+    that incident (same id) instead of opening a new one.
     """
+    store = store or get_store()
+    fingerprint = summary.fingerprint
+    existing = store.find_by_fingerprint(fingerprint)
+    if existing is not None:
+        return store.log_path, existing['incident_id'], existing.get('repro_type'), existing.get('repro_trigger_reason')
+
     timestamp = datetime.datetime.now().isoformat()
     
     # FIX 1: UNIQUE INCIDENT ID
@@ -18,28 +58,24 @@ def generate_repro_pack(analysis, tickets, system_signals):
     
     # FIX 2: CLUSTER-SIZE AWARENESS
     # Determine if this is a "Preliminary" signal or a "Full" repro
-    cluster_size = len(tickets)
+    cluster_size = summary.size
     is_preliminary = cluster_size < 5
     
     repro_type = "preliminary" if is_preliminary else "full"
     
     # 1. Extract Merchant Context
-    merchant_ids = list(set([t.get('merchant_id') for t in tickets]))
+    merchant_ids = list(summary.merchants)
     
-    # 2. Infer Endpoints
-    combined_text = " ".join([t['message'].lower() for t in tickets])
+    # 2. Infer Endpoints (from the cluster's keyword histogram)
+    rules = keywords.fired_rules(summary.keyword_hits())
     endpoints = []
-    if "checkout" in combined_text: endpoints.append("POST /api/v1/checkout")
-    elif "payment" in combined_text: endpoints.append("POST /api/v1/payments")
-    elif "cart" in combined_text: endpoints.append("POST /api/v1/carts")
+    if "checkout" in rules: endpoints.append("POST /api/v1/checkout")
+    elif "payment" in rules: endpoints.append("POST /api/v1/payments")
+    elif "cart" in rules: endpoints.append("POST /api/v1/carts")
     else: endpoints.append("GET /api/status (Fallback)")
 
-    # 3. Extract Errors
-    error_samples = set()
-    for t in tickets:
-        msg = t['message']
-        if "500" in msg or "error" in msg.lower() or "timeout" in msg.lower():
-            error_samples.add(msg[:120])
+    # 3. Extract Errors (bounded sketch kept by the summary)
+    error_samples = summary.error_samples
             
     # 4. Generate Repro Steps (Adaptive)
     target_endpoint = endpoints[0] if endpoints else "affected endpoint"
@@ -72,6 +108,8 @@ def generate_repro_pack(analysis, tickets, system_signals):
     # 5. Assemble the Pack Dictionary
     repro_data = {
         "incident_id": incident_id,
+        "cluster_id": f"CL-{summary.cluster_id}",
+        "cluster_fingerprint": fingerprint,
         "repro_type": repro_type,          # NEW FIELD
         "repro_trigger_reason": trigger_reasons, # NEW FIELD
         "suspected_stage": analysis.get('stage'),
@@ -94,13 +132,7 @@ def generate_repro_pack(analysis, tickets, system_signals):
         "generated_at": timestamp
     }
 
-    # 6. Save to Disk
-    output_dir = "repro_packs"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    filepath = os.path.join(output_dir, f"{incident_id}.json")
-    with open(filepath, 'w') as f:
-        json.dump(repro_data, f, indent=2)
+    # 6. Queue for the incident store (batched, off the hot path)
+    incident_id = store.add(repro_data)
 
-    return filepath, incident_id, repro_type, trigger_reasons
\ No newline at end of file
+    return store.log_path, incident_id, repro_type, trigger_reasons
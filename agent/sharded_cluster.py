@@ -0,0 +1,243 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agent.neighbors import _spherical_kmeans, normalize
+
+# Upper bound on one rows x columns similarity block inside a worker (floats)
+BLOCK_ELEMENTS = 1 << 23
+
+# --- SHARED MEMORY ---
+# Workers attach to the parent's buffers by name, so the embedding matrix is
+# never pickled or copied per task. Attachments are cached per process.
+_SHARED = {}
+_blas_limit = None
+
+
+def _share(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    if name not in _SHARED:
+        shm = shared_memory.SharedMemory(name=name)
+        _SHARED[name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    return _SHARED[name][1]
+
+
+def _init_worker():
+    global _blas_limit
+    # One BLAS thread per process: the pool supplies the parallelism, and
+    # every worker's BLAS claiming all cores would oversubscribe them.
+    # threadpoolctl ships with scikit-learn; without it BLAS is left as is.
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    _blas_limit = threadpool_limits(limits=1)
+
+
+def _release(shm):
+    entry = _SHARED.pop(shm.name, None)
+    del entry  # Drop the cached view before closing the buffer
+    shm.close()
+    shm.unlink()
+
+
+# --- UNION-FIND (vectorised) ---
+def _find(parent, nodes):
+    roots = parent[nodes]
+    while True:
+        up = parent[roots]
+        if np.array_equal(up, roots):
+            return roots
+        roots = up
+
+
+def _union(parent, a, b):
+    """Links every edge (a[i], b[i]). Roots always point to smaller ids, so no cycles form."""
+    while len(a):
+        ra, rb = _find(parent, a), _find(parent, b)
+        differ = ra != rb
+        if not differ.any():
+            return
+        a, b, ra, rb = a[differ], b[differ], ra[differ], rb[differ]
+        # Competing writes to one root keep a single winner; the loop retries the rest
+        parent[np.maximum(ra, rb)] = np.minimum(ra, rb)
+
+
+# --- WORKER PASSES ---
+# Rows are in shard order, so a shard is a contiguous slice of the shared
+# matrix. One task = one shard's rows against each candidate shard in turn.
+def _blocks(rows, width):
+    step = max(1, BLOCK_ELEMENTS // max(width, 1))
+    for start in range(0, len(rows), step):
+        yield start, rows[start:start + step]
+
+
+def _degrees(x_spec, w_spec, shard, candidates, threshold):
+    """Neighbourhood sizes of a shard's rows; summed sample weights when `w_spec` is given."""
+    x = _attach(x_spec)
+    w = _attach(w_spec) if w_spec is not None else None
+    rows = np.arange(*shard)
+    counts = np.zeros(len(rows), dtype=np.int64)
+    for lo, hi in candidates:
+        cols = x[lo:hi]
+        for start, block in _blocks(rows, hi - lo):
+            within = x[block] @ cols.T >= threshold
+            if w is None:
+                counts[start:start + len(block)] += np.count_nonzero(within, axis=1)
+            else:
+                counts[start:start + len(block)] += within.astype(np.int64) @ w[lo:hi]
+    return shard, counts
+
+
+def _links(x_spec, core_spec, shard, candidates, threshold):
+    """
+    This shard's share of the cluster structure:
+      * union-find over its core-core edges -> (node, root) for every linked node;
+      * (border row, core neighbour) pairs for its non-core rows. A non-core
+        row has fewer than min_samples neighbours, so these lists stay tiny.
+    """
+    x = _attach(x_spec)
+    core = _attach(core_spec)
+    rows = np.arange(*shard)
+    core_rows, border_rows = rows[core[rows]], rows[~core[rows]]
+    parent = np.arange(len(x), dtype=np.int64)
+    border_pairs = []
+    for lo, hi in candidates:
+        cols = np.arange(lo, hi)[core[lo:hi]]
+        if not len(cols):
+            continue
+        xc = x[cols]
+        for _, block in _blocks(core_rows, len(cols)):
+            r, c = np.nonzero(x[block] @ xc.T >= threshold)
+            _union(parent, block[r], cols[c])
+        for _, block in _blocks(border_rows, len(cols)):
+            r, c = np.nonzero(x[block] @ xc.T >= threshold)
+            border_pairs.append((block[r], cols[c]))
+    touched = np.nonzero(parent != np.arange(len(x)))[0]
+    if border_pairs:
+        border = tuple(np.concatenate(part) for part in zip(*border_pairs))
+    else:
+        border = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    return touched, _find(parent, touched), border
+
+
+# --- DRIVER ---
+def _partition(x, n_shards, eps, seed, sample=20000):
+    """
+    Coarse spherical k-means buckets. Returns the permutation that makes
+    each bucket contiguous, the bucket ranges, and per bucket the ranges
+    of buckets that may hold a point within eps (angular bound: centroid
+    gap minus both radii must not exceed the eps angle).
+    """
+    rng = np.random.default_rng(seed)
+    train = x if len(x) <= sample else x[rng.choice(len(x), sample, replace=False)]
+    centroids = _spherical_kmeans(train, n_shards, iters=10, rng=rng)
+    assign = np.argmax(x @ centroids.T, axis=1)
+
+    order = np.argsort(assign, kind="stable")
+    sizes = np.bincount(assign, minlength=len(centroids))
+    ends = np.cumsum(sizes)
+    ranges = [(int(e - s), int(e)) for s, e in zip(sizes, ends)]
+
+    sims = np.einsum("ij,ij->i", x, centroids[assign])
+    radius = np.zeros(len(centroids))
+    np.maximum.at(radius, assign, np.arccos(np.clip(sims, -1.0, 1.0)))
+    gap = np.arccos(np.clip(centroids @ centroids.T, -1.0, 1.0))
+    eps_angle = np.arccos(np.clip(1.0 - eps, -1.0, 1.0))
+    reachable = gap - radius[:, None] - radius[None, :] <= eps_angle + 1e-3  # Slack for float32 rounding
+
+    shards = []
+    for s in np.nonzero(sizes)[0]:
+        candidates = [ranges[t] for t in np.nonzero(sizes)[0] if reachable[s, t]]
+        shards.append((ranges[s], candidates))
+    return order, shards
+
+
+def sharded_dbscan(embeddings, eps, min_samples, workers=None, n_shards=None, seed=0, sample_weight=None):
+    """
+    Exact cosine DBSCAN over coarse shards, computed in a process pool.
+
+    Embeddings are normalised and reordered by spherical k-means bucket
+    into shared memory; each bucket is only compared with buckets that can
+    hold a point within eps of it. Two parallel passes follow: neighbour
+    counts (core points), then a union-find forest over each shard's
+    core-core edges plus the few core neighbours of its non-core rows.
+    The forests are stitched across shard boundaries here and border
+    points join their smallest adjacent cluster, so labels match sklearn's
+    DBSCAN, including its numbering by first core point.
+
+    Unlike sklearn, neighbourhoods are never stored: memory stays O(n)
+    at the price of computing similarities twice, so one worker is about
+    2x slower than sklearn. Any speedup comes from extra cores, and
+    depends on the machine; benchmarks/bench_sharded_cluster.py measures
+    it per worker count. `sample_weight` (integer multiplicities) counts
+    towards min_samples as in sklearn.
+    """
+    x = normalize(embeddings)
+    n = len(x)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    n_shards = n_shards or max(1, min(workers * 4, n // 256))
+    threshold = np.float32(1.0 - eps)
+
+    order, shards = _partition(x, n_shards, eps, seed)
+    x_shm, x_spec = _share(x[order])
+    core_shm, core_spec = _share(np.zeros(n, dtype=bool))
+    shared = [x_shm, core_shm]
+    w_spec = None
+    if sample_weight is not None:
+        w_shm, w_spec = _share(np.asarray(sample_weight, dtype=np.int64)[order])
+        shared.append(w_shm)
+    del x
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    run = pool.map if pool is not None else map
+    try:
+        # Pass 1: neighbourhood sizes -> core points
+        core = _attach(core_spec)
+        for (lo, hi), counts in run(_degrees, *zip(*[(x_spec, w_spec, s, c, threshold) for s, c in shards])):
+            core[lo:hi] = counts >= min_samples
+
+        # Pass 2: per-shard core forests (stitched across shards here) + border candidates
+        parent = np.arange(n, dtype=np.int64)
+        border_rows, border_cols = [], []
+        for nodes, roots, (rows, cols) in run(_links, *zip(*[(x_spec, core_spec, s, c, threshold)
+                                                              for s, c in shards])):
+            _union(parent, nodes, roots)
+            border_rows.append(rows)
+            border_cols.append(cols)
+
+        # Number clusters by their first core point in the caller's order, as sklearn does
+        labels = np.full(n, -1, dtype=np.int64)
+        core_rows = np.nonzero(core)[0]
+        unique_roots, inverse = np.unique(_find(parent, core_rows), return_inverse=True)
+        first = np.full(len(unique_roots), n, dtype=np.int64)
+        np.minimum.at(first, inverse, order[core_rows])
+        number = np.empty(len(unique_roots), dtype=np.int64)
+        number[np.argsort(first)] = np.arange(len(unique_roots))
+        labels[core_rows] = number[inverse]
+
+        # Border points join the smallest-numbered adjacent cluster (sklearn expands in label order)
+        rows, cols = np.concatenate(border_rows), np.concatenate(border_cols)
+        border = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(border, rows, labels[cols])
+        labels[rows] = border[rows]
+
+        result = np.empty(n, dtype=np.int64)
+        result[order] = labels
+        return result
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        core = None
+        for shm in shared:
+            _release(shm)
@@ -0,0 +1,290 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+from agent import keywords
+
+TABLE_PATH = ".ticket_table.npz"
+
+
+def _epoch(created_at):
+    """ISO timestamp (as written by observe.append_ticket) -> epoch seconds; NaN if missing."""
+    if not created_at:
+        return np.nan
+    return datetime.datetime.fromisoformat(created_at).timestamp()
+
+
+class TicketTable:
+    """
+    Columnar, append-only store for tickets.
+
+    One numpy column per field instead of one dict per ticket:
+      * ticket_ids, merchant_ids   int64
+      * created_at                 float64 epoch seconds (NaN: undated legacy ticket)
+      * message_codes              int32 index into `pool`, the interned
+                                   message texts (each distinct text kept once)
+      * embedding_rows             int64 row of the ticket's vector in the
+                                   embedding matrix of the current run (-1: none;
+                                   not persisted)
+    Keyword hits are scanned once per distinct text. Clusters are
+    TicketViews, i.e. row-index arrays into one table, so grouping never
+    copies ticket data.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._ticket_ids = np.zeros(0, dtype=np.int64)
+        self._merchant_ids = np.zeros(0, dtype=np.int64)
+        self._created_at = np.zeros(0, dtype=np.float64)
+        self._message_codes = np.zeros(0, dtype=np.int32)
+        self._embedding_rows = np.zeros(0, dtype=np.int64)
+        self.pool = []           # Code -> message text
+        self._code_of = {}       # Message text -> code
+        self._pool_keywords = []  # Code -> frozenset of keyword hits (None until scanned)
+        self._sorted = None      # Row order by ticket_id, built on first lookup
+
+    # --- COLUMNS ---
+    @property
+    def ticket_ids(self):
+        return self._ticket_ids[:self.n]
+
+    @property
+    def merchant_ids(self):
+        return self._merchant_ids[:self.n]
+
+    @property
+    def created_at(self):
+        return self._created_at[:self.n]
+
+    @property
+    def message_codes(self):
+        return self._message_codes[:self.n]
+
+    @property
+    def embedding_rows(self):
+        return self._embedding_rows[:self.n]
+
+    @property
+    def messages(self):
+        pool = self.pool
+        return [pool[c] for c in self.message_codes.tolist()]
+
+    def __len__(self):
+        return self.n
+
+    # --- APPEND ---
+    def _reserve(self, n):
+        if n <= len(self._ticket_ids):
+            return
+        capacity = max(n, 1024, len(self._ticket_ids) * 2)
+        for name in ("_ticket_ids", "_merchant_ids", "_created_at", "_message_codes", "_embedding_rows"):
+            old = getattr(self, name)
+            new = np.full(capacity, -1, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _intern(self, message):
+        code = self._code_of.get(message)
+        if code is None:
+            code = len(self.pool)
+            self._code_of[message] = code
+            self.pool.append(message)
+            self._pool_keywords.append(None)
+        return code
+
+    def extend(self, tickets):
+        """Appends ticket dicts (as read by observe); returns their row range."""
+        start = self.n
+        end = start + len(tickets)
+        self._reserve(end)
+        self._ticket_ids[start:end] = [t['ticket_id'] for t in tickets]
+        self._merchant_ids[start:end] = [int(t['merchant_id']) for t in tickets]
+        self._created_at[start:end] = [_epoch(t.get('created_at')) for t in tickets]
+        self._message_codes[start:end] = [self._intern(t['message']) for t in tickets]
+        self._embedding_rows[start:end] = -1
+        self.n = end
+        self._sorted = None
+        return range(start, end)
+
+    @classmethod
+    def from_tickets(cls, tickets):
+        table = cls()
+        table.extend(tickets)
+        return table
+
+    def take(self, rows):
+        """A new table holding only `rows` (in the given order). The message pool is shared."""
+        rows = np.asarray(rows, dtype=np.int64)
+        table = TicketTable()
+        table.n = len(rows)
+        for name in ("_ticket_ids", "_merchant_ids", "_created_at", "_message_codes", "_embedding_rows"):
+            setattr(table, name, getattr(self, name)[:self.n][rows])
+        table.pool, table._code_of, table._pool_keywords = self.pool, self._code_of, self._pool_keywords
+        return table
+
+    def live_rows(self, cutoff):
+        """Rows created at or after `cutoff` (epoch seconds). Undated tickets never count as live."""
+        return np.nonzero(self.created_at >= cutoff)[0]
+
+    # --- ROW ACCESS ---
+    def ticket(self, row):
+        """One row as the legacy ticket dict."""
+        ticket = {
+            "ticket_id": int(self._ticket_ids[row]),
+            "merchant_id": int(self._merchant_ids[row]),
+            "message": self.pool[self._message_codes[row]],
+        }
+        if not np.isnan(self._created_at[row]):
+            ticket["created_at"] = datetime.datetime.fromtimestamp(self._created_at[row]).isoformat()
+        return ticket
+
+    def rows_of(self, ticket_ids):
+        """Rows for the given ticket ids (vectorised binary search); -1 where absent."""
+        ticket_ids = np.asarray(ticket_ids, dtype=np.int64)
+        if not self.n:
+            return np.full(len(ticket_ids), -1, dtype=np.int64)
+        if self._sorted is None:
+            self._sorted = np.argsort(self.ticket_ids, kind="stable")
+        ordered = self.ticket_ids[self._sorted]
+        pos = np.minimum(np.searchsorted(ordered, ticket_ids), self.n - 1)
+        return np.where(ordered[pos] == ticket_ids, self._sorted[pos], -1)
+
+    def keywords_of_code(self, code):
+        hits = self._pool_keywords[code]
+        if hits is None:
+            hits = keywords.scan(self.pool[code])
+            self._pool_keywords[code] = hits
+        return hits
+
+    def annotate(self):
+        """INGEST: precomputes keyword hits for every distinct message in the table."""
+        for code in np.unique(self.message_codes).tolist():
+            self.keywords_of_code(code)
+        return self
+
+    # --- VIEWS ---
+    def view(self, rows=None):
+        if rows is None:
+            rows = np.arange(self.n)
+        return TicketView(self, rows)
+
+    def group(self, labels):
+        """
+        {label: TicketView} for per-row labels. Labels are keyed in order of
+        first appearance and rows keep table order, like the dict-of-lists
+        grouping they replace.
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        if not len(labels):
+            return {}
+        order = np.argsort(labels, kind="stable")
+        unique, starts = np.unique(labels[order], return_index=True)
+        parts = np.split(order, starts[1:])
+        first = [part[0] for part in parts]
+        return {int(unique[i]): TicketView(self, parts[i]) for i in np.argsort(first)}
+
+    # --- PERSISTENCE ---
+    def save(self, path=TABLE_PATH, meta=None):
+        """Writes the columns and message pool to one .npz (atomically). `meta` is stored alongside."""
+        blob = "".join(self.pool)
+        offsets = np.zeros(len(self.pool) + 1, dtype=np.int64)
+        np.cumsum([len(m) for m in self.pool], out=offsets[1:])
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.array(json.dumps(meta or {})),
+            ticket_ids=self.ticket_ids,
+            merchant_ids=self.merchant_ids,
+            created_at=self.created_at,
+            message_codes=self.message_codes,
+            pool=np.frombuffer(blob.encode("utf-8"), dtype=np.uint8),
+            pool_offsets=offsets,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=TABLE_PATH):
+        """Returns (table, meta); an empty table and None if the file is missing or unreadable."""
+        table = cls()
+        if not os.path.exists(path):
+            return table, None
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                columns = {name: data[name] for name in ("ticket_ids", "merchant_ids", "created_at", "message_codes")}
+                blob = data["pool"].tobytes().decode("utf-8")
+                offsets = data["pool_offsets"].tolist()
+        except (OSError, ValueError, KeyError):
+            print(f"--> [OBSERVE] Warning: unreadable ticket table {path}. Rebuilding.")
+            return table, None
+
+        table.n = len(columns["ticket_ids"])
+        for name, column in columns.items():
+            setattr(table, "_" + name, column)
+        table._embedding_rows = np.full(table.n, -1, dtype=np.int64)
+        table.pool = [blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        table._code_of = {m: i for i, m in enumerate(table.pool)}
+        table._pool_keywords = [None] * len(table.pool)
+        return table, meta
+
+
+class TicketView:
+    """A cluster (or any subset) of tickets: row indices into a TicketTable."""
+
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        # Legacy dict rows, materialised on demand
+        return (self.table.ticket(r) for r in self.rows.tolist())
+
+    def view(self, positions):
+        """A sub-view: the given positions within this view."""
+        return TicketView(self.table, self.rows[positions])
+
+    @property
+    def ticket_ids(self):
+        return self.table.ticket_ids[self.rows]
+
+    @property
+    def merchant_ids(self):
+        return self.table.merchant_ids[self.rows]
+
+    @property
+    def created_at(self):
+        return self.table.created_at[self.rows]
+
+    @property
+    def embedding_rows(self):
+        return self.table.embedding_rows[self.rows]
+
+    @property
+    def message_codes(self):
+        return self.table.message_codes[self.rows]
+
+    @property
+    def messages(self):
+        pool = self.table.pool
+        return [pool[c] for c in self.message_codes.tolist()]
+
+    def text(self, sep=" "):
+        """The cluster's messages joined once (the LLM prompt body)."""
+        return sep.join(self.messages)
+
+    def distinct_messages(self):
+        """(text, keyword hits) once per distinct message in the view."""
+        table = self.table
+        return [(table.pool[c], table.keywords_of_code(c)) for c in np.unique(self.message_codes).tolist()]
+
+    def keyword_hits(self):
+        """Cluster-level hits: union over the distinct texts in the view (no re-scan)."""
+        hits = set()
+        for _, message_hits in self.distinct_messages():
+            hits |= message_hits
+        return frozenset(hits)
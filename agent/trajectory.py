@@ -1,3 +1,5 @@
+import numpy as np
+
 def analyze_signal_trend(signal_data):
     """
     REASON (Predictive): Analyzes time-series data to predict near-term outcomes.
@@ -24,4 +26,220 @@ def analyze_signal_trend(signal_data):
         trajectory = "Recovering"
         prediction = "Incident potentially resolving; ticket volume should taper."
 
-    return trajectory, prediction
\ No newline at end of file
+    return trajectory, prediction
+
+# ==========================================
+# MULTI-SIGNAL TRAJECTORY ANALYSIS (vectorised)
+# ==========================================
+FORECAST_HORIZON = 3    # Samples ahead (one sample ~ one time_window step)
+EWMA_ALPHA = 0.3
+
+# Signals where a falling value is the bad direction
+HIGHER_IS_BETTER = {"order_success_rate"}
+
+# Fitted change over the window (in the bad direction) above which a signal
+# is "Rapid Escalation (Critical)". The default is in percentage points;
+# signals on another scale get their own.
+CRITICAL_CHANGE = 10
+CRITICAL_CHANGE_BY_SIGNAL = {"latency_ms": 250}
+
+def _x_moments(m):
+    """Moments of centred sample positions x = i - (m-1)/2, i = 0..m-1."""
+    m = m.astype(np.float64)
+    s2 = m * (m * m - 1) / 12.0
+    s4 = m * (m * m - 1) * (3 * m * m - 7) / 240.0
+    return s2, s4
+
+def _fit_from_moments(m, y0, y1c, y2c):
+    """
+    Least-squares slope (linear fit) and acceleration (2 * quadratic term)
+    for many signals at once, from per-signal sample count m and the
+    centred moments sum(y), sum(x*y), sum(x^2*y).
+    """
+    s2, s4 = _x_moments(m)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(m >= 2, y1c / s2, 0.0)
+        det = m * s4 - s2 * s2
+        accel = np.where(m >= 3, 2.0 * (m * y2c - s2 * y0) / det, 0.0)
+        mean = np.where(m >= 1, y0 / m, np.nan)
+    return slope, accel, mean
+
+def _classify(change, critical=CRITICAL_CHANGE):
+    """Vectorised version of the thresholds used by analyze_signal_trend (`critical` may be per row)."""
+    labels = np.full(change.shape, "Stable", dtype=object)
+    labels[change < 0] = "Recovering"
+    labels[change > 0] = "Rising Trend"
+    labels[change > critical] = "Rapid Escalation (Critical)"
+    return labels
+
+def _number(value, digits=None):
+    """JSON-safe float: None where the fit is undefined (NaN / inf)."""
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return round(value, digits) if digits is not None else value
+
+PREDICTIONS = {
+    "Stable": "No change expected in ticket volume.",
+    "Rising Trend": "Minor increase in support volume likely.",
+    "Rapid Escalation (Critical)": "Expect surge in high-priority tickets within 15-30 minutes.",
+    "Recovering": "Incident potentially resolving; ticket volume should taper.",
+    "Insufficient Data": "Monitor",
+}
+
+def _build_table(names, m, last, slope, accel, mean, ewma, horizon):
+    # Linear fit evaluated `horizon` samples past the newest one
+    forecast = mean + slope * ((m - 1) / 2.0 + horizon)
+    # Fitted change over the window, signed so that positive means "worse"
+    polarity = np.array([-1.0 if name in HIGHER_IS_BETTER else 1.0 for name in names])
+    critical = np.array([CRITICAL_CHANGE_BY_SIGNAL.get(name, CRITICAL_CHANGE) for name in names], dtype=np.float64)
+    labels = _classify(polarity * slope * np.maximum(m - 1, 0), critical)
+    labels[m < 2] = "Insufficient Data"
+
+    # An empty history has no value, average or forecast: emit null, never NaN
+    empty = m < 1
+    table = []
+    for i, name in enumerate(names):
+        table.append({
+            "signal": name,
+            "samples": int(m[i]),
+            "last": None if empty[i] else _number(last[i]),
+            "slope": _number(slope[i], 4),
+            "ewma": None if empty[i] else _number(ewma[i], 4),
+            "acceleration": _number(accel[i], 4),
+            "forecast": _number(forecast[i], 4),
+            "trajectory": labels[i],
+            "prediction": PREDICTIONS[labels[i]],
+        })
+    return table
+
+def analyze_trajectories(histories, horizon=FORECAST_HORIZON, alpha=EWMA_ALPHA):
+    """
+    REASON (Predictive, batched): Trajectory table for many signals in one
+    NumPy pass. `histories` maps signal name -> list of samples (lengths
+    may differ). Returns one row per signal with least-squares slope,
+    EWMA, acceleration and a short-horizon linear forecast.
+    """
+    names = list(histories)
+    if not names:
+        return []
+
+    lengths = np.array([len(histories[n]) for n in names], dtype=np.int64)
+    width = max(int(lengths.max()), 1)
+
+    # Left-aligned, zero-padded matrix + validity mask
+    values = np.zeros((len(names), width), dtype=np.float64)
+    mask = np.arange(width)[None, :] < lengths[:, None]
+    for i, name in enumerate(names):
+        values[i, :lengths[i]] = histories[name]
+
+    centre = (lengths - 1) / 2.0
+    x = np.where(mask, np.arange(width)[None, :] - centre[:, None], 0.0)
+    y0 = values.sum(axis=1)
+    y1c = (x * values).sum(axis=1)
+    y2c = (x * x * values).sum(axis=1)
+    slope, accel, mean = _fit_from_moments(lengths, y0, y1c, y2c)
+
+    # EWMA: one vector op per time step across all signals
+    ewma = values[:, 0].copy()
+    for t in range(1, width):
+        ewma = np.where(mask[:, t], alpha * values[:, t] + (1 - alpha) * ewma, ewma)
+
+    last = values[np.arange(len(names)), np.maximum(lengths - 1, 0)]
+    return _build_table(names, lengths, last, slope, accel, mean, ewma, horizon)
+
+def histories_from_signals(raw_signals):
+    """Extracts every `<name>_history` series from system_signals.json."""
+    return {
+        key[:-len("_history")]: values
+        for key, values in raw_signals.items()
+        if key.endswith("_history") and isinstance(values, list)
+    }
+
+
+class SignalRingBuffer:
+    """
+    Fixed-capacity sliding window per signal with O(1) appends.
+
+    Keeps running sums sum(y), sum(i*y), sum(i^2*y) over the window (i = 0
+    for the oldest sample) and an EWMA, updated in constant time as
+    samples arrive and old ones fall out. `table()` turns those moments
+    into the same trajectory table as analyze_trajectories, for all
+    signals at once. Sums are recomputed exactly every `capacity` appends
+    to stop floating-point drift.
+    """
+
+    def __init__(self, names, capacity=1024, alpha=EWMA_ALPHA):
+        self.names = list(names)
+        self.slot = {name: i for i, name in enumerate(self.names)}
+        self.capacity = capacity
+        self.alpha = alpha
+
+        n = len(self.names)
+        self.values = np.zeros((n, capacity), dtype=np.float64)
+        self.head = np.zeros(n, dtype=np.int64)     # Next write position
+        self.count = np.zeros(n, dtype=np.int64)
+        self.y0 = np.zeros(n)
+        self.y1 = np.zeros(n)
+        self.y2 = np.zeros(n)
+        self.ewma = np.zeros(n)
+        self.last = np.zeros(n)
+        self.appends_since_resync = np.zeros(n, dtype=np.int64)
+
+    def append(self, name, value):
+        i = self.slot[name]
+        value = float(value)
+        m = self.count[i]
+
+        if m == self.capacity:
+            # Drop the oldest (index 0) and shift remaining indices down by one
+            oldest = self.values[i, self.head[i]]
+            s = self.y0[i] - oldest
+            t = self.y1[i]
+            self.y2[i] = self.y2[i] - 2 * t + s
+            self.y1[i] = t - s
+            self.y0[i] = s
+            m -= 1
+        else:
+            self.count[i] += 1
+
+        self.values[i, self.head[i]] = value
+        self.head[i] = (self.head[i] + 1) % self.capacity
+        self.y0[i] += value
+        self.y1[i] += m * value
+        self.y2[i] += m * m * value
+
+        self.ewma[i] = value if self.count[i] == 1 else self.alpha * value + (1 - self.alpha) * self.ewma[i]
+        self.last[i] = value
+
+        self.appends_since_resync[i] += 1
+        if self.appends_since_resync[i] >= self.capacity:
+            self._resync(i)
+
+    def extend(self, name, values):
+        for value in values:
+            self.append(name, value)
+
+    def window(self, name):
+        """Samples currently in the window, oldest first."""
+        i = self.slot[name]
+        m = self.count[i]
+        start = (self.head[i] - m) % self.capacity
+        return np.roll(self.values[i], -start)[:m]
+
+    def _resync(self, i):
+        window = self.window(self.names[i])
+        idx = np.arange(len(window), dtype=np.float64)
+        self.y0[i] = window.sum()
+        self.y1[i] = (idx * window).sum()
+        self.y2[i] = (idx * idx * window).sum()
+        self.appends_since_resync[i] = 0
+
+    def table(self, horizon=FORECAST_HORIZON):
+        m = self.count
+        c = (m - 1) / 2.0
+        # Re-centre the moments: x = i - c
+        y1c = self.y1 - c * self.y0
+        y2c = self.y2 - 2 * c * self.y1 + c * c * self.y0
+        slope, accel, mean = _fit_from_moments(m, self.y0, y1c, y2c)
+        return _build_table(self.names, m, self.last, slope, accel, mean, self.ewma, horizon)
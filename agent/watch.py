@@ -0,0 +1,292 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+
+from agent import keywords, observe, trajectory
+
+# Trigger priorities: HIGH runs after a short debounce, LOW is coalesced over a long one
+HIGH = "high"
+LOW = "low"
+
+# Cheap per-sample rules, evaluated on every new signal sample. A rule fires
+# when its condition starts to hold (crossing), not on every sample while it
+# holds. `above` / `below` bound the newest value; `slope` bounds the
+# least-squares slope per sample over the last SLOPE_WINDOW samples, signed so
+# that positive is the bad direction (see trajectory.HIGHER_IS_BETTER);
+# `trajectory` also fires when the window's trajectory turns "Rapid
+# Escalation (Critical)" (per-signal thresholds: trajectory.CRITICAL_CHANGE*).
+SIGNAL_RULES = {
+    "checkout_error_rate": {"above": 20, "slope": 4, "trajectory": True},
+    "api_error_rate": {"above": 20, "slope": 4, "trajectory": True},
+    "latency_ms": {"above": 500, "slope": 100, "trajectory": True},
+    "webhook_failure_rate": {"above": 15, "slope": 4, "trajectory": True},
+    "order_success_rate": {"below": 90, "slope": 4, "trajectory": True},
+}
+SLOPE_WINDOW = 5
+
+# New tickets in one check that count as a burst (HIGH); fewer are LOW
+TICKET_BURST = 20
+
+
+# --- FILE WATCHING ---
+_IN_MODIFY, _IN_CLOSE_WRITE, _IN_MOVED_TO, _IN_CREATE = 0x2, 0x8, 0x80, 0x100
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify (Linux, via libc) on a set of directories; yields changed file names."""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        for directory in directories:
+            if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT.unpack_from(data, offset)
+            start = offset + _EVENT.size
+            names.add(os.fsdecode(data[start:start + length].rstrip(b"\0")))
+            offset = start + length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class InputWatcher:
+    """
+    Waits for changes to a few input files.
+
+    Uses inotify on their directories where available (wakes as soon as a
+    file is written or atomically replaced) and falls back to polling
+    their (size, mtime) stamps every `poll_interval` seconds. Either way a
+    change is only reported once the file's stamp actually differs.
+    """
+
+    def __init__(self, paths, poll_interval=1.0, use_inotify=True):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.poll_interval = poll_interval
+        self.stamps = {p: observe.file_stamps([p]) for p in self.paths}
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(sorted({os.path.dirname(p) for p in self.paths}))
+            except (OSError, AttributeError) as e:
+                print(f"--> [WATCH] inotify unavailable ({e}); polling every {poll_interval}s.")
+        self.mode = "inotify" if self._inotify is not None else "polling"
+
+    def _changed(self):
+        changed = []
+        for path in self.paths:
+            stamp = observe.file_stamps([path])
+            if stamp != self.stamps[path]:
+                self.stamps[path] = stamp
+                changed.append(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """Blocks up to `timeout` seconds (None: until something changes); returns the changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        names = {os.path.basename(p) for p in self.paths}
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if self._inotify is not None:
+                # Still re-check stamps now and then: inotify misses e.g. network filesystems
+                events = self._inotify.read(min(remaining, 5.0) if remaining is not None else 5.0)
+                if events and not events & names:
+                    continue
+            else:
+                time.sleep(min(self.poll_interval, remaining) if remaining is not None else self.poll_interval)
+            changed = self._changed()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+
+
+# --- TRIGGER RULES ---
+def new_samples(old, new):
+    """
+    Samples in `new` that were not in `old`. Histories may be appended to
+    or slide (oldest samples dropped); returns None if they do not line up
+    (history replaced), meaning "start over with all of `new`".
+    """
+    for k in range(min(len(old), len(new)), 0, -1):
+        if old[len(old) - k:] == new[:k]:
+            return new[k:]
+    return None if old else list(new)
+
+
+class SignalMonitor:
+    """
+    Feeds every new signal sample through a per-signal SignalRingBuffer
+    (O(1) per sample) and evaluates SIGNAL_RULES after each one. Returns
+    a HIGH trigger for every rule that starts to hold; samples that cross
+    nothing return none.
+    """
+
+    def __init__(self, rules=None, window=SLOPE_WINDOW):
+        self.rules = SIGNAL_RULES if rules is None else rules
+        self.window = window
+        self.histories = {}
+        self.buffers = {}
+        self.active = {}        # Signal -> set of rule names currently holding
+
+    def _evaluate(self, name):
+        row = self.buffers[name].table()[0]
+        rule = self.rules.get(name, {})
+        polarity = -1.0 if name in trajectory.HIGHER_IS_BETTER else 1.0
+        holding = {}
+        if "above" in rule and row["last"] > rule["above"]:
+            holding["above"] = f"{name} at {row['last']:g} (> {rule['above']:g})"
+        if "below" in rule and row["last"] < rule["below"]:
+            holding["below"] = f"{name} at {row['last']:g} (< {rule['below']:g})"
+        if "slope" in rule and row["samples"] >= 2 and polarity * row["slope"] > rule["slope"]:
+            holding["slope"] = f"{name} slope {row['slope']:g}/sample (limit {rule['slope']:g})"
+        if rule.get("trajectory") and row["trajectory"] == "Rapid Escalation (Critical)":
+            holding["trajectory"] = f"{name} trajectory: {row['trajectory']}"
+        return holding
+
+    def observe(self, raw_signals, observed_at=None):
+        """Processes a fresh read of system_signals.json; returns the triggers it fires."""
+        triggers = []
+        for name, history in trajectory.histories_from_signals(raw_signals).items():
+            fresh = new_samples(self.histories.get(name, []), history)
+            self.histories[name] = list(history)
+            if fresh is None or name not in self.buffers:
+                self.buffers[name] = trajectory.SignalRingBuffer([name], capacity=self.window)
+                fresh = history
+            for value in fresh:
+                self.buffers[name].append(name, value)
+                holding = self._evaluate(name)
+                for rule in holding.keys() - self.active.get(name, set()):
+                    triggers.append({"priority": HIGH, "rule": f"signal.{rule}", "signal": name, "value": value,
+                                     "reason": holding[rule], "observed_at": observed_at})
+                self.active[name] = set(holding)
+        return triggers
+
+
+class TicketMonitor:
+    """
+    Counts tickets added since the last check: new lines of the NDJSON log
+    (read from the last byte offset) or, for tickets.json, the length
+    change. A burst, or any new ticket whose keywords point at a platform
+    failure, is HIGH; other new tickets are LOW.
+    """
+
+    def __init__(self, ticket_log=observe.TICKET_LOG, ticket_json="tickets.json"):
+        self.ticket_log = ticket_log
+        self.ticket_json = ticket_json
+        self.offset = os.path.getsize(ticket_log) if os.path.exists(ticket_log) else 0
+        self.json_count = None
+        if not os.path.exists(ticket_log) and os.path.exists(ticket_json):
+            self._new_tickets()  # Only tickets added from now on count
+
+    def _new_tickets(self):
+        if os.path.exists(self.ticket_log):
+            if os.path.getsize(self.ticket_log) < self.offset:
+                self.offset = 0  # Log replaced
+            tickets = []
+            for batch, offset in observe.iter_ticket_batches(self.ticket_log, self.offset):
+                tickets.extend(batch)
+                self.offset = offset
+            return tickets
+        if not os.path.exists(self.ticket_json):
+            return []
+        try:
+            with open(self.ticket_json, "r") as f:
+                tickets = json.load(f)
+        except ValueError:
+            return []  # Caught mid-write: the next change re-reads it
+        previous, self.json_count = self.json_count, len(tickets)
+        return tickets[previous:] if previous is not None and previous <= len(tickets) else tickets
+
+    def observe(self, observed_at=None):
+        tickets = self._new_tickets()
+        if not tickets:
+            return []
+        failures = [t for t in tickets if "platform_failure" in keywords.fired_rules(keywords.scan(t['message']))]
+        if len(tickets) >= TICKET_BURST:
+            priority, rule, reason = HIGH, "tickets.burst", f"{len(tickets)} new tickets"
+        elif failures:
+            priority, rule, reason = HIGH, "tickets.platform_failure", f"{len(failures)} new platform-failure tickets"
+        else:
+            priority, rule, reason = LOW, "tickets.new", f"{len(tickets)} new tickets"
+        return [{"priority": priority, "rule": rule, "value": len(tickets), "reason": reason,
+                 "observed_at": observed_at}]
+
+
+# --- WATCH LOOP ---
+def _read_signals(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # Missing, or caught mid-write: the next change re-reads it
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns / 1e9
+    except FileNotFoundError:
+        return time.time()
+
+
+def watch_inputs(schedule, signals_path="system_signals.json", ticket_log=observe.TICKET_LOG,
+                 ticket_json="tickets.json", poll_interval=1.0, use_inotify=True, stop=None):
+    """
+    Watches the ticket and signal inputs and calls `schedule(trigger)` for
+    every trigger the rules fire, until `stop` (a threading.Event) is set.
+    Each trigger records `observed_at` (the input's mtime) and
+    `detected_at`, so the scheduler can report spike-to-output latency.
+    Rules that hold at start-up fire once, so a daemon started mid-incident
+    analyses it straight away.
+    """
+    signals = SignalMonitor()
+    tickets = TicketMonitor(ticket_log, ticket_json)
+    watcher = InputWatcher([signals_path, ticket_log, ticket_json], poll_interval, use_inotify)
+    signals_path = os.path.abspath(signals_path)
+    print(f"--> [WATCH] Watching {len(watcher.paths)} inputs ({watcher.mode}).")
+
+    initial = _read_signals(signals_path)
+    pending = signals.observe(initial, _mtime(signals_path)) if initial is not None else []
+    try:
+        while stop is None or not stop.is_set():
+            detected_at = time.time()
+            for trigger in pending:
+                trigger["detected_at"] = detected_at
+                print(f"--> [WATCH] {trigger['priority'].upper()} trigger {trigger['rule']}: {trigger['reason']}")
+                schedule(trigger)
+
+            pending = []
+            for path in watcher.wait(timeout=1.0):
+                if path == signals_path:
+                    raw = _read_signals(path)
+                    if raw is not None:
+                        pending.extend(signals.observe(raw, _mtime(path)))
+                else:
+                    pending.extend(tickets.observe(_mtime(path)))
+    finally:
+        watcher.close()
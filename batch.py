@@ -0,0 +1,230 @@
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import main as agent_main
+from agent import embed, llm_mock, repro_pack
+from agent.instrument import load_run_history
+
+# Aggregate report of the last batch, written in the directory batch.py runs from
+REPORT_PATH = "batch_report.json"
+
+# Each tenant's console output, inside its own directory
+TENANT_LOG = "agent_run.log"
+
+# main.main() keyword arguments for every tenant in this process
+_run_kwargs = {}
+
+
+def _tenant_kwargs(run_kwargs, llm_latency):
+    """main.main() kwargs, with the latency-injecting stand-in LLM built in this process."""
+    run_kwargs = dict(run_kwargs)
+    if llm_latency:
+        run_kwargs["analyze_fn"] = llm_mock.make_latency_llm(mean_latency=llm_latency)
+    return run_kwargs
+
+
+def _init_worker(run_kwargs, llm_latency):
+    global _run_kwargs
+    # Only plain values cross the process boundary (spawn pickles initargs);
+    # the stand-in LLM is a closure, so each worker builds its own.
+    _run_kwargs = _tenant_kwargs(run_kwargs, llm_latency)
+    # A forked worker inherits the parent's loaded model, and with it torch's
+    # OpenMP state but not its thread pool: a parallel region in the child can
+    # deadlock (GNU libgomp). Run torch single-threaded here, as DataLoader
+    # workers do; the pool itself supplies the parallelism.
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(1)
+
+
+def _summarize(path, name, status, wall_s, error=None):
+    """One report row, from the run record main.main() appended to the tenant's run_metrics.ndjson."""
+    row = {"tenant": name, "path": path, "status": status, "wall_s": round(wall_s, 4)}
+    history = load_run_history(limit=1)
+    if history:
+        record = history[-1]
+        stages = {s["stage"]: s.get("counts", {}) for s in record["stages"]}
+        row["status"] = status if error else record["status"]
+        row["tickets"] = stages.get("load", {}).get("tickets")
+        row["clusters"] = stages.get("reasoning", {}).get("reasoned_clusters")
+        row["packs"] = stages.get("reasoning", {}).get("packs")
+        row["changed_clusters"] = stages.get("save", {}).get("changed_clusters")
+        error = error or record.get("error")
+    if error:
+        row["error"] = error
+    return row
+
+
+def _needs_run(path):
+    if _run_kwargs.get("force"):
+        return True
+    cwd = os.getcwd()
+    try:
+        os.chdir(path)
+        _, current = agent_main.analysis_is_current(_run_kwargs.get("full_refit", False),
+                                                    _run_kwargs.get("neighbor_backend", "brute"),
+                                                    _run_kwargs.get("window"),
+                                                    _run_kwargs.get("near_duplicates"))
+        return not current
+    finally:
+        os.chdir(cwd)
+
+
+def run_tenant(path):
+    """
+    One tenant's analysis, isolated in its own dataset directory: every
+    input, cache, state file and output main.py uses is relative to the
+    working directory, so the worker simply runs from there. Console output
+    goes to the tenant's agent_run.log. Returns the tenant's report row.
+    """
+    path = os.path.abspath(path)
+    name = os.path.basename(path.rstrip(os.sep))
+    cwd = os.getcwd()
+    start = time.perf_counter()
+    error = None
+    try:
+        os.chdir(path)
+        with open(TENANT_LOG, "a") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            print(f"\n=== BATCH RUN {datetime.datetime.now().isoformat()} ===")
+            try:
+                agent_main.main(**_run_kwargs)
+            finally:
+                # The incident store is process-wide; the next tenant on this worker opens its own
+                repro_pack.close_store()
+        return _summarize(path, name, "ok", time.perf_counter() - start)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+        return _summarize(path, name, "failed", time.perf_counter() - start, error)
+    finally:
+        os.chdir(cwd)
+
+
+def run_batch(paths, workers=1, run_kwargs=None, report_path=REPORT_PATH, llm_latency=0.0):
+    """
+    Analyses every dataset directory in `paths` in one process tree.
+
+    The embedding model is loaded once, up front (unless every tenant is
+    unchanged since its last run). With workers > 1 the tenants fan out
+    over a fork-based process pool whose workers inherit it (copy-on-write)
+    instead of each paying interpreter start-up, imports and the model
+    load; each forked worker runs torch single-threaded (see _init_worker).
+    Where fork is unavailable, workers are spawned and load the model
+    lazily. Tenants are isolated by directory and a failing tenant never
+    stops the others. Writes and returns the aggregate report.
+
+    `run_kwargs` must hold plain values (they are sent to spawned
+    workers); `llm_latency` > 0 swaps in llm_mock's latency-injecting
+    stand-in LLM, built inside each worker.
+    """
+    global _run_kwargs
+    options = dict(run_kwargs or {})
+    _run_kwargs = options
+    missing = [p for p in paths if not os.path.isdir(p)]
+    if missing:
+        raise ValueError(f"not a dataset directory: {', '.join(missing)}")
+
+    started_at = datetime.datetime.now().isoformat()
+    start = time.perf_counter()
+    # Only pay the model load if some tenant is going to run past the no-change fast path
+    model_s = 0.0
+    if any(_needs_run(path) for path in paths):
+        embed.get_model()
+        model_s = time.perf_counter() - start
+
+    workers = max(1, min(workers, len(paths)))
+    print(f"=== BATCH: {len(paths)} tenants over {workers} workers (model loaded in {model_s:.2f}s) ===")
+    if workers == 1:
+        _run_kwargs = _tenant_kwargs(options, llm_latency)
+        rows = []
+        for path in paths:
+            rows.append(run_tenant(path))
+            _print_row(rows[-1])
+    else:
+        # Fork shares the loaded model; elsewhere each worker loads it lazily
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork") if "fork" in methods else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(options, llm_latency)) as pool:
+            rows = []
+            for row in pool.map(run_tenant, paths):
+                rows.append(row)
+                _print_row(row)
+
+    statuses = [r["status"] for r in rows]
+    report = {
+        "started_at": started_at,
+        "wall_s": round(time.perf_counter() - start, 4),
+        "model_load_s": round(model_s, 4),
+        "workers": workers,
+        "run_options": dict(options, simulate_llm_latency=llm_latency) if llm_latency else options,
+        "totals": {
+            "tenants": len(rows),
+            "ok": statuses.count("ok"),
+            "unchanged": statuses.count("unchanged"),
+            "failed": statuses.count("failed"),
+            "tickets": sum(r.get("tickets") or 0 for r in rows),
+            "clusters": sum(r.get("clusters") or 0 for r in rows),
+            "packs": sum(r.get("packs") or 0 for r in rows),
+        },
+        "tenants": rows,
+    }
+    tmp_path = report_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, report_path)
+
+    totals = report["totals"]
+    print(f"--> [BATCH] {totals['ok']} ok, {totals['unchanged']} unchanged, {totals['failed']} failed "
+          f"in {report['wall_s']:.2f}s. Report saved to {report_path}")
+    return report
+
+
+def _print_row(row):
+    if row.get("error"):
+        detail = row["error"]
+    elif row["status"] == "unchanged":
+        detail = "no changes since the last run"
+    else:
+        detail = f"{row.get('tickets')} tickets, {row.get('clusters')} clusters"
+    print(f"    - {row['tenant']:<24} {row['status']:<9} {row['wall_s']:>8.2f}s  {detail}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyse many tenant datasets (one directory each, laid out like the repo root) in one process.")
+    parser.add_argument("datasets", nargs="+", metavar="DIR",
+                        help="Dataset directories holding tickets.json / tickets.ndjson and system_signals.json.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Tenants analysed concurrently, one process each (1 = sequential, in-process).")
+    parser.add_argument("--report", default=REPORT_PATH, help="Where to write the aggregate run report.")
+    parser.add_argument("--full-refit", action="store_true")
+    parser.add_argument("--neighbors", choices=["brute", "ivf"], default="brute")
+    parser.add_argument("--window", type=agent_main.parse_window, default=None, metavar="SPAN",
+                        help="Sliding-window mode for every tenant (e.g. 90m, 6h, 2d); see main.py --window.")
+    parser.add_argument("--near-duplicates", type=float, default=None, metavar="THRESHOLD",
+                        help="Also collapse near-duplicate messages; see main.py --near-duplicates.")
+    parser.add_argument("--force", action="store_true",
+                        help="Run every tenant even if its tickets and signals are unchanged.")
+    parser.add_argument("--reasoning-workers", type=int, default=1,
+                        help="Clusters reasoned about concurrently inside each tenant (main.py --workers).")
+    parser.add_argument("--simulate-llm-latency", type=float, default=0.0,
+                        help="Mean seconds of injected latency per LLM call (offline stand-in for a real endpoint).")
+    parser.add_argument("--no-analysis-cache", action="store_true")
+    args = parser.parse_args()
+
+    run_kwargs = {"full_refit": args.full_refit, "neighbor_backend": args.neighbors, "window": args.window,
+                  "near_duplicates": args.near_duplicates, "force": args.force, "workers": args.reasoning_workers,
+                  "use_analysis_cache": not args.no_analysis_cache}
+
+    report = run_batch(args.datasets, workers=args.workers, run_kwargs=run_kwargs, report_path=args.report,
+                       llm_latency=max(0.0, args.simulate_llm_latency))
+    raise SystemExit(1 if report["totals"]["failed"] else 0)
@@ -0,0 +1,87 @@
+"""
+Benchmark: N separate `python main.py` launches vs. one batch.py run.
+
+Generates --tenants synthetic datasets (tickets.json + system_signals.json,
+one directory each) in a scratch directory, then times:
+  * one fresh `python main.py` per tenant, run from its directory
+    (interpreter start-up, imports and the model load paid N times);
+  * one `python batch.py` over all tenants, for each --workers value
+    (paid once; tenants fan out over forked worker processes).
+Every variant starts from fresh copies of the datasets, so all runs do
+the full analysis. Uses whichever embedding model is installed.
+
+Usage:
+    python -m benchmarks.bench_batch
+    python -m benchmarks.bench_batch --tenants 16 --tickets 2000 --workers 1 4 8
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_signals, synthetic_tickets
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_datasets(root, tenants, tickets, seed):
+    paths = []
+    for i in range(tenants):
+        path = os.path.join(root, f"tenant_{i:03d}")
+        os.makedirs(path)
+        generated = synthetic_tickets(tickets, seed=seed + i)
+        for ticket in generated:
+            del ticket["_theme"]
+        with open(os.path.join(path, "tickets.json"), "w") as f:
+            json.dump(generated, f)
+        with open(os.path.join(path, "system_signals.json"), "w") as f:
+            json.dump(synthetic_signals(seed=seed + i), f)
+        paths.append(path)
+    return paths
+
+
+def timed(cmd, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--tickets", type=int, default=500, help="Tickets per tenant.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template")
+        make_datasets(template, args.tenants, args.tickets, args.seed)
+
+        def fresh(name):
+            root = os.path.join(tmp, name)
+            shutil.copytree(template, root)
+            return root, sorted(os.path.join(root, d) for d in os.listdir(root))
+
+        print(f"{args.tenants} tenants x {args.tickets} tickets")
+        print(f"{'variant':<30} | {'wall (s)':>8} | {'per tenant (s)':>14}")
+        print("-" * 58)
+
+        _, paths = fresh("separate")
+        t = sum(timed([sys.executable, os.path.join(REPO_ROOT, "main.py")], path) for path in paths)
+        print(f"{'main.py per tenant':<30} | {t:>8.2f} | {t / args.tenants:>14.3f}")
+
+        for workers in args.workers:
+            root, paths = fresh(f"batch_{workers}")
+            t = timed([sys.executable, os.path.join(REPO_ROOT, "batch.py"), *paths, "--workers", str(workers)], root)
+            name = f"batch.py --workers {workers}"
+            print(f"{name:<30} | {t:>8.2f} | {t / args.tenants:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
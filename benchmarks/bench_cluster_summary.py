@@ -0,0 +1,75 @@
+"""
+Benchmark: per-cluster reasoning cost vs. cluster size, with ClusterSummary.
+
+For each corpus size, its outage-themed synthetic tickets form one
+cluster (with stand-in embeddings). The cluster is summarised from
+scratch, extended with --new joining tickets, then reasoned about
+(process_cluster, no cache) and packed (generate_repro_pack). The prompt size is compared with the
+whole-cluster text the reasoning step used to read. Rebuild cost grows
+with the cluster; extend, reasoning and repro cost should stay flat.
+
+Usage:
+    python -m benchmarks.bench_cluster_summary
+    python -m benchmarks.bench_cluster_summary --sizes 100 10000 1000000 --new 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import main as agent_main
+from agent import repro_pack
+from agent.cluster_summary import ClusterSummary
+from agent.incident_store import IncidentStore
+from agent.ticket_table import TicketTable
+from benchmarks.synthetic import synthetic_tickets, synthetic_vectors
+
+
+def _ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(sizes, new, seed):
+    signals = {"signal": "checkout_error_rate", "current_value": 0.2, "history": [0.01, 0.05, 0.2]}
+    analysis = {"stage": "Stage 3: Live / Scale", "root_cause": "Platform Issue / Regression", "confidence": 0.92}
+    print(f"{'cluster':>8} | {'full text':>10} | {'prompt':>6} | {'rebuild (ms)':>12} | {'extend (ms)':>11} | "
+          f"{'reason (ms)':>11} | {'repro (ms)':>10}")
+    print("-" * 88)
+    for size in sizes:
+        tickets = [t for t in synthetic_tickets(size + new, seed=seed) if t.pop("_theme") == "outage"]
+        table = TicketTable.from_tickets(tickets).annotate()
+        table.embedding_rows[:] = np.arange(len(table))
+        vectors = synthetic_vectors(len(table), n_topics=1, seed=seed)
+        old, joined = table.view(np.arange(len(table) - new)), table.view(np.arange(len(table) - new, len(table)))
+
+        summary, rebuild_ms = _ms(lambda: ClusterSummary.from_view(0, old, vectors))
+        _, extend_ms = _ms(lambda: summary.add(joined, vectors))
+        _, reason_ms = _ms(lambda: agent_main.process_cluster(0, summary, signals))
+        store = IncidentStore(root=f"bench_packs_{size}")
+        _, repro_ms = _ms(lambda: repro_pack.generate_repro_pack(analysis, summary, signals, store=store))
+        store.flush()
+
+        full_chars = len(table.view().text())
+        print(f"{len(table):>8} | {full_chars:>10} | {len(summary.text()):>6} | {rebuild_ms:>12.2f} | "
+              f"{extend_ms:>11.2f} | {reason_ms:>11.2f} | {repro_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[400, 4000, 40000, 400000])
+    parser.add_argument("--new", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # Incident packs stay out of the repo
+        try:
+            run(args.sizes, args.new, args.seed)
+        finally:
+            repro_pack.close_store()
+            os.chdir(cwd)
@@ -0,0 +1,82 @@
+"""
+Benchmark: dashboard data layer (agent/dashboard_data.py) at scale.
+
+Builds a synthetic ticket log and cluster output in a temporary directory,
+then times what a Streamlit rerun costs: cold load, an unchanged refresh,
+a refresh after a few appended tickets, and filtered/paged queries.
+
+Usage:
+    python -m benchmarks.bench_dashboard_data
+    python -m benchmarks.bench_dashboard_data --tickets 1000000 --clusters 2000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from agent import observe
+from agent.analysis_output import AnalysisOutput
+from agent.dashboard_data import DashboardData
+
+
+def build_inputs(n_tickets, n_clusters, seed=0):
+    rng = random.Random(seed)
+    with open(observe.TICKET_LOG, "w") as f:
+        for ticket_id in range(1, n_tickets + 1):
+            f.write(json.dumps({"ticket_id": ticket_id, "merchant_id": rng.randint(1000, 1999),
+                                "message": f"Checkout is returning 500 errors (#{ticket_id})"}) + "\n")
+
+    per_cluster = max(1, n_tickets // n_clusters)
+    clusters = [{
+        "id": f"CL-{label}",
+        "title": f"Cluster {label}: Platform Issue / Regression",
+        "stage": rng.choice(["Stage 1: Setup & Auth", "Stage 3: Live / Scale"]),
+        "root_cause": "Platform Issue / Regression",
+        "confidence": 0.9,
+        "risk": rng.choice(["High", "Low"]),
+        "ticket_ids": list(range(label * per_cluster + 1, (label + 1) * per_cluster + 1)),
+        "merchants": [],
+        "timeline": {"Decide": "Escalate"},
+        "restraint": {},
+        "repro_pack": None,
+    } for label in range(n_clusters)]
+    AnalysisOutput(compact=True).write(clusters)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<36} | {(time.perf_counter() - start) * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--clusters", type=int, default=500)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            build_inputs(args.tickets, args.clusters)
+            data = DashboardData()
+            print(f"{'operation':<36} | {'ms':>9}")
+            print("-" * 48)
+            timed("cold load + summary", data.summary)
+            timed("unchanged refresh + summary", data.summary)
+            for _ in range(10):
+                observe.append_ticket(1000, "New ticket")
+            timed("refresh after 10 appended tickets", data.summary)
+            timed("cluster page (risk filter)", lambda: data.cluster_page(2, 20, risk="High"))
+            timed("ticket page (newest)", lambda: data.ticket_page(1, 50))
+            timed("ticket page (text search)", lambda: data.ticket_page(1, 50, search="#4242)"))
+            timed("ticket page (one cluster)", lambda: data.ticket_page(1, 50, cluster_id="CL-3"))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: ticket storms with and without duplicate collapsing.
+
+Each corpus mixes --tickets synthetic tickets with storm copies: a share
+of the tickets repeats one of a few outage messages (same text, or with
+--near also case/punctuation/number variants). It is streamed in batches
+through the live ingest path (embed + incremental DBSCAN insert), once
+with every ticket as its own point and once collapsed by agent/dedup.py.
+Reports points, model encodes and wall time, and checks both runs give
+every ticket the same cluster.
+
+Encoding uses the hashed n-gram stand-in (no embedding cache), so it runs
+offline.
+
+Usage:
+    python -m benchmarks.bench_dedup
+    python -m benchmarks.bench_dedup --tickets 20000 --storm 0.5 0.9 --near 0.8
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from agent import cluster, dedup, embed
+from agent.incremental_cluster import IncrementalDBSCAN
+from agent.ticket_table import TicketTable
+from benchmarks.hash_encoder import HashingEncoder
+from benchmarks.synthetic import synthetic_tickets
+
+STORM = [
+    "Checkout is returning 500 errors in production.",
+    "Payment gateway timing out globally during peak traffic.",
+    "Outage: customers cannot complete payment, checkout timeout.",
+]
+
+
+def storm_corpus(n, share, variants, seed):
+    rng = random.Random(seed)
+    tickets = synthetic_tickets(n, seed=seed)
+    for ticket in tickets:
+        del ticket["_theme"]
+        if rng.random() < share:
+            message = rng.choice(STORM)
+            if variants:
+                message = rng.choice([message, message.lower(), message.rstrip(".") + "!!",
+                                      message.replace("500", str(rng.choice([500, 502, 503])))])
+            ticket["message"] = message
+    return tickets
+
+
+def ingest(tickets, batch_size, groups_fn, near):
+    state = IncrementalDBSCAN(eps=cluster.EPS, min_samples=cluster.MIN_SAMPLES)
+    encoded = 0
+
+    def embed_fn(view):
+        nonlocal encoded
+        encoded += len(view)
+        return embed.generate_embeddings(view, cache_dir=None)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(tickets), batch_size):
+            batch = TicketTable.from_tickets(tickets[i:i + batch_size])
+            cluster.insert_tickets(state, batch, embed_fn, groups_fn(batch, near))
+    elapsed = time.perf_counter() - start
+    labels = [state.label_of(t['ticket_id']) for t in tickets]
+    return len(state.row_of), encoded, elapsed, labels
+
+
+def same_partition(a, b):
+    pairs = set(zip(a, b))
+    return len(pairs) == len(set(a)) == len(set(b)) and all((x == -1) == (y == -1) for x, y in pairs)
+
+
+def run(args):
+    embed.set_model(HashingEncoder(), name="hashing-ngram-384")
+    variants = args.near is not None
+    print(f"{args.tickets} tickets, batch={args.batch_size}, near={args.near}")
+    print(f"{'storm':>5} | {'mode':<10} | {'points':>7} | {'encoded':>7} | {'ingest (s)':>10} | {'same clusters':>13}")
+    print("-" * 69)
+    for share in args.storm:
+        tickets = storm_corpus(args.tickets, share, variants, args.seed)
+        plain = ingest(tickets, args.batch_size, lambda batch, near: dedup.DuplicateGroups.identity(batch), None)
+        collapsed = ingest(tickets, args.batch_size, dedup.collapse, args.near)
+        for mode, (points, encoded, elapsed, labels) in (("per-ticket", plain), ("collapsed", collapsed)):
+            same = "-" if mode == "per-ticket" else str(same_partition(plain[3], labels))
+            print(f"{share:>5.0%} | {mode:<10} | {points:>7} | {encoded:>7} | {elapsed:>10.2f} | {same:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--storm", type=float, nargs="+", default=[0.0, 0.5, 0.9])
+    parser.add_argument("--near", type=float, default=None,
+                        help="Add storm variants and collapse near-duplicates at this threshold.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
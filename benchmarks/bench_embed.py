@@ -0,0 +1,114 @@
+"""
+Benchmark: throughput and peak RSS of batched embedding generation on CPU.
+
+Each corpus size runs in a fresh subprocess so peak RSS is measured per
+size, not accumulated. Output can go to an in-memory array or straight to
+a memory-mapped file.
+
+Usage:
+    python -m benchmarks.bench_embed
+    python -m benchmarks.bench_embed --sizes 10000 100000 1000000 --dtype float16 --memmap
+    python -m benchmarks.bench_embed --no-bucketing --batch-size 64
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+FRAGMENTS = [
+    "Checkout is returning 500 errors in production",
+    "Where can I find the docs example for the webhook schema",
+    "My API key is invalid during SDK initialization",
+    "Cart totals are wrong when a discount code is applied",
+    "Payment capture times out under peak traffic",
+    "401 unauthorized when calling catalog API",
+]
+
+
+def synthetic_messages(n, seed=0):
+    """Mix of short and long tickets (1-12 fragments) so padding matters."""
+    rng = random.Random(seed)
+    return [". ".join(rng.choice(FRAGMENTS) for _ in range(rng.choice([1, 1, 1, 2, 3, 12])))
+            for _ in range(n)]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(size, batch_size, threads, dtype, bucketing, use_memmap):
+    from agent import embed
+    embed.get_model()  # Load the model outside the timed region
+
+    messages = synthetic_messages(size)
+    baseline_rss = peak_rss_mb()
+
+    out = None
+    tmp = None
+    if use_memmap:
+        tmp = tempfile.NamedTemporaryFile(suffix=".bin", delete=False)
+        dim = embed.get_model().get_sentence_embedding_dimension()
+        out = np.memmap(tmp.name, dtype=np.dtype(dtype), mode="w+", shape=(size, dim))
+
+    start = time.perf_counter()
+    embed.encode_batched(messages, out=out, batch_size=batch_size, num_threads=threads,
+                         dtype=dtype, bucket_by_length=bucketing)
+    elapsed = time.perf_counter() - start
+
+    if tmp is not None:
+        del out
+        os.unlink(tmp.name)
+
+    return {
+        "size": size,
+        "seconds": elapsed,
+        "msgs_per_s": size / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "model_rss_mb": baseline_rss,
+    }
+
+
+def run(args):
+    print(f"batch={args.batch_size} threads={args.threads or 'default'} dtype={args.dtype} "
+          f"bucketing={not args.no_bucketing} memmap={args.memmap}")
+    print(f"{'messages':>9} | {'seconds':>9} | {'msgs/s':>9} | {'peak RSS (MB)':>13} | {'after load (MB)':>15}")
+    print("-" * 68)
+    for size in args.sizes:
+        cmd = [sys.executable, "-m", "benchmarks.bench_embed", "--child", str(size),
+               "--batch-size", str(args.batch_size), "--dtype", args.dtype]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        if args.no_bucketing:
+            cmd.append("--no-bucketing")
+        if args.memmap:
+            cmd.append("--memmap")
+        result = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        print(f"{result['size']:>9} | {result['seconds']:>9.1f} | {result['msgs_per_s']:>9.0f} | "
+              f"{result['peak_rss_mb']:>13.0f} | {result['model_rss_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32")
+    parser.add_argument("--no-bucketing", action="store_true")
+    parser.add_argument("--memmap", action="store_true", help="Write output to a memory-mapped file")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_one(args.child, args.batch_size, args.threads, args.dtype,
+                                 not args.no_bucketing, args.memmap)))
+    else:
+        run(args)
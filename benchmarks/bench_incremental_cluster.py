@@ -0,0 +1,73 @@
+"""
+Benchmark: per-insert latency of the incremental clusterer as the corpus grows.
+
+Grows a synthetic corpus of topic-clustered unit vectors (MiniLM-sized, 384
+dims) and, at each checkpoint size, times a window of single-ticket inserts
+followed by a state save/load round-trip. Also reports the mean
+neighbourhood size of the timed inserts: the DBSCAN update itself is
+O(neighbourhood), and topics get denser as this corpus grows, so that part
+of the insert cost grows with any index.
+
+Defaults to the IVF neighbour index (agent/neighbors.py). It keeps the
+query sub-linear; with --backend brute every insert scans the whole corpus.
+
+Usage:
+    python -m benchmarks.bench_incremental_cluster
+    python -m benchmarks.bench_incremental_cluster --sizes 1000 10000 50000
+    python -m benchmarks.bench_incremental_cluster --backend brute
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from agent.incremental_cluster import IncrementalDBSCAN
+from benchmarks.synthetic import synthetic_vectors
+
+
+def run(sizes, window, dim, backend):
+    max_size = max(sizes) + window
+    vectors = synthetic_vectors(max_size, dim=dim)
+    state = IncrementalDBSCAN(backend=backend)
+
+    print(f"{'corpus':>9} | {'mean insert (ms)':>16} | {'p95 insert (ms)':>15} | {'neighbours':>10} | "
+          f"{'clusters':>8} | {'save+load (s)':>13}")
+    print("-" * 87)
+
+    inserted = 0
+    for size in sorted(sizes):
+        # Grow (untimed) up to the checkpoint
+        while inserted < size:
+            state.insert(inserted, vectors[inserted])
+            inserted += 1
+
+        timings = []
+        first = inserted
+        for _ in range(window):
+            start = time.perf_counter()
+            state.insert(inserted, vectors[inserted])
+            timings.append((time.perf_counter() - start) * 1000)
+            inserted += 1
+        neighbours = np.mean([len(state.neighbors[state.row_of[key]]) for key in range(first, inserted)])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.npz")
+            start = time.perf_counter()
+            state.save(path)
+            state = IncrementalDBSCAN.load(path, backend=backend)
+            io_time = time.perf_counter() - start
+
+        print(f"{size:>9} | {np.mean(timings):>16.3f} | {np.percentile(timings, 95):>15.3f} | {neighbours:>10.1f} | "
+              f"{len(state.members):>8} | {io_time:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000, 100000, 200000])
+    parser.add_argument("--window", type=int, default=200, help="Timed inserts per checkpoint")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--backend", choices=["brute", "ivf"], default="ivf")
+    args = parser.parse_args()
+    run(args.sizes, args.window, args.dim, args.backend)
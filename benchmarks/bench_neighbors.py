@@ -0,0 +1,80 @@
+"""
+Report: recall vs. speed of the neighbour-search backends in agent/neighbors.py.
+
+For each synthetic corpus size, builds both indexes, runs eps-radius queries
+for a sample of tickets and compares the approximate (IVF) result sets with
+the exact brute-force ones. Also compares full clusterings (adjusted Rand
+index between the brute-force and IVF DBSCAN labels).
+
+Usage:
+    python -m benchmarks.bench_neighbors
+    python -m benchmarks.bench_neighbors --sizes 10000 100000 --nprobe 4 8 16
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from agent.cluster import EPS, dbscan_from_neighbors
+from agent.neighbors import BruteForceIndex, IVFIndex
+from benchmarks.synthetic import synthetic_vectors
+
+
+def timed_queries(index, queries):
+    start = time.perf_counter()
+    results = [index.query_radius(q, EPS) for q in queries]
+    elapsed = time.perf_counter() - start
+    return results, elapsed * 1000 / len(queries)
+
+
+def run(sizes, nprobes, n_queries, dim, full_cluster_limit):
+    print(f"{'corpus':>8} | {'backend':>13} | {'build (s)':>9} | {'query (ms)':>10} | {'speedup':>7} | {'recall':>6} | {'ARI':>5}")
+    print("-" * 77)
+
+    for size in sizes:
+        vectors = synthetic_vectors(size, dim=dim, seed=size)
+        queries = vectors[np.random.default_rng(1).choice(size, min(n_queries, size), replace=False)]
+
+        start = time.perf_counter()
+        exact = BruteForceIndex()
+        exact.add_batch(vectors)
+        build_exact = time.perf_counter() - start
+        truth, exact_ms = timed_queries(exact, queries)
+
+        exact_labels = None
+        if size <= full_cluster_limit:
+            exact_labels = dbscan_from_neighbors(exact.query_radius_batch(vectors, EPS))
+
+        print(f"{size:>8} | {'brute':>13} | {build_exact:>9.2f} | {exact_ms:>10.3f} | {1.0:>7.1f} | {1.0:>6.3f} | {'1.00' if exact_labels is not None else '-':>5}")
+
+        for nprobe in nprobes:
+            start = time.perf_counter()
+            approx = IVFIndex(nprobe=nprobe)
+            approx.add_batch(vectors)
+            build_approx = time.perf_counter() - start
+            found, approx_ms = timed_queries(approx, queries)
+
+            total = sum(len(t) for t in truth)
+            hit = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+            recall = hit / total if total else 1.0
+
+            ari = "-"
+            if exact_labels is not None:
+                approx_labels = dbscan_from_neighbors(approx.query_radius_batch(vectors, EPS))
+                ari = f"{adjusted_rand_score(exact_labels, approx_labels):.2f}"
+
+            print(f"{size:>8} | {f'ivf/nprobe={nprobe}':>13} | {build_approx:>9.2f} | {approx_ms:>10.3f} | "
+                  f"{exact_ms / approx_ms:>7.1f} | {recall:>6.3f} | {ari:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--full-cluster-limit", type=int, default=50000,
+                        help="Largest corpus for which full clusterings are compared (ARI)")
+    args = parser.parse_args()
+    run(args.sizes, args.nprobe, args.queries, args.dim, args.full_cluster_limit)
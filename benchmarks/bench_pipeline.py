@@ -0,0 +1,222 @@
+"""
+Benchmark: end-to-end pipeline stages on synthetic corpora.
+
+For each corpus size a fresh subprocess (so peak RSS is per size) generates
+themed tickets (auth / docs / checkout / outage + noise) and matching signal
+histories, then runs the pipeline stage by stage in a scratch directory:
+
+    observe     write the NDJSON ticket log, stream it into a TicketTable, annotate keywords
+    embed       generate_embeddings per batch (fresh on-disk cache)
+    cluster     incremental DBSCAN inserts per batch (first --cluster-max tickets)
+    summarize   ClusterSummary per cluster (centroid, representatives, keyword histogram)
+    trajectory  batched trajectory table over the signal histories
+    reasoning   process_cluster per cluster summary (sequential, no analysis cache)
+    repro_pack  generate_repro_pack per cluster summary + incident store flush
+
+and reports throughput, per-unit latency percentiles (a unit is a batch, a
+cluster or a pack) and memory per stage. Encoding uses the deterministic
+hashed n-gram stand-in unless --real-model is given, so it runs offline.
+
+Clustering is capped because eps-neighbourhoods inside a dense theme grow
+with the corpus (quadratic memory); the cap is printed with the results.
+
+Usage:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 1000000 --cluster-max 20000
+    python -m benchmarks.bench_pipeline --sizes 10000 --trace-memory --real-model
+"""
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def _embedding_rows(embeddings, view):
+    return embeddings[view.rows]
+
+
+def _percentiles(latencies_ms):
+    if not latencies_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def run_one(size, batch_size, cluster_max, backend, trace_memory, real_model, seed):
+    import main as agent_main
+    from agent import cluster, embed, observe, repro_pack, trajectory
+    from agent.cluster_summary import ClusterSummary
+    from agent.incident_store import IncidentStore
+    from agent.incremental_cluster import IncrementalDBSCAN
+    from agent.instrument import RunMetrics
+    from agent.ticket_table import TicketTable
+    from benchmarks.hash_encoder import HashingEncoder
+    from benchmarks.synthetic import synthetic_signals, synthetic_tickets
+
+    if real_model:
+        embed.get_model()  # Load outside the timed stages
+    else:
+        embed.set_model(HashingEncoder(), name="hashing-ngram-384")
+
+    generated = synthetic_tickets(size, seed=seed)
+    for ticket in generated:
+        del ticket["_theme"]
+    raw_signals = synthetic_signals(seed=seed)
+    history = raw_signals["checkout_error_rate_history"]
+    signals = {"signal": "checkout_error_rate", "current_value": history[-1], "history": history}
+
+    metrics = RunMetrics(path=os.devnull, trace_memory=trace_memory)
+    latencies = {}
+    items = {}
+
+    # OBSERVE
+    with metrics.stage("observe"):
+        with open(observe.TICKET_LOG, "w") as f:
+            for ticket in generated:
+                f.write(json.dumps(ticket) + "\n")
+        tickets, timings = TicketTable(), []
+        start = time.perf_counter()
+        for batch, _ in observe.iter_ticket_batches(observe.TICKET_LOG, 0, batch_size):
+            tickets.extend(batch)
+            now = time.perf_counter()
+            timings.append((now - start) * 1000)
+            start = now
+        tickets.annotate()
+    del generated
+    latencies["observe"], items["observe"] = timings, len(tickets)
+
+    # EMBED
+    with metrics.stage("embed"):
+        parts, timings = [], []
+        for i in range(0, len(tickets), batch_size):
+            start = time.perf_counter()
+            batch = tickets.view(np.arange(i, min(i + batch_size, len(tickets))))
+            parts.append(embed.generate_embeddings(batch, cache_dir=".embedding_cache"))
+            timings.append((time.perf_counter() - start) * 1000)
+        embeddings = np.vstack(parts)
+    latencies["embed"], items["embed"] = timings, len(tickets)
+
+    # CLUSTER (incremental inserts, the live ingest path)
+    clustered = TicketTable.from_tickets([tickets.ticket(r) for r in range(min(cluster_max, len(tickets)))])
+    with metrics.stage("cluster"):
+        state = IncrementalDBSCAN(backend=backend)
+        timings = []
+        for i in range(0, len(clustered), batch_size):
+            start = time.perf_counter()
+            batch = clustered.view(np.arange(i, min(i + batch_size, len(clustered))))
+            cluster.insert_tickets(state, batch, functools.partial(_embedding_rows, embeddings))
+            timings.append((time.perf_counter() - start) * 1000)
+        clusters = cluster.group_tickets(state, clustered)
+    latencies["cluster"], items["cluster"] = timings, len(clustered)
+    del embeddings
+
+    # SUMMARIZE
+    vectors = cluster.index_vectors(state, clustered)
+    with metrics.stage("summarize"):
+        summaries, timings = [], []
+        for label, members in clusters.items():
+            if label == -1:
+                continue
+            start = time.perf_counter()
+            summaries.append((label, ClusterSummary.from_view(label, members, vectors)))
+            timings.append((time.perf_counter() - start) * 1000)
+    latencies["summarize"], items["summarize"] = timings, len(summaries)
+
+    # TRAJECTORY
+    with metrics.stage("trajectory"):
+        start = time.perf_counter()
+        table = trajectory.analyze_trajectories(trajectory.histories_from_signals(raw_signals))
+        latencies["trajectory"] = [(time.perf_counter() - start) * 1000]
+    items["trajectory"] = len(table)
+
+    # REASONING
+    with metrics.stage("reasoning"):
+        timings = []
+        for label, summary in summaries:
+            start = time.perf_counter()
+            agent_main.process_cluster(label, summary, signals)
+            timings.append((time.perf_counter() - start) * 1000)
+        repro_pack.flush_store()
+    latencies["reasoning"], items["reasoning"] = timings, len(summaries)
+
+    # REPRO PACK (every cluster, into a fresh store, so the stage is measurable on its own)
+    analysis = {"stage": "Stage 3: Live / Scale", "root_cause": "Platform Issue / Regression", "confidence": 0.92}
+    with metrics.stage("repro_pack"):
+        store = IncidentStore(root="bench_packs")
+        timings = []
+        for label, summary in summaries:
+            start = time.perf_counter()
+            repro_pack.generate_repro_pack(analysis, summary, signals, store=store)
+            timings.append((time.perf_counter() - start) * 1000)
+        store.flush()
+    latencies["repro_pack"], items["repro_pack"] = timings, len(summaries)
+
+    results = []
+    for record in metrics.stages:
+        name = record["stage"]
+        results.append(dict(record, items=items[name],
+                            per_s=items[name] / record["wall_s"] if record["wall_s"] else None,
+                            units=len(latencies[name]), **_percentiles(latencies[name])))
+    return {"size": size, "clustered": len(clustered), "clusters": len(summaries), "stages": results}
+
+
+def _cell(value, width, digits):
+    return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+
+def run(args):
+    encoder = "real model" if args.real_model else "hashed n-gram stand-in"
+    print(f"batch={args.batch_size} cluster_max={args.cluster_max} backend={args.backend} encoder={encoder}")
+    for size in args.sizes:
+        cmd = [sys.executable, "-m", "benchmarks.bench_pipeline", "--child", str(size),
+               "--batch-size", str(args.batch_size), "--cluster-max", str(args.cluster_max),
+               "--backend", args.backend, "--seed", str(args.seed)]
+        if args.trace_memory:
+            cmd.append("--trace-memory")
+        if args.real_model:
+            cmd.append("--real-model")
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        print(f"\n=== {result['size']} tickets ({result['clustered']} clustered, {result['clusters']} clusters) ===")
+        header = (f"{'stage':<11} | {'items':>8} | {'wall (s)':>8} | {'items/s':>10} | {'p50 ms':>8} | "
+                  f"{'p95 ms':>8} | {'p99 ms':>8} | {'peak RSS MB':>11}")
+        if args.trace_memory:
+            header += f" | {'traced MB':>9}"
+        print(header)
+        print("-" * len(header))
+        for s in result["stages"]:
+            line = (f"{s['stage']:<11} | {s['items']:>8} | {s['wall_s']:>8.2f} | {_cell(s['per_s'], 10, 0)} | "
+                    f"{_cell(s['p50_ms'], 8, 2)} | {_cell(s['p95_ms'], 8, 2)} | {_cell(s['p99_ms'], 8, 2)} | "
+                    f"{s['peak_rss_mb']:>11.0f}")
+            if args.trace_memory:
+                line += f" | {s['peak_traced_mb']:>9.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--cluster-max", type=int, default=10000,
+                        help="Only the first N tickets go through clustering/reasoning/repro stages.")
+    parser.add_argument("--backend", choices=["brute", "ivf"], default="ivf")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="Per-stage peak Python allocations (slower)")
+    parser.add_argument("--real-model", action="store_true", help="Use the SentenceTransformer instead of the stand-in")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # Logs, caches and packs stay out of the repo
+            result = run_one(args.child, args.batch_size, args.cluster_max, args.backend,
+                             args.trace_memory, args.real_model, args.seed)
+        print(json.dumps(result))
+    else:
+        run(args)
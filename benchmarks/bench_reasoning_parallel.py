@@ -0,0 +1,78 @@
+"""
+Benchmark: sequential vs. concurrent per-cluster reasoning (main.run_reasoning_loop).
+
+Uses the latency-injecting stand-in LLM from agent/llm_mock.py, so the
+speedup of the concurrent loop can be measured offline. Repro packs are
+written to a temporary directory.
+
+Usage:
+    python -m benchmarks.bench_reasoning_parallel
+    python -m benchmarks.bench_reasoning_parallel --clusters 64 --latency 0.5 --workers 1 4 16
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import main as agent_main
+from agent import llm_mock, repro_pack
+from agent.cluster_summary import ClusterSummary
+from agent.ticket_table import TicketTable
+
+THEMES = [
+    "Checkout is returning 500 errors in production.",
+    "Where can I find the docs example for the webhook schema?",
+    "My API key is invalid during SDK initialization.",
+    "Cart totals are wrong when a discount code is applied.",
+]
+
+
+def synthetic_clusters(n_clusters, tickets_per_cluster, seed=0):
+    rng = random.Random(seed)
+    tickets, labels = [], []
+    for label in range(n_clusters):
+        theme = THEMES[label % len(THEMES)]
+        for _ in range(tickets_per_cluster):
+            tickets.append({"ticket_id": len(tickets) + 1, "merchant_id": rng.randint(1000, 1999), "message": theme})
+            labels.append(label)
+    views = TicketTable.from_tickets(tickets).group(labels)
+    return {label: ClusterSummary.from_view(label, view) for label, view in views.items()}
+
+
+def run(n_clusters, tickets_per_cluster, latency, worker_counts):
+    clusters = synthetic_clusters(n_clusters, tickets_per_cluster)
+    signals = {"signal": "checkout_error_rate", "current_value": 38, "history": [4, 38]}
+    llm = llm_mock.make_latency_llm(mean_latency=latency, seed=0)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # Keep repro packs out of the repo
+        try:
+            baseline = None
+            reference = None
+            print(f"{'workers':>7} | {'wall (s)':>8} | {'speedup':>7} | {'same output':>11}")
+            print("-" * 44)
+            for workers in worker_counts:
+                start = time.perf_counter()
+                output = agent_main.run_reasoning_loop(clusters, signals, workers=workers, analyze_fn=llm)
+                wall = time.perf_counter() - start
+
+                # Compare everything but the incident ids
+                shape = [(c["id"], c["root_cause"], c["risk"], c["ticket_ids"]) for c in output]
+                reference = reference or shape
+                baseline = baseline or wall
+                print(f"{workers:>7} | {wall:>8.2f} | {baseline / wall:>7.1f} | {str(shape == reference):>11}")
+            repro_pack.flush_store()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clusters", type=int, default=32)
+    parser.add_argument("--tickets-per-cluster", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean injected seconds per LLM call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+    run(args.clusters, args.tickets_per_cluster, args.latency, args.workers)
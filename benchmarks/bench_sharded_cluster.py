@@ -0,0 +1,58 @@
+"""
+Benchmark: sharded multi-process DBSCAN vs. sklearn's single-process fit.
+
+For each corpus size, times sklearn DBSCAN (skipped above --verify-max,
+where its stored neighbourhoods no longer fit comfortably in memory) and
+agent.sharded_cluster.sharded_dbscan at each worker count, reporting
+speedup over one worker and whether labels are identical to sklearn's.
+
+Usage:
+    python -m benchmarks.bench_sharded_cluster
+    python -m benchmarks.bench_sharded_cluster --sizes 20000 100000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from agent.cluster import EPS, MIN_SAMPLES
+from agent.sharded_cluster import sharded_dbscan
+from benchmarks.synthetic import synthetic_vectors
+
+
+def run(sizes, worker_counts, dim, verify_max):
+    print(f"cores available: {os.cpu_count()}")
+    print(f"{'corpus':>8} | {'method':<16} | {'wall (s)':>8} | {'speedup':>7} | {'clusters':>8} | {'= sklearn':>9}")
+    print("-" * 70)
+    for size in sizes:
+        vectors = synthetic_vectors(size, dim=dim)
+
+        reference = None
+        if size <= verify_max:
+            from sklearn.cluster import DBSCAN
+            start = time.perf_counter()
+            reference = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES, metric="cosine").fit(vectors).labels_
+            wall = time.perf_counter() - start
+            print(f"{size:>8} | {'sklearn':<16} | {wall:>8.2f} | {'':>7} | {reference.max() + 1:>8} | {'':>9}")
+
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            labels = sharded_dbscan(vectors, EPS, MIN_SAMPLES, workers=workers)
+            wall = time.perf_counter() - start
+            baseline = baseline or wall
+            same = "-" if reference is None else str(np.array_equal(labels, reference))
+            print(f"{size:>8} | {f'sharded x{workers}':<16} | {wall:>8.2f} | {baseline / wall:>7.2f} | "
+                  f"{labels.max() + 1:>8} | {same:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 50000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--verify-max", type=int, default=20000,
+                        help="Largest corpus also fitted with sklearn for timing and label comparison")
+    args = parser.parse_args()
+    run(args.sizes, args.workers, args.dim, args.verify_max)
@@ -0,0 +1,76 @@
+"""
+Benchmark: process startup and time-to-result of main.py.
+
+Every measurement is a fresh interpreter, so nothing is warm except the
+OS page cache. Reports:
+  * `import main` with the lazy model vs. an eager baseline that also
+    builds the SentenceTransformer at import time (the old behaviour);
+  * end-to-end wall time of `python main.py` on changed inputs vs. an
+    immediate re-run on unchanged inputs (the no-change fast path).
+
+The end-to-end runs happen in a scratch copy of tickets.json and
+system_signals.json, so the real working tree is untouched.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeats 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_LAZY = "import main"
+IMPORT_EAGER = "import main; from agent import embed; embed.get_model()"
+
+
+def timed(cmd, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def median_of(repeats, fn):
+    return statistics.median(fn() for _ in range(repeats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<34} | {'median wall (s)':>15}")
+    print("-" * 52)
+
+    for name, code in [("import main (lazy model)", IMPORT_LAZY),
+                       ("import main + eager model load", IMPORT_EAGER)]:
+        t = median_of(args.repeats, lambda: timed([sys.executable, "-c", code], REPO_ROOT))
+        print(f"{name:<34} | {t:>15.3f}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in ("tickets.json", "system_signals.json"):
+            src = os.path.join(REPO_ROOT, name)
+            if os.path.exists(src):
+                shutil.copy(src, workdir)
+        run = [sys.executable, os.path.join(REPO_ROOT, "main.py")]
+
+        def changed_run():
+            # Touching the input invalidates the run stamp
+            os.utime(os.path.join(workdir, "tickets.json"))
+            return timed(run, workdir)
+
+        t_changed = median_of(args.repeats, changed_run)
+        t_unchanged = median_of(args.repeats, lambda: timed(run, workdir))
+        print(f"{'main.py, changed inputs':<34} | {t_changed:>15.3f}")
+        print(f"{'main.py, unchanged inputs':<34} | {t_unchanged:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: list-of-dicts tickets vs. the columnar TicketTable.
+
+For each corpus size, measures the Python heap held by the tickets
+(tracemalloc) as a list of dicts and as a TicketTable, the time to group
+them into clusters, and the time to reload them: parsing the NDJSON log
+from scratch vs. loading the persisted table (.npz).
+
+Usage:
+    python -m benchmarks.bench_ticket_table
+    python -m benchmarks.bench_ticket_table --sizes 100000 1000000
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from agent import observe
+from agent.ticket_table import TicketTable
+from benchmarks.synthetic import synthetic_tickets
+
+
+def _held_mb(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, held / 1e6
+
+
+def _group_dicts(tickets, labels):
+    clusters = {}
+    for ticket, label in zip(tickets, labels):
+        clusters.setdefault(int(label), []).append(ticket)
+    return clusters
+
+
+def run(sizes, n_clusters, seed):
+    print(f"{'corpus':>8} | {'dicts MB':>8} | {'table MB':>8} | {'group dicts':>11} | {'group table':>11} | "
+          f"{'parse log':>9} | {'load .npz':>9}")
+    print("-" * 85)
+    for size in sizes:
+        generated = synthetic_tickets(size, seed=seed)
+        for ticket in generated:
+            del ticket["_theme"]
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "tickets.ndjson")
+            table_path = os.path.join(tmp, "tickets.npz")
+            with open(log_path, "w") as f:
+                for ticket in generated:
+                    f.write(json.dumps(ticket) + "\n")
+            del generated
+
+            start = time.perf_counter()
+            observe.load_tickets(log_path)
+            parse_s = time.perf_counter() - start
+            tickets, dicts_mb = _held_mb(lambda: observe.load_tickets(log_path))
+            table, table_mb = _held_mb(functools.partial(TicketTable.from_tickets, tickets))
+            table.save(table_path)
+
+            labels = np.random.default_rng(seed).integers(-1, n_clusters, size)
+            start = time.perf_counter()
+            _group_dicts(tickets, labels)
+            group_dicts_s = time.perf_counter() - start
+            start = time.perf_counter()
+            table.group(labels)
+            group_table_s = time.perf_counter() - start
+            del tickets, table
+
+            start = time.perf_counter()
+            TicketTable.load(table_path)
+            load_s = time.perf_counter() - start
+
+        print(f"{size:>8} | {dicts_mb:>8.1f} | {table_mb:>8.1f} | {group_dicts_s:>10.3f}s | {group_table_s:>10.3f}s | "
+              f"{parse_s:>8.3f}s | {load_s:>8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.clusters, args.seed)
@@ -0,0 +1,155 @@
+"""
+Benchmark: event-driven re-analysis (agent/watch.py) vs. re-running on a timer.
+
+In a scratch dataset (--tickets synthetic tickets, healthy signals) a
+feed rewrites system_signals.json every --interval seconds with one new
+sample per signal (small noise around a healthy baseline) and appends
+--trickle tickets per sample to the ticket log. Every --spike-every
+samples checkout_error_rate spikes for a few samples, then recovers.
+
+The daemon's AnalysisScheduler runs main.main(); the watcher schedules
+it through the trigger rules, once with inotify and once with stat
+polling. The baseline re-runs on every input change, as a timer at the
+sample rate would. Reports runs, how many spikes were caught, and
+spike-to-output latency (spike written -> covering run finished, from
+trigger_metrics.ndjson).
+
+Encoding uses the hashed n-gram stand-in, so it runs offline.
+
+Usage:
+    python -m benchmarks.bench_trigger
+    python -m benchmarks.bench_trigger --samples 60 --interval 0.2 --spike-every 20 --poll-interval 1.0
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import daemon
+from agent import embed, instrument, observe, repro_pack, watch
+from benchmarks.hash_encoder import HashingEncoder
+from benchmarks.synthetic import synthetic_tickets
+
+BASELINE = {"checkout_error_rate": 3, "api_error_rate": 2, "latency_ms": 150,
+            "webhook_failure_rate": 4, "order_success_rate": 98}
+SPIKE = [12, 35, 60]    # checkout_error_rate during a spike
+HISTORY = 20            # Samples kept in system_signals.json
+
+
+def write_signals(histories):
+    raw = {"signal": "checkout_error_rate", "current_value": histories["checkout_error_rate"][-1]}
+    raw.update({f"{name}_history": values[-HISTORY:] for name, values in histories.items()})
+    with open("system_signals.json.tmp", "w") as f:
+        json.dump(raw, f)
+    os.replace("system_signals.json.tmp", "system_signals.json")
+
+
+def feed(args, rng, on_change=None):
+    """Plays the sample stream; returns the wall time each spike's first sample was written."""
+    histories = {name: [base] * 5 for name, base in BASELINE.items()}
+    spikes = []
+    for i in range(args.samples):
+        phase = i % args.spike_every - (args.spike_every - len(SPIKE))
+        for name, base in BASELINE.items():
+            histories[name].append(round(base * (1 + rng.uniform(-0.05, 0.05)), 2))
+        if phase >= 0:
+            histories["checkout_error_rate"][-1] = SPIKE[phase]
+        for _ in range(args.trickle):
+            observe.append_ticket(rng.randrange(1, 50), "Question about my invoice for last month.")
+        write_signals(histories)
+        if phase == 0:
+            spikes.append(time.time())
+        if on_change:
+            on_change()
+        time.sleep(args.interval)
+    return spikes
+
+
+def setup(args):
+    tickets = synthetic_tickets(args.tickets, seed=args.seed)
+    for ticket in tickets:
+        del ticket["_theme"]
+    with open("tickets.json", "w") as f:
+        json.dump(tickets, f)
+    observe.ensure_ticket_log()
+    write_signals({name: [base] * 5 for name, base in BASELINE.items()})
+
+
+def run_mode(args, mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            setup(args)
+            scheduler = daemon.AnalysisScheduler(debounce=args.debounce, low_debounce=args.low_debounce)
+            scheduler.wait_for(scheduler.request())   # Initial analysis, outside the measurement
+            runs_before = scheduler.runs
+            stop = threading.Event()
+            rng = random.Random(args.seed)
+
+            if mode == "every change":
+                spikes = feed(args, rng, on_change=lambda: scheduler.request(
+                    trigger={"rule": "timer", "priority": watch.HIGH, "detected_at": time.time()}))
+                thread = None
+            else:
+                thread = threading.Thread(target=watch.watch_inputs, daemon=True,
+                                          args=(lambda t: scheduler.request(priority=t["priority"], trigger=t),),
+                                          kwargs={"poll_interval": args.poll_interval,
+                                                  "use_inotify": mode == "inotify", "stop": stop})
+                thread.start()
+                time.sleep(0.2)
+                spikes = feed(args, rng)
+            time.sleep(args.low_debounce + 1.0)  # Let the last runs finish
+            stop.set()
+            if thread is not None:
+                thread.join()
+            scheduler.wait_for(scheduler.requested)
+
+            records = instrument.tail_ndjson(daemon.TRIGGER_METRICS_PATH, limit=100000)
+            latencies = []
+            for spike in spikes:
+                # First finished run whose inputs included the spike sample
+                covering = [r["finished_at"] for r in records if r["started_at"] >= spike]
+                if covering:
+                    latencies.append(min(covering) - spike)
+            return scheduler.runs - runs_before, len(spikes), latencies
+        finally:
+            repro_pack.close_store()
+            os.chdir(args.cwd)
+
+
+def run(args):
+    embed.set_model(HashingEncoder(), name="hashing-ngram-384")
+    print(f"{args.samples} samples every {args.interval}s, spike every {args.spike_every}, "
+          f"{args.trickle} tickets/sample, {args.tickets} tickets")
+    print(f"{'mode':<12} | {'runs':>5} | {'spikes caught':>13} | {'latency p50 (s)':>15} | {'latency max (s)':>15}")
+    print("-" * 72)
+    for mode in args.modes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runs, spikes, latencies = run_mode(args, mode)
+        latencies.sort()
+        p50 = f"{latencies[len(latencies) // 2]:.3f}" if latencies else "-"
+        worst = f"{latencies[-1]:.3f}" if latencies else "-"
+        print(f"{mode:<12} | {runs:>5} | {len(latencies):>6} / {spikes:<4} | {p50:>15} | {worst:>15}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=40)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--spike-every", type=int, default=20)
+    parser.add_argument("--trickle", type=int, default=1, help="Tickets appended per sample.")
+    parser.add_argument("--debounce", type=float, default=0.05)
+    parser.add_argument("--low-debounce", type=float, default=2.0)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--modes", nargs="+", default=["every change", "inotify", "polling"],
+                        choices=["every change", "inotify", "polling"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.cwd = os.getcwd()
+    run(args)
@@ -0,0 +1,86 @@
+"""
+Benchmark: steady-state run cost with and without the sliding window.
+
+For each window (or none), a scratch directory gets a ticket log holding
+--history tickets spread evenly over the last --span-hours. A first
+main.main() run ingests it (warm-up); then --new fresh tickets are
+appended and a second run is timed. That second run is the steady state
+of a live agent: without a window it re-groups and re-reasons over all
+history, with one it only touches the live tickets.
+
+Encoding uses the hashed n-gram stand-in, so it runs offline.
+
+Usage:
+    python -m benchmarks.bench_window
+    python -m benchmarks.bench_window --history 20000 --span-hours 168 --windows none 24h 6h 1h
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+import main as agent_main
+from agent import embed, observe, repro_pack
+from agent.instrument import load_run_history
+from benchmarks.hash_encoder import HashingEncoder
+from benchmarks.synthetic import synthetic_tickets
+
+
+def run_once(history, new, span_hours, window, neighbors, seed):
+    tickets = synthetic_tickets(history + new, seed=seed, span_hours=span_hours)
+    for ticket in tickets:
+        del ticket["_theme"]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # Logs, caches, state and output stay out of the repo
+        try:
+            with open(observe.TICKET_LOG, "w") as f:
+                for ticket in tickets[:history]:
+                    f.write(json.dumps(ticket) + "\n")
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent_main.main(neighbor_backend=neighbors, window=window)
+                with open(observe.TICKET_LOG, "a") as f:
+                    for ticket in tickets[history:]:
+                        f.write(json.dumps(ticket) + "\n")
+                agent_main.main(neighbor_backend=neighbors, window=window)
+            warm, steady = load_run_history(limit=2)
+        finally:
+            repro_pack.close_store()
+            os.chdir(cwd)
+
+    stages = {s["stage"]: s for s in steady["stages"]}
+    load_counts = stages["load"]["counts"]
+    return {
+        "warm_s": warm["wall_s"],
+        "steady_s": steady["wall_s"],
+        "live": load_counts.get("live_tickets", load_counts["tickets"]),
+        "clusters": stages["reasoning"]["counts"]["reasoned_clusters"],
+        "reasoning_s": stages["reasoning"]["wall_s"],
+    }
+
+
+def run(args):
+    embed.set_model(HashingEncoder(), name="hashing-ngram-384")
+    print(f"history={args.history} over {args.span_hours}h, +{args.new} new tickets, neighbors={args.neighbors}")
+    print(f"{'window':>8} | {'live':>7} | {'clusters':>8} | {'warm-up (s)':>11} | {'steady run (s)':>14} | "
+          f"{'reasoning (s)':>13}")
+    print("-" * 78)
+    for label in args.windows:
+        window = None if label == "none" else agent_main.parse_window(label)
+        r = run_once(args.history, args.new, args.span_hours, window, args.neighbors, args.seed)
+        print(f"{label:>8} | {r['live']:>7} | {r['clusters']:>8} | {r['warm_s']:>11.2f} | {r['steady_s']:>14.3f} | "
+              f"{r['reasoning_s']:>13.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=10000)
+    parser.add_argument("--new", type=int, default=100)
+    parser.add_argument("--span-hours", type=float, default=168)
+    parser.add_argument("--windows", nargs="+", default=["none", "24h", "6h", "1h"])
+    parser.add_argument("--neighbors", choices=["brute", "ivf"], default="ivf")
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,56 @@
+"""
+Deterministic stand-in for the SentenceTransformer, for offline benchmarks.
+
+Hashes word unigrams and character trigrams (crc32, so stable across
+processes) into a signed feature vector and L2-normalises it. Messages
+sharing most of their words land close together, which is enough to give
+DBSCAN realistic topical clusters without downloading the model.
+
+    from agent import embed
+    from benchmarks.hash_encoder import HashingEncoder
+    embed.set_model(HashingEncoder(), name="hashing-ngram-384")
+"""
+import re
+import zlib
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEncoder:
+    """Implements the two SentenceTransformer methods the agent uses."""
+
+    def __init__(self, dim=384, trigram_weight=0.5):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+        self._features = {}  # token -> (indices, values); corpora reuse few tokens
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _token_features(self, token):
+        features = self._features.get(token)
+        if features is None:
+            grams = [(token, 1.0)]
+            padded = f"#{token}#"
+            grams += [(padded[i:i + 3], self.trigram_weight) for i in range(len(padded) - 2)]
+            indices = []
+            values = []
+            for gram, weight in grams:
+                h = zlib.crc32(gram.encode("utf-8"))
+                indices.append(h % self.dim)
+                values.append(weight if (h >> 31) & 1 else -weight)
+            features = (np.asarray(indices, dtype=np.int64), np.asarray(values, dtype=np.float32))
+            self._features[token] = features
+        return features
+
+    def encode(self, sentences, batch_size=None, **kwargs):
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for token in _TOKEN.findall(sentence.lower()):
+                indices, values = self._token_features(token)
+                np.add.at(out[row], indices, values)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
@@ -0,0 +1,157 @@
+"""
+Synthetic corpora for benchmarks.
+"""
+import datetime
+
+import numpy as np
+
+
+def synthetic_vectors(n, dim=384, n_topics=None, noise=0.035, seed=0):
+    """
+    Unit vectors scattered around `n_topics` random topic centres, shaped like
+    MiniLM ticket embeddings (tight topical groups, near-orthogonal topics).
+    """
+    rng = np.random.default_rng(seed)
+    n_topics = n_topics or max(n // 50, 4)
+    centres = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    vectors = centres[rng.integers(0, n_topics, n)] + rng.normal(scale=noise, size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+# --- SYNTHETIC TICKETS ---
+# Theme -> templates; {slots} are filled from SLOTS so each theme yields
+# many distinct but topically tight messages.
+THEMES = {
+    "auth": [
+        "My API key is invalid during SDK initialization.",
+        "401 unauthorized when calling {api} API.",
+        "SDK auth keeps failing in {env} environment.",
+        "Access token expires after {minutes} minutes and refresh fails.",
+        "Setup guide not clear about auth headers for {api} API.",
+    ],
+    "docs": [
+        "Where can I find the docs example for the {api} webhook schema?",
+        "Do you have a sample JSON for {api} update?",
+        "Is there documentation for the {api} API pagination?",
+        "The docs example for {api} is missing required fields.",
+        "How to configure {api} webhooks? Can't find an example in the docs.",
+    ],
+    "checkout": [
+        "Cart totals are wrong when a discount code is applied to order {order}.",
+        "Checkout webhook not firing for order {order} in {env} env.",
+        "Payment webhook retries happening too often for order {order}.",
+        "Customers see an empty cart after login on checkout.",
+        "Order {order} created twice after payment confirmation.",
+    ],
+    "outage": [
+        "Checkout is returning 500 errors in production.",
+        "Payment gateway timing out globally during peak traffic.",
+        "Internal error 500 on {api} API since {time}.",
+        "Latency spikes over {ms}ms causing cart abandonment in production.",
+        "Outage: customers cannot complete payment, checkout timeout.",
+    ],
+}
+NOISE = [
+    "loading internet high", "hello?", "Question about pricing tiers.", "Is there a roadmap for new APIs?",
+    "thanks, all good now", "General question about headless migration.", "error with network",
+]
+SLOTS = {
+    "api": ["catalog", "inventory", "orders", "payments", "customers", "shipping"],
+    "env": ["local", "staging", "integration", "sandbox"],
+    "minutes": ["5", "10", "15", "30"],
+    "order": None,  # Random order number
+    "time": ["this morning", "the last deploy", "02:00 UTC", "an hour ago"],
+    "ms": ["2000", "5000", "8000"],
+}
+
+
+def _typo(message, rng):
+    """Swaps two adjacent characters somewhere in the message."""
+    if len(message) < 4:
+        return message
+    i = int(rng.integers(0, len(message) - 1))
+    return message[:i] + message[i + 1] + message[i] + message[i + 2:]
+
+
+def synthetic_tickets(n, themes=None, weights=None, noise_rate=0.05, typo_rate=0.1, n_merchants=2000, seed=0,
+                      span_hours=None, end=None):
+    """
+    `n` tickets in the tickets.json schema, drawn from auth / docs / checkout /
+    outage themes (optionally weighted), with `noise_rate` off-topic tickets
+    and `typo_rate` of messages carrying a character swap. Each ticket also
+    gets a "_theme" label (None for noise) for checking cluster quality.
+    With `span_hours`, tickets get evenly spaced "created_at" stamps over the
+    span ending at `end` (a datetime, default now), in ticket_id order.
+    """
+    rng = np.random.default_rng(seed)
+    themes = themes or list(THEMES)
+    probs = np.asarray(weights if weights is not None else [1.0] * len(themes), dtype=float)
+    probs /= probs.sum()
+
+    theme_idx = rng.choice(len(themes), size=n, p=probs)
+    is_noise = rng.random(n) < noise_rate
+    has_typo = rng.random(n) < typo_rate
+    merchants = rng.integers(1000, 1000 + n_merchants, size=n)
+    if span_hours is not None:
+        end = end or datetime.datetime.now()
+        step = datetime.timedelta(hours=span_hours) / max(n, 1)
+
+    tickets = []
+    for i in range(n):
+        if is_noise[i]:
+            theme = None
+            message = NOISE[int(rng.integers(0, len(NOISE)))]
+        else:
+            theme = themes[theme_idx[i]]
+            templates = THEMES[theme]
+            template = templates[int(rng.integers(0, len(templates)))]
+            fills = {}
+            for slot, values in SLOTS.items():
+                if "{" + slot + "}" in template:
+                    fills[slot] = str(int(rng.integers(10000, 99999))) if values is None \
+                        else values[int(rng.integers(0, len(values)))]
+            message = template.format(**fills)
+        if has_typo[i]:
+            message = _typo(message, rng)
+        ticket = {"ticket_id": i + 1, "merchant_id": int(merchants[i]), "message": message, "_theme": theme}
+        if span_hours is not None:
+            ticket["created_at"] = (end - step * (n - 1 - i)).isoformat()
+        tickets.append(ticket)
+    return tickets
+
+
+# --- SYNTHETIC SIGNALS ---
+SIGNAL_BASELINES = {
+    "checkout_error_rate": 4.0,
+    "api_error_rate": 3.0,
+    "latency_ms": 120.0,
+    "webhook_failure_rate": 5.0,
+    "order_success_rate": 98.0,
+}
+
+
+def synthetic_signals(points=96, incident_at=None, severity=1.0, seed=0):
+    """
+    system_signals.json-style `<name>_history` series of `points` samples:
+    noisy baselines, with an escalating incident from `incident_at` onward
+    (default: last quarter of the window). order_success_rate falls while
+    the error/latency signals rise.
+    """
+    rng = np.random.default_rng(seed)
+    incident_at = int(points * 0.75) if incident_at is None else incident_at
+    ramp = np.clip(np.arange(points) - incident_at, 0, None).astype(float)
+    ramp = severity * ramp ** 1.5 / max(points - incident_at, 1) ** 0.5
+
+    signals = {}
+    for name, base in SIGNAL_BASELINES.items():
+        jitter = rng.normal(scale=0.03 * base if name != "order_success_rate" else 0.5, size=points)
+        if name == "order_success_rate":
+            series = np.clip(base - 2.0 * ramp + jitter, 0, 100)
+        elif name == "latency_ms":
+            series = base * (1 + 0.5 * ramp) + jitter
+        else:
+            series = base * (1 + 0.4 * ramp) + jitter
+        signals[f"{name}_history"] = [round(float(v), 2) for v in series]
+    return signals
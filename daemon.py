@@ -0,0 +1,267 @@
+import argparse
+import collections
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import main as agent_main
+from agent import embed, observe, watch
+from agent.analysis_output import AnalysisOutput
+from agent.instrument import load_run_history
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# One record per watcher trigger: when the input changed, was noticed, and
+# was covered by a finished run (see AnalysisScheduler._record_triggers)
+TRIGGER_METRICS_PATH = "trigger_metrics.ndjson"
+
+
+class AnalysisScheduler:
+    """
+    Runs main.main() on a single worker thread, coalescing bursts.
+
+    Every request bumps `requested`; the worker waits `debounce` seconds
+    after the first pending request, then runs one analysis that covers
+    every request made before it started. Callers can block until the run
+    that covers their request has finished.
+
+    Requests are HIGH priority (API calls, watcher rules that crossed a
+    threshold) or LOW (routine new tickets). While only LOW requests are
+    pending the worker waits up to `low_debounce` seconds so a trickle
+    coalesces into one run; a HIGH request cuts that wait short. Watcher
+    triggers passed to request() are timed through to the end of the run
+    that covers them and logged to `metrics_path`.
+    """
+
+    def __init__(self, debounce=0.5, run_kwargs=None, low_debounce=5.0, metrics_path=TRIGGER_METRICS_PATH):
+        self.debounce = debounce
+        self.low_debounce = max(low_debounce, debounce)
+        self.run_kwargs = run_kwargs or {}
+        self.metrics_path = metrics_path
+        self.cond = threading.Condition()
+        self.requested = 0      # Generation of the latest request
+        self.force_pending = False  # Any pending request asked to bypass the no-change fast path
+        self.urgent = False     # A pending request is HIGH priority
+        self.triggers = []      # Watcher triggers covered by the next run
+        self.latencies = collections.deque(maxlen=256)  # Recent trigger-to-finished-run seconds
+        self.completed = 0      # Generation covered by the last finished run
+        self.running = False
+        self.runs = 0
+        self.last_run_at = None
+        self.last_duration = None
+        self.last_error = None
+
+        self.worker = threading.Thread(target=self._loop, name="agent-worker", daemon=True)
+        self.worker.start()
+
+    def request(self, force=False, priority=watch.HIGH, trigger=None):
+        with self.cond:
+            self.requested += 1
+            self.force_pending = self.force_pending or force
+            self.urgent = self.urgent or priority == watch.HIGH
+            if trigger is not None:
+                trigger["requested_at"] = time.time()
+                self.triggers.append(trigger)
+            self.cond.notify_all()
+            return self.requested
+
+    def wait_for(self, generation, timeout=None):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.completed >= generation, timeout=timeout)
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.requested > self.completed)
+                # Only LOW work pending: hold it for the long debounce unless something urgent arrives
+                self.cond.wait_for(lambda: self.urgent, timeout=self.low_debounce - self.debounce)
+
+            # Let the burst settle, then take everything requested so far
+            time.sleep(self.debounce)
+            with self.cond:
+                target = self.requested
+                force, self.force_pending = self.force_pending, False
+                triggers, self.triggers = self.triggers, []
+                self.urgent = False
+                self.running = True
+
+            start = time.time()
+            try:
+                status = agent_main.main(force=force, **self.run_kwargs)
+                self.last_error = None
+                if status == "failed":
+                    # main() logs and swallows its own failures; the reason is in its run record
+                    history = load_run_history(limit=1)
+                    self.last_error = (history[-1].get("error") if history else None) or "run failed"
+            except Exception as e:
+                self.last_error = str(e)
+                traceback.print_exc()
+
+            with self.cond:
+                self.running = False
+                self.completed = target
+                self.runs += 1
+                self.last_run_at = start
+                self.last_duration = time.time() - start
+                self._record_triggers(triggers, start, start + self.last_duration)
+                self.cond.notify_all()
+
+    def _record_triggers(self, triggers, started_at, finished_at):
+        """Per trigger: input change -> detected -> run started -> run finished (outputs written)."""
+        if not triggers:
+            return
+        with open(self.metrics_path, "a") as f:
+            for trigger in triggers:
+                observed_at = trigger.get("observed_at") or trigger["detected_at"]
+                record = dict(trigger, started_at=started_at, finished_at=finished_at,
+                              detect_s=round(trigger["detected_at"] - observed_at, 4),
+                              queue_s=round(started_at - trigger["detected_at"], 4),
+                              run_s=round(finished_at - started_at, 4),
+                              latency_s=round(finished_at - observed_at, 4),
+                              error=self.last_error)
+                self.latencies.append(record["latency_s"])
+                f.write(json.dumps(record) + "\n")
+
+    def status(self):
+        with self.cond:
+            latencies = sorted(self.latencies)
+            return {
+                "running": self.running,
+                "pending": self.requested > self.completed,
+                "pending_priority": (watch.HIGH if self.urgent else watch.LOW) if self.requested > self.completed else None,
+                "runs_completed": self.runs,
+                "last_run_at": self.last_run_at,
+                "last_duration_s": self.last_duration,
+                "last_error": self.last_error,
+                "trigger_latency_s": {
+                    "count": len(latencies),
+                    "last": self.latencies[-1] if latencies else None,
+                    "p50": latencies[len(latencies) // 2] if latencies else None,
+                    "p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+                },
+            }
+
+
+def make_handler(scheduler):
+    class AgentRequestHandler(BaseHTTPRequestHandler):
+        """
+        POST /tickets   {"merchant_id": .., "message": ..}  -> append + schedule
+        POST /analyze                                        -> schedule
+        GET  /status                                         -> scheduler state
+        GET  /analysis?since=N                               -> clusters changed after run N
+        Add ?wait=1 to a POST to block until the covering run has finished,
+        and ?force=1 to run even if no inputs changed.
+        """
+
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        @staticmethod
+        def _ticket_fields(data):
+            """(merchant_id, message) from a POST /tickets body; ValueError if malformed."""
+            if not isinstance(data, dict):
+                raise ValueError("body must be a JSON object")
+            merchant_id, message = data.get("merchant_id"), data.get("message")
+            if isinstance(merchant_id, bool) or not isinstance(merchant_id, (int, str)):
+                raise ValueError("merchant_id must be an integer")
+            try:
+                merchant_id = int(merchant_id)
+            except ValueError:
+                raise ValueError("merchant_id must be an integer") from None
+            if not isinstance(message, str) or not message.strip():
+                raise ValueError("message must be a non-empty string")
+            return merchant_id, message
+
+        def _schedule(self, payload):
+            query = parse_qs(urlparse(self.path).query)
+            generation = scheduler.request(force=query.get("force", ["0"])[-1] == "1")
+            payload["generation"] = generation
+            if query.get("wait", ["0"])[-1] == "1":
+                payload["completed"] = scheduler.wait_for(generation, timeout=600)
+            self._reply(202 if not payload.get("completed") else 200, payload)
+
+        def do_GET(self):
+            if self.path.startswith("/status"):
+                self._reply(200, scheduler.status())
+            elif self.path.startswith("/analysis"):
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                except ValueError:
+                    self._reply(400, {"error": "since must be an integer"})
+                    return
+                self._reply(200, AnalysisOutput().changes_since(since))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                if self.path.startswith("/tickets"):
+                    merchant_id, message = self._ticket_fields(self._read_json())
+                    observe.ensure_ticket_log()
+                    ticket = observe.append_ticket(merchant_id, message)
+                    self._schedule({"ticket": ticket})
+                elif self.path.startswith("/analyze"):
+                    self._schedule({})
+                else:
+                    self._reply(404, {"error": "not found"})
+            except (KeyError, ValueError) as e:
+                self._reply(400, {"error": f"bad request: {e}"})
+
+        def log_message(self, format, *args):
+            print(f"--> [DAEMON] {self.address_string()} {format % args}")
+
+    return AgentRequestHandler
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, debounce=0.5, run_kwargs=None, watch_inputs=False,
+          low_debounce=5.0, poll_interval=1.0):
+    # Pay the model load once, up front, instead of on the first request
+    embed.get_model()
+    scheduler = AnalysisScheduler(debounce=debounce, run_kwargs=run_kwargs, low_debounce=low_debounce)
+    if watch_inputs:
+        threading.Thread(target=watch.watch_inputs, name="agent-watch", daemon=True,
+                         args=(lambda trigger: scheduler.request(priority=trigger["priority"], trigger=trigger),),
+                         kwargs={"poll_interval": poll_interval}).start()
+    server = ThreadingHTTPServer((host, port), make_handler(scheduler))
+    print(f"=== AGENT DAEMON LISTENING ON http://{host}:{port} ===")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n--> [DAEMON] Shutting down.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident agent process: loads the model once and serves a local API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="Seconds to wait after a request so bursts coalesce into one run.")
+    parser.add_argument("--neighbors", choices=["brute", "ivf"], default="brute")
+    parser.add_argument("--window", type=agent_main.parse_window, default=None, metavar="SPAN",
+                        help="Sliding-window mode for every run (e.g. 90m, 6h, 2d); see main.py --window.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Also watch tickets and system_signals.json and re-run when trigger rules fire "
+                             "(see agent/watch.py).")
+    parser.add_argument("--low-debounce", type=float, default=5.0,
+                        help="Seconds routine (low-priority) ticket triggers wait so a trickle coalesces.")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Stat-polling interval when inotify is unavailable.")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.debounce, {"neighbor_backend": args.neighbors, "window": args.window},
+          watch_inputs=args.watch, low_debounce=args.low_debounce, poll_interval=args.poll_interval)
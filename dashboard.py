@@ -4,6 +4,13 @@ import pandas as pd
 import subprocess
 import os
 import time
+import urllib.error
+import urllib.request
+
+from agent import observe
+from agent.cluster_archive import ClusterArchive
+from agent.dashboard_data import DashboardData
+from agent.instrument import load_run_history
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Agentic Support | Self-Healing System", layout="wide")
@@ -19,31 +26,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- FILE OPERATIONS ---
-def load_tickets():
-    if os.path.exists("tickets.json"):
-        with open("tickets.json", "r") as f: return json.load(f)
-    return []
+@st.cache_resource
+def get_data():
+    # One shared, change-aware data layer; reruns only stat the files
+    return DashboardData()
 
 def save_new_ticket(merchant_id, message):
-    tickets = load_tickets()
-    new_id = len(tickets) + 1
-    tickets.append({"ticket_id": new_id, "merchant_id": int(merchant_id), "message": message})
-    with open("tickets.json", "w") as f:
-        json.dump(tickets, f, indent=2)
-
-def run_backend_agent():
-    """Runs the python main.py script and waits for it to finish."""
+    # Append-only: O(1) per ticket instead of rewriting the whole file.
+    # The first write migrates the legacy tickets.json into the log.
+    observe.ensure_ticket_log()
+    observe.append_ticket(merchant_id, message)
+
+# Resident agent (daemon.py). Falls back to spawning main.py if it is not running.
+AGENT_DAEMON_URL = os.environ.get("AGENT_DAEMON_URL", "http://127.0.0.1:8765")
+
+def request_daemon_analysis(force=False):
+    """Asks the daemon for a run and blocks until it finishes. False if unreachable."""
+    query = "wait=1&force=1" if force else "wait=1"
+    req = urllib.request.Request(f"{AGENT_DAEMON_URL}/analyze?{query}", data=b"{}", method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=600) as resp:
+            return json.load(resp).get("completed", False)
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+def run_backend_agent(force=False):
+    """Triggers an analysis run (daemon if available, else python main.py) and waits for it."""
     with st.spinner("🤖 Agent is Observing, Reasoning, and Clustering..."):
-        subprocess.run(["python", "main.py"])
-        time.sleep(1) 
+        if not request_daemon_analysis(force):
+            subprocess.run(["python", "main.py"] + (["--force"] if force else []))
+            time.sleep(1)
     st.success("Analysis Complete!")
     st.rerun()
 
-def load_agent_analysis():
-    if os.path.exists("analysis_output.json"):
-        with open("analysis_output.json", "r") as f: return json.load(f)
-    return []
-
 # ==========================================
 # SIDEBAR NAVIGATION & SIMULATOR
 # ==========================================
@@ -70,23 +85,25 @@ with st.sidebar.form("new_ticket_form"):
         run_backend_agent()
 
 if st.sidebar.button("🔄 Rerun Agent Manually"):
-    run_backend_agent()
+    run_backend_agent(force=True)
 
 # ==========================================
 # MAIN DASHBOARD LOGIC
 # ==========================================
-tickets = load_tickets()
-clusters = load_agent_analysis()
+data = get_data()
+summary = data.summary()
+clusters = data.clusters
 
 # --- VIEW 1: PLATFORM OPS (Internal) ---
 if view_mode == "Platform Ops (Internal)":
     st.title("🛡️ Agentic Support Operations")
     
-    # Global Stats
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Total Tickets", len(tickets))
-    c2.metric("Active Clusters", len(clusters))
-    c3.metric("System Status", "Operational" if len(clusters) < 2 else "Degraded")
+    # Global Stats (pre-aggregated on reload)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Total Tickets", summary['tickets'])
+    c2.metric("Active Clusters", summary['clusters'])
+    c3.metric("High Risk Clusters", summary['high_risk'])
+    c4.metric("System Status", "Operational" if summary['clusters'] < 2 else "Degraded")
 
     st.markdown("---")
 
@@ -97,22 +114,43 @@ if view_mode == "Platform Ops (Internal)":
         
         with left_col:
             st.subheader("🔴 Incident Clusters")
-            for c in clusters:
-                risk_label = "HIGH RISK" if c['risk'] == 'High' else "LOW RISK"
-                with st.expander(f"[{risk_label}] {c['title']}", expanded=True):
+            f1, f2 = st.columns(2)
+            risk_filter = f1.selectbox("Risk", ["All"] + sorted(summary['risk']))
+            stage_filter = f2.selectbox("Stage", ["All"] + sorted(summary['stage']))
+            search = st.text_input("Search titles", "")
+            filters = {"risk": None if risk_filter == "All" else risk_filter,
+                       "stage": None if stage_filter == "All" else stage_filter,
+                       "search": search}
+            page_size = 20
+            _, total = data.cluster_page(1, page_size, **filters)
+            pages = max(1, -(-total // page_size))
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+            page_clusters, total = data.cluster_page(page, page_size, **filters)
+            st.caption(f"{total} matching clusters")
+
+            for c in page_clusters:
+                risk_label = "HIGH RISK" if c['risk'].startswith('High') else "LOW RISK"
+                with st.expander(f"[{risk_label}] {c['title']}", expanded=len(page_clusters) <= 5):
                     st.caption(f"{len(c['ticket_ids'])} Tickets • {c['stage']}")
                     st.progress(c['confidence'])
                     st.write(f"**Action:** {c['timeline']['Decide']}")
         
         with right_col:
             st.subheader("Deep Dive: Agent Reasoning")
-            active = clusters[0] 
+            choices = [c['id'] for c in page_clusters] or [clusters[0]['id']]
+            active = data.cluster(st.selectbox("Cluster", choices))
             st.markdown(f"### {active['title']}")
             
             # Timeline Visualization
             st.markdown("#### 🧠 Reasoning Timeline")
             st.json(active['timeline'])
-            
+
+            # Representative tickets (what the reasoning step actually read)
+            if active.get('summary'):
+                st.markdown("#### 🎯 Representative Tickets")
+                st.caption("Keywords: " + (", ".join(active['summary']['top_keywords']) or "none"))
+                st.dataframe(pd.DataFrame(active['summary']['representatives']), use_container_width=True)
+
             # Restraint Box
             st.markdown("#### 🛑 Automation Restraint")
             st.error(f"**Action Not Taken:** {active['restraint']['action_not_taken']}")
@@ -120,6 +158,44 @@ if view_mode == "Platform Ops (Internal)":
 
             if active['repro_pack']:
                 st.success(f"✅ Repro Pack Generated: {active['repro_pack']['id']}")
+                pack = data.incident(active['repro_pack']['id'])
+                if pack:
+                    with st.expander("View Repro Pack"):
+                        st.json(pack)
+
+            # Member tickets, one page at a time
+            st.markdown("#### 🎫 Tickets")
+            ticket_rows, ticket_total = data.ticket_page(1, 50, cluster_id=active['id'])
+            st.caption(f"Showing {len(ticket_rows)} of {ticket_total} tickets in this cluster")
+            st.dataframe(pd.DataFrame(ticket_rows), use_container_width=True)
+
+    # Per-stage timing across recent runs (run_metrics.ndjson, written by main.py)
+    st.markdown("---")
+    with st.expander("⏱️ Pipeline Timing History"):
+        runs = [r for r in load_run_history(limit=50) if r['status'] != "unchanged"]
+        if not runs:
+            st.caption("No instrumented runs yet.")
+        else:
+            history = pd.DataFrame(
+                [dict({"run": r['started_at']}, **{s['stage']: s['wall_s'] for s in r['stages']}) for r in runs]
+            ).set_index("run")
+            st.caption("Wall time per stage (seconds)")
+            st.line_chart(history)
+            last = runs[-1]
+            st.caption(f"Last run: {last['status']}, {last['wall_s']:.2f}s wall, "
+                       f"{last['cpu_s']:.2f}s CPU, peak RSS {last['peak_rss_mb']:.0f} MB")
+            st.dataframe(pd.DataFrame(last['stages']), use_container_width=True)
+
+    # Clusters that left the output (expired window or re-clustered), newest first
+    with st.expander("🗄️ Closed Clusters"):
+        closed = ClusterArchive().recent(limit=50)
+        if not closed:
+            st.caption("No clusters have been closed yet.")
+        else:
+            st.dataframe(pd.DataFrame(
+                [{"closed_at": c['closed_at'], "id": c['id'], "root_cause": c['root_cause'], "risk": c['risk'],
+                  "tickets": len(c['ticket_ids'])} for c in closed]
+            ), use_container_width=True)
 
 # --- VIEW 2: MERCHANT PORTAL (External) ---
 else:
@@ -127,15 +203,21 @@ else:
     
     # Merchant Login Simulation
     st.markdown("Simulating logged-in Merchant view...")
-    
-    # Check if there are clusters affecting generic merchants
-    # (In a real app, we filter by the logged-in ID)
-    if not clusters:
+    login_id = st.text_input("Logged-in Merchant ID", "1001")
+    try:
+        merchant_id = int(login_id)
+    except ValueError:
+        st.error("Merchant IDs are numeric.")
+        st.stop()
+
+    # Only clusters this merchant has tickets in (merchant index lookup)
+    view = data.merchant_view(merchant_id)
+    if not view["clusters"]:
         st.success("✅ All systems operational. Your store is healthy.")
     else:
         st.warning("⚠️ We are experiencing elevated error rates.")
         
-        for c in clusters:
+        for c in view["clusters"]:
             st.markdown(f"""
             <div class="metric-card">
                 <h3>System Notice: {c['root_cause']}</h3>
@@ -143,4 +225,11 @@ else:
                 <p><strong>Status:</strong> {c['timeline']['Decide']}</p>
                 <p><em>No action required on your part. Engineering is investigating.</em></p>
             </div>
-            """, unsafe_allow_html=True)
\ No newline at end of file
+            """, unsafe_allow_html=True)
+        if view["incidents"]:
+            st.caption(f"Incident reference: {', '.join(view['incidents'])}")
+
+    ticket_rows, ticket_total = data.ticket_page(1, 20, merchant_id=merchant_id)
+    if ticket_total:
+        st.subheader(f"Your Recent Tickets ({ticket_total})")
+        st.dataframe(pd.DataFrame(ticket_rows), use_container_width=True)
\ No newline at end of file
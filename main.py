@@ -1,49 +1,353 @@
+import argparse
+import asyncio
 import json
+import os
+import time
 import traceback  # FIX: Added missing import
-from agent import observe, embed, cluster, reason, decide  # FIX: Added missing agent imports
-from agent import llm_mock, counterfactual, trajectory, repro_pack
+from concurrent.futures import ThreadPoolExecutor
+from agent import observe, embed, cluster, decide  # FIX: Added missing agent imports
+from agent import llm_mock, trajectory, repro_pack, dedup
+from agent.analysis_cache import AnalysisCache
+from agent.analysis_output import AnalysisOutput
+from agent.cluster_archive import ClusterArchive
+from agent.cluster_summary import SUMMARY_PATH, ClusterSummaries
+from agent.instrument import RunMetrics
+from agent.merchant_index import MerchantIndex
+from agent.policy import POLICY
+from agent.ticket_table import TicketTable
+
+# Clusterer state persisted between runs (incremental DBSCAN)
+CLUSTER_STATE_PATH = ".cluster_state.npz"
+
+# Per-signal trajectory table written alongside the cluster analysis
+TRAJECTORY_OUTPUT_PATH = "signal_trajectories.json"
+
+# Memoised per-cluster outcomes; bump RESTRAINT_VERSION when the restraint
+# output changes shape (policy table edits already change decide.RULES_VERSION).
+ANALYSIS_CACHE_PATH = ".analysis_cache.json"
+RESTRAINT_VERSION = "1"
+
+# Inputs + options of the last completed run (fast no-change exit)
+RUN_STAMP_PATH = ".last_run.json"
+
+def parse_window(text):
+    """'90m', '6h', '2d' or plain seconds -> seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = str(text).strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+def analysis_cache_version():
+    return f"prompt={llm_mock.PROMPT_VERSION};rules={decide.RULES_VERSION};restraint={RESTRAINT_VERSION}"
 
 # --- HELPER TO SAVE RESULTS ---
 def save_analysis_to_disk(data, filename="analysis_output.json"):
-    """Saves the processed agent results for the frontend to read."""
+    """Saves the processed agent results for the frontend to read (atomically)."""
     try:
-        with open(filename, "w") as f:
+        tmp_path = filename + ".tmp"
+        with open(tmp_path, "w") as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp_path, filename)
         print(f"--> [SYSTEM] Success! Analysis saved to {filename}")
+        return True
     except Exception as e:
         print(f"--> [ERROR] Failed to save analysis: {e}")
+        return False
 
 def generate_restraint_logic(risk_level, confidence):
-    """DECIDE (Restraint): Explicitly explains what the agent WON'T do."""
+    """DECIDE (Restraint): Explicitly explains what the agent WON'T do (policy table rules)."""
+    return POLICY.restrain(risk_level, confidence)
+
+def ingest_ticket_log(neighbor_backend="brute", batch_size=1000, cutoff=None, near_duplicates=None):
+    """
+    OBSERVE (Streaming): Embeds and clusters only the log records written
+    since the last checkpoint, one bounded batch at a time. The checkpoint
+    is committed after the clusterer state, so a crash only replays work.
+    With a `cutoff` (epoch seconds), records already outside the window
+    are skipped instead of embedded. Duplicate messages (and, with a
+    `near_duplicates` threshold, near-duplicates within a batch) only add
+    weight to an existing clusterer point: no embedding, no neighbour query.
+    """
+    state = cluster.load_state(CLUSTER_STATE_PATH, neighbor_backend)
+    # A missing clusterer state means the old checkpoint is meaningless
+    offset = observe.load_checkpoint() if len(state) else 0
+
+    new_count = 0
+    for batch, end_offset in observe.iter_ticket_batches(observe.TICKET_LOG, offset, batch_size):
+        batch = TicketTable.from_tickets(batch)
+        if cutoff is not None:
+            batch = batch.take(batch.live_rows(cutoff))
+        groups = dedup.collapse(batch, near_duplicates)
+        new_count += cluster.insert_tickets(state, batch, embed.generate_embeddings, groups)
+        offset = end_offset
+
+    state.save(CLUSTER_STATE_PATH)
+    observe.save_checkpoint(offset)
+    print(f"--> [OBSERVE] Ingested {new_count} new tickets from {observe.TICKET_LOG}.")
+    return state
+
+def reason_about_cluster(summary, signals, analyze_fn=None):
+    """
+    REASON + DECIDE + ACT for one cluster (no presentation). Reads only its
+    ClusterSummary: representative texts and the keyword histogram, so the
+    cost does not grow with cluster size.
+    """
+    analyze_fn = analyze_fn or llm_mock.analyze_cluster_semantically
+    cluster_text = summary.text()
+    keyword_hits = summary.keyword_hits()
+
+    # Reason & Decide
+    llm_analysis = analyze_fn(cluster_text, keyword_hits)
+    decision = decide.determine_action(llm_analysis)
+    restraint = generate_restraint_logic(decision['risk_level'], llm_analysis['confidence'])
+
+    # Check for Repro Pack
+    repro_data = None
+    if POLICY.needs_repro(llm_analysis):
+        path, inc_id, r_type, triggers = repro_pack.generate_repro_pack(
+            llm_analysis, summary, signals
+        )
+        repro_data = {"id": inc_id, "type": r_type, "triggers": triggers}
+
+    return {
+        "llm_analysis": llm_analysis,
+        "decision": decision,
+        "restraint": restraint,
+        "repro_data": repro_data,
+    }
+
+def process_cluster(label, summary, signals, analyze_fn=None, cache=None):
+    """
+    Returns the frontend object for one cluster's ClusterSummary. With a
+    cache, a cluster whose membership fingerprint was analysed before reuses
+    that outcome (including its repro pack reference) and skips the
+    reasoning path entirely.
+    """
+    outcome = None
+    if cache is not None:
+        fingerprint = summary.fingerprint
+        outcome = cache.get(fingerprint)
+    if outcome is None:
+        outcome = reason_about_cluster(summary, signals, analyze_fn)
+        if cache is not None:
+            cache.put(fingerprint, outcome)
+
+    llm_analysis = outcome['llm_analysis']
+    decision = outcome['decision']
+    restraint = outcome['restraint']
+    repro_data = outcome['repro_data']
+
+    # CONSTRUCT FRONTEND OBJECT
+    return {
+        "id": f"CL-{label}",
+        "title": f"Cluster {label}: {llm_analysis['root_cause']}",
+        "stage": llm_analysis['stage'],
+        "root_cause": llm_analysis['root_cause'],
+        "confidence": llm_analysis['confidence'],
+        "risk": decision['risk_level'],
+        "ticket_ids": summary.ticket_ids,
+        "merchants": list(summary.merchants),
+        "summary": {
+            "representatives": [{"ticket_id": t, "message": m} for t, m in summary.representatives],
+            "top_keywords": [kw for kw, _ in summary.keyword_counts.most_common(5)],
+        },
+        "timeline": {
+            "Observe": f"Clustered {summary.size} tickets via DBSCAN.",
+            "Reason": llm_analysis.get('reasoning', 'Analyzed patterns.'),
+            "Decide": decision['recommended_action'],
+            "Act": "Repro Pack Generated" if repro_data else "internal_ticket_created"
+        },
+        "restraint": restraint,
+        "repro_pack": repro_data
+    }
+
+def run_reasoning_loop(clusters, signals, workers=1, cluster_timeout=None, analyze_fn=None, cache=None):
+    """
+    Runs process_cluster over every non-noise cluster ({label: ClusterSummary}).
+
+    workers=1 keeps the original sequential loop. With more workers the
+    clusters fan out over an asyncio-driven thread pool with at most
+    `workers` in flight; each cluster gets `cluster_timeout` seconds once it
+    starts. Output order always follows `clusters`, whatever finishes first.
+    Failed or timed-out clusters are logged and left out. The optional
+    AnalysisCache is saved at the end and its reuse counts reported.
+    """
+    items = [(label, members) for label, members in clusters.items() if label != -1]
+    frontend_data = _run_clusters(items, signals, workers, cluster_timeout, analyze_fn, cache)
+
+    if cache is not None:
+        cache.save()
+        print(f"    - Analysis cache: {cache.reused} clusters reused, {cache.recomputed} recomputed.")
+    return frontend_data
+
+def _run_clusters(items, signals, workers, cluster_timeout, analyze_fn, cache):
+    if workers <= 1:
+        frontend_data = []
+        for label, summary in items:
+            print(f"    - Processing Cluster {label} ({summary.size} tickets)...")
+            try:
+                frontend_data.append(process_cluster(label, summary, signals, analyze_fn, cache))
+            except Exception as e:
+                print(f"    [ERROR] Failed processing Cluster {label}: {e}")
+                traceback.print_exc()
+        return frontend_data
+
+    print(f"    - Fanning out {len(items)} clusters over {workers} workers...")
+    results = asyncio.run(_reason_concurrently(items, signals, workers, cluster_timeout, analyze_fn, cache))
+    return [r for r in results if r is not None]
+
+async def _reason_concurrently(items, signals, workers, cluster_timeout, analyze_fn, cache):
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(workers)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reason")
+
+    async def run_one(label, summary):
+        async with limit:
+            call = loop.run_in_executor(pool, process_cluster, label, summary, signals,
+                                      analyze_fn, cache)
+            try:
+                return await asyncio.wait_for(call, timeout=cluster_timeout)
+            except asyncio.TimeoutError:
+                print(f"    [ERROR] Cluster {label} timed out after {cluster_timeout}s.")
+            except Exception as e:
+                print(f"    [ERROR] Failed processing Cluster {label}: {e}")
+                traceback.print_exc()
+            return None
+
+    try:
+        # gather() returns results in submission order -> deterministic output
+        return await asyncio.gather(*(run_one(label, members) for label, members in items))
+    finally:
+        # Don't block on threads still stuck in a timed-out call
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def current_run_stamp(ticket_source, options):
+    """What a run depends on: input file (size, mtime), run options and prompt/rule versions."""
+    return {
+        "inputs": observe.file_stamps([ticket_source, "system_signals.json"]),
+        "options": options,
+        "version": analysis_cache_version(),
+    }
+
+def load_run_stamp(path=RUN_STAMP_PATH):
+    if not os.path.exists(path):
+        return None
     try:
-        conf_val = float(confidence)
-    except:
-        conf_val = 0.5
-
-    if risk_level == "High":
-        return {
-            "action_not_taken": "Auto-Rollback of API Deployment",
-            "reason": "Risk is Critical, but human approval is required."
-        }
-    elif conf_val < 0.8:
-        return {
-            "action_not_taken": "Auto-Email Blast to Merchants",
-            "reason": f"Confidence ({conf_val}) is below 0.8 threshold."
-        }
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_run_stamp(stamp, path=RUN_STAMP_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, path)
+
+def analysis_is_current(full_refit=False, neighbor_backend="brute", window=None, near_duplicates=None):
+    """
+    (stamp, current) for the working directory: `current` means inputs,
+    options and versions match the last completed run, whose output is
+    still on disk and (in window mode) not yet expired.
+    """
+    use_log = os.path.exists(observe.TICKET_LOG)
+    ticket_source = observe.TICKET_LOG if use_log else "tickets.json"
+    stamp = current_run_stamp(ticket_source, {"full_refit": full_refit, "neighbors": neighbor_backend,
+                                              "window": window, "near_duplicates": near_duplicates})
+    last_stamp = load_run_stamp() or {}
+    expires_at = last_stamp.pop("expires_at", None)
+    unexpired = expires_at is None or time.time() < expires_at
+    return stamp, stamp == last_stamp and unexpired and os.path.exists("analysis_output.json")
+
+def save_cluster_output(frontend_data, compact=False):
+    """
+    Writes only the clusters that changed since the last run (see AnalysisOutput).
+    Returns (seq, changed ids, removed ids), or None if the write failed.
+    """
+    try:
+        result = AnalysisOutput(compact=compact).write(frontend_data, archive=ClusterArchive())
+        seq, changed, removed = result
+        print(f"--> [SYSTEM] Success! Analysis seq {seq}: {len(changed)} clusters changed, {len(removed)} removed.")
+        return result
+    except Exception as e:
+        print(f"--> [ERROR] Failed to save analysis: {e}")
+        return None
+
+def update_merchant_index(frontend_data, clusters, saved):
+    """
+    Brings merchant_index.json up to the output `saved` (seq, changed ids,
+    removed ids, from save_cluster_output). If the index reflects the
+    previous seq, only the changed clusters are re-indexed and the removed
+    ones dropped; any other index is rebuilt. Returns the merchant count.
+    """
+    seq, changed, removed = saved
+    index = MerchantIndex()
+    if index.seq == seq:
+        return len(index)
+    if index.seq == seq - 1:
+        for cluster_id in removed:
+            index.remove_cluster(cluster_id)
+        changed = set(changed)
+        objs = [obj for obj in frontend_data if obj['id'] in changed]
     else:
-        return {
-            "action_not_taken": "Escalation to VP Engineering",
-            "reason": "Issue severity does not meet SLA for executive wake-up."
-        }
+        index.retain(obj['id'] for obj in frontend_data)
+        objs = frontend_data
+    members = {f"CL-{label}": cluster_tickets for label, cluster_tickets in clusters.items()}
+    for obj in objs:
+        index.update_cluster(obj, members[obj['id']])
+    index.save(seq)
+    return len(index)
 
-def main():
+def main(full_refit=False, neighbor_backend="brute", workers=1, cluster_timeout=None, analyze_fn=None,
+         use_analysis_cache=True, force=False, compact_output=False, profile_path=None, trace_memory=False,
+         cluster_workers=1, window=None, near_duplicates=None):
+    """
+    One agent run. `window` (seconds) enables sliding-window mode: only
+    tickets created within the last `window` seconds are clustered and
+    reasoned about; older ones are evicted from the clusterer state and
+    clusters left without live tickets are archived (cluster_archive.ndjson).
+    Duplicate messages are always clustered as one weighted point;
+    `near_duplicates` (0-1, estimated shingle Jaccard) collapses
+    near-duplicates too. Failures are caught and logged; returns the run's
+    status ("ok", "unchanged" or "failed", with the error in its
+    run_metrics.ndjson record).
+    """
     print("=== STARTING AGENTIC RUN ===\n")
+    metrics = RunMetrics(trace_memory=trace_memory, profile_path=profile_path)
 
     try:
+        use_log = os.path.exists(observe.TICKET_LOG)
+        ticket_source = observe.TICKET_LOG if use_log else "tickets.json"
+
+        # FAST PATH: nothing changed since the last completed run -> the
+        # previous analysis_output.json is still current. Exits before the
+        # embedding model (torch) or sklearn are ever imported. In window
+        # mode the output also goes stale once its oldest live ticket expires.
+        stamp, current = analysis_is_current(full_refit, neighbor_backend, window, near_duplicates)
+        if not force and current:
+            print("--> [SYSTEM] No changes to tickets or signals since the last analysis. Nothing to do.")
+            metrics.status = "unchanged"
+            return metrics.status
+
         # 1. OBSERVE
         print("--> Step 1: Loading Data...")
-        tickets = observe.load_tickets()
-        raw_signals = observe.load_system_signals()
+        cutoff = time.time() - window if window else None
+        if use_log and not full_refit:
+            with metrics.stage("ingest") as counts:
+                state = ingest_ticket_log(neighbor_backend, cutoff=cutoff, near_duplicates=near_duplicates)
+                counts["indexed_tickets"] = len(state)
+        with metrics.stage("load") as counts:
+            tickets = observe.load_ticket_table(ticket_source)
+            counts["tickets"] = len(tickets)
+            if cutoff is not None:
+                # Everything downstream only ever sees the live window
+                tickets = tickets.take(tickets.live_rows(cutoff))
+                print(f"--> [OBSERVE] {len(tickets)} tickets inside the {window:g}s window.")
+                counts["live_tickets"] = len(tickets)
+            tickets.annotate()
+            raw_signals = observe.load_system_signals()
 
         # --- SIGNAL ADAPTER (FIX FOR NEW JSON FORMAT) ---
         # This converts your history-based JSON into the single-signal format
@@ -63,76 +367,143 @@ def main():
 
         # 2. VECTORIZE & CLUSTER
         print("--> Step 2: Clustering...")
-        embeddings = embed.generate_embeddings(tickets)
-        clusters = cluster.cluster_tickets(tickets, embeddings)
+        if use_log and not full_refit:
+            # New log records were already embedded and inserted in step 1;
+            # here expired tickets leave the index (and re-entering ones join)
+            with metrics.stage("cluster") as counts:
+                inserted, removed = cluster.reconcile_state(state, tickets, embed.generate_embeddings,
+                                                            near_duplicates)
+                if inserted or removed:
+                    state.save(CLUSTER_STATE_PATH)
+                    print(f"--> [CLUSTER] Window update: {inserted} tickets added, {removed} expired.")
+                counts["expired"] = removed
+                clusters = cluster.group_tickets(state, tickets)
+                vectors = cluster.index_vectors(state, tickets)
+                print(f"--> [INTERNAL] {len(clusters)} clusters over {len(tickets)} tickets (ticket log).")
+                counts["clusters"] = len(clusters)
+        else:
+            # Duplicates collapse to one weighted point: one embedding and one DBSCAN point per group
+            with metrics.stage("dedup") as counts:
+                groups = dedup.collapse(tickets, near_duplicates)
+                counts["distinct"] = len(groups)
+                print(f"--> [OBSERVE] {len(tickets)} tickets collapse to {len(groups)} distinct messages.")
+            with metrics.stage("embed") as counts:
+                embeddings = embed.generate_embeddings(tickets.view(groups.rep_rows))
+                counts["embedded"] = len(embeddings)
+            with metrics.stage("cluster") as counts:
+                state_path = None if full_refit else CLUSTER_STATE_PATH
+                clusters = cluster.cluster_tickets(tickets, embeddings, state_path=state_path,
+                                                   backend=neighbor_backend, workers=cluster_workers, groups=groups)
+                vectors = embeddings
+                counts["clusters"] = len(clusters)
+
+        # Per-cluster summaries; with stable (incremental) cluster ids they
+        # carry over between runs and only fold in each cluster's newcomers
+        with metrics.stage("summarize") as counts:
+            summaries = ClusterSummaries(None if full_refit else SUMMARY_PATH)
+            cluster_summaries = summaries.update(clusters, vectors)
+            summaries.save()
+            counts["extended"], counts["rebuilt"] = summaries.extended, summaries.rebuilt
 
         # 3. ANALYZE TRAJECTORY
         print("--> Step 3: Analyzing Trajectory...")
-        traj_label, prediction = trajectory.analyze_signal_trend(signals)
-        trend_info = {"trajectory": traj_label, "prediction": prediction}
+        with metrics.stage("trajectory") as counts:
+            traj_label, prediction = trajectory.analyze_signal_trend(signals)
+            trend_info = {"trajectory": traj_label, "prediction": prediction}
 
-        # DATA CONTAINER FOR FRONTEND
-        frontend_data = []
+            # All *_history series in one batched pass (not just checkout_error_rate)
+            trajectory_table = trajectory.analyze_trajectories(trajectory.histories_from_signals(raw_signals))
+            for row in trajectory_table:
+                print(f"    - {row['signal']:<22} slope={row['slope']!s:>8} ewma={row['ewma']!s:>8} "
+                      f"accel={row['acceleration']!s:>8} forecast={row['forecast']!s:>8} -> {row['trajectory']}")
+            if trajectory_table:
+                save_analysis_to_disk(trajectory_table, TRAJECTORY_OUTPUT_PATH)
+            counts["signals"] = len(trajectory_table)
 
         # 4. AGENT LOOP
         print("--> Step 4: Reasoning Loop...")
-        for label, cluster_tickets in clusters.items():
-            if label == -1: continue 
-
-            print(f"    - Processing Cluster {label} ({len(cluster_tickets)} tickets)...")
-            
-            try:
-                cluster_text = " ".join([t['message'] for t in cluster_tickets])
-                
-                # Reason & Decide
-                llm_analysis = llm_mock.analyze_cluster_semantically(cluster_text)
-                decision = decide.determine_action(llm_analysis)
-                restraint = generate_restraint_logic(decision['risk_level'], llm_analysis['confidence'])
-                
-                # Check for Repro Pack
-                repro_data = None
-                conf_val = float(llm_analysis.get('confidence', 0))
-                is_stage_3 = "Stage 3" in llm_analysis.get('stage', '')
-                is_platform_issue = "Platform Issue" in llm_analysis.get('root_cause', '')
-
-                if is_stage_3 and is_platform_issue and conf_val >= 0.8:
-                     path, inc_id, r_type, triggers = repro_pack.generate_repro_pack(
-                        llm_analysis, cluster_tickets, signals
-                    )
-                     repro_data = {"id": inc_id, "type": r_type, "triggers": triggers}
-
-                # CONSTRUCT FRONTEND OBJECT
-                cluster_obj = {
-                    "id": f"CL-{label}",
-                    "title": f"Cluster {label}: {llm_analysis['root_cause']}",
-                    "stage": llm_analysis['stage'],
-                    "root_cause": llm_analysis['root_cause'],
-                    "confidence": llm_analysis['confidence'],
-                    "risk": decision['risk_level'],
-                    "ticket_ids": [t['ticket_id'] for t in cluster_tickets],
-                    "merchants": list(set([t['merchant_id'] for t in cluster_tickets])),
-                    "timeline": {
-                        "Observe": f"Clustered {len(cluster_tickets)} tickets via DBSCAN.",
-                        "Reason": llm_analysis.get('reasoning', 'Analyzed patterns.'),
-                        "Decide": decision['recommended_action'],
-                        "Act": "Repro Pack Generated" if repro_data else "internal_ticket_created"
-                    },
-                    "restraint": restraint,
-                    "repro_pack": repro_data
-                }
-                frontend_data.append(cluster_obj)
-            except Exception as e:
-                print(f"    [ERROR] Failed processing Cluster {label}: {e}")
-                traceback.print_exc()
+        with metrics.stage("reasoning") as counts:
+            cache = AnalysisCache(ANALYSIS_CACHE_PATH, version=analysis_cache_version()) if use_analysis_cache else None
+            frontend_data = run_reasoning_loop(cluster_summaries, signals, workers=workers,
+                                               cluster_timeout=cluster_timeout, analyze_fn=analyze_fn, cache=cache)
+            counts["reasoned_clusters"] = len(frontend_data)
+            counts["packs"] = sum(1 for c in frontend_data if c['repro_pack'])
+            if cache is not None:
+                counts["cache_reused"] = cache.reused
+        with metrics.stage("repro_flush"):
+            repro_pack.flush_store()
 
         # 5. SAVE FOR DASHBOARD
         print(f"--> Step 5: Saving {len(frontend_data)} clusters to disk...")
-        save_analysis_to_disk(frontend_data)
+        with metrics.stage("save") as counts:
+            saved = save_cluster_output(frontend_data, compact=compact_output)
+            if saved:
+                counts["changed_clusters"], counts["removed_clusters"] = len(saved[1]), len(saved[2])
+                counts["merchants"] = update_merchant_index(frontend_data, clusters, saved)
+                if cutoff is not None and len(tickets):
+                    stamp["expires_at"] = float(tickets.created_at.min()) + window
+                save_run_stamp(stamp)
+            else:
+                metrics.status = "failed"
+                metrics.error = "could not write the analysis output"
         
     except Exception as e:
+        metrics.status = "failed"
+        metrics.error = f"{type(e).__name__}: {e}"
         print("\nCRITICAL FAILURE IN MAIN LOOP:")
         print(e)
         traceback.print_exc()
+    finally:
+        metrics.finish()
+    return metrics.status
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the self-healing support agent.")
+    parser.add_argument("--full-refit", action="store_true",
+                        help="Refit DBSCAN over all tickets instead of updating the saved clusterer state.")
+    parser.add_argument("--migrate-tickets", action="store_true",
+                        help="Convert tickets.json into the append-only tickets.ndjson log and exit.")
+    parser.add_argument("--migrate-repro-packs", action="store_true",
+                        help="Import the legacy repro_packs/INC-*.json files into the incident store and exit.")
+    parser.add_argument("--neighbors", choices=["brute", "ivf"], default="brute",
+                        help="Neighbour search backend: exact brute force or approximate IVF index.")
+    parser.add_argument("--cluster-workers", type=int, default=1,
+                        help="Processes for the exact sharded DBSCAN used by --full-refit (1 = sklearn, single "
+                             "process). Uses O(n) memory; only faster than sklearn with spare cores.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Clusters reasoned about concurrently (1 = sequential).")
+    parser.add_argument("--cluster-timeout", type=float, default=None,
+                        help="Seconds allowed per cluster in the concurrent reasoning loop.")
+    parser.add_argument("--simulate-llm-latency", type=float, default=0.0,
+                        help="Mean seconds of injected latency per LLM call (offline stand-in for a real endpoint).")
+    parser.add_argument("--force", action="store_true",
+                        help="Run the full pipeline even if tickets and signals are unchanged since the last run.")
+    parser.add_argument("--compact-output", action="store_true",
+                        help="Write the analysis snapshot without indentation (smaller, faster for large outputs).")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="Profile the run with cProfile and write the stats to PATH.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Measure peak Python allocations per stage with tracemalloc (slower).")
+    parser.add_argument("--window", type=parse_window, default=None, metavar="SPAN",
+                        help="Sliding-window mode: only cluster tickets from the last SPAN (e.g. 90m, 6h, 2d).")
+    parser.add_argument("--near-duplicates", type=float, default=None, metavar="THRESHOLD",
+                        help="Also collapse near-duplicate messages (estimated similarity 0-1, e.g. 0.8) before clustering.")
+    parser.add_argument("--no-analysis-cache", action="store_true",
+                        help="Re-run the reasoning path for every cluster, even if its membership is unchanged.")
+    args = parser.parse_args()
+    if args.migrate_tickets:
+        observe.migrate_json_to_log()
+        raise SystemExit(0)
+    if args.migrate_repro_packs:
+        repro_pack.get_store().import_legacy_packs()
+        raise SystemExit(0)
+
+    analyze_fn = None
+    if args.simulate_llm_latency > 0:
+        analyze_fn = llm_mock.make_latency_llm(mean_latency=args.simulate_llm_latency)
+
+    main(full_refit=args.full_refit, neighbor_backend=args.neighbors, workers=args.workers,
+         cluster_timeout=args.cluster_timeout, analyze_fn=analyze_fn,
+         use_analysis_cache=not args.no_analysis_cache, force=args.force, compact_output=args.compact_output,
+         profile_path=args.profile, trace_memory=args.trace_memory, cluster_workers=args.cluster_workers,
+         window=args.window, near_duplicates=args.near_duplicates)
@@ -0,0 +1,54 @@
+"""agent/incident_store.py: one incident per (cluster id, root cause), versioned in the log."""
+import threading
+
+from agent.incident_store import IncidentStore
+
+
+def pack(n, cluster_id, root_cause, fingerprint, merchants):
+    return {"incident_id": f"INC-{n}", "cluster_id": cluster_id, "cluster_fingerprint": fingerprint,
+            "suspected_root_cause": root_cause, "affected_merchants": merchants,
+            "generated_at": f"2026-01-0{n}T00:00:00"}
+
+
+def test_cluster_keeps_its_incident(tmp_path):
+    store = IncidentStore(str(tmp_path))
+    first = store.add(pack(1, "CL-1", "Platform Issue / Regression", "f1", [1]))
+    # One more ticket in the same cluster: new fingerprint, same incident
+    assert store.add(pack(2, "CL-1", "Platform Issue / Regression", "f2", [1, 2])) == first
+    # Another root cause or another cluster: a new incident
+    assert store.add(pack(3, "CL-1", "Documentation Gap", "f3", [3])) == "INC-3"
+    assert store.add(pack(4, "CL-2", "Platform Issue / Regression", "f4", [4])) == "INC-4"
+    assert len(store) == 3
+
+    latest = store.get(first)
+    assert latest["cluster_fingerprint"] == "f2"
+    assert latest["first_generated_at"] == "2026-01-01T00:00:00"
+    assert [r["incident_id"] for r in store.query(merchant_id=2)] == [first]
+    store.close()
+
+    # Reopened from the index, and from the log alone
+    for reopen in range(2):
+        if reopen:
+            (tmp_path / "incidents.index.json").unlink()
+        store = IncidentStore(str(tmp_path))
+        assert len(store) == 3
+        assert store.find_by_cluster("CL-1", "Platform Issue / Regression")["cluster_fingerprint"] == "f2"
+        assert [r["incident_id"] for r in store.query()] == ["INC-4", "INC-3", first]
+        store.close()
+
+
+def test_unchanged_fingerprint_is_not_rewritten(tmp_path):
+    store = IncidentStore(str(tmp_path))
+    store.add(pack(1, "CL-1", "Platform Issue / Regression", "f1", [1]))
+    assert store.add(pack(2, "CL-7", "Platform Issue / Regression", "f1", [1])) == "INC-1"
+    store.close()
+    assert len((tmp_path / "incidents.ndjson").read_text().splitlines()) == 1
+
+
+def test_close_stops_the_writer(tmp_path):
+    before = set(threading.enumerate())
+    for n in range(3):
+        store = IncidentStore(str(tmp_path / str(n)))
+        store.add(pack(1, "CL-1", "Platform Issue / Regression", "f1", [1]))
+        store.close()
+    assert set(threading.enumerate()) <= before
@@ -0,0 +1,122 @@
+"""
+The DBSCAN variants in agent/ against sklearn's DBSCAN(metric='cosine') on
+small random weighted corpora: IncrementalDBSCAN (inserts in random order,
+then removals), dbscan_from_neighbors over exact neighbourhoods, and
+sharded_dbscan.
+"""
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+from agent.cluster import dbscan_from_neighbors
+from agent.incremental_cluster import IncrementalDBSCAN
+from agent.neighbors import build_index, normalize
+from agent.sharded_cluster import sharded_dbscan
+
+EPS = 0.60
+MIN_SAMPLES = 3
+SEEDS = range(30)
+
+
+def make_corpus(seed, n=120, dim=64, centers=6):
+    """
+    Blobs of uneven spread, so each corpus has several clusters, border
+    points and noise at EPS / MIN_SAMPLES; weights mostly 1, some 2-3.
+    """
+    rng = np.random.default_rng(seed)
+    spread = rng.uniform(0.9, 2.0, (n, 1))
+    x = rng.normal(size=(centers, dim))[rng.integers(0, centers, n)] + rng.normal(size=(n, dim)) * spread
+    weights = rng.choice([1, 1, 1, 2, 3], n)
+    return normalize(x), weights
+
+
+def sklearn_dbscan(x, weights):
+    model = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES, metric="cosine").fit(x, sample_weight=weights)
+    core = np.zeros(len(x), dtype=bool)
+    core[model.core_sample_indices_] = True
+    return model.labels_, core
+
+
+def assert_same_clustering(labels, x, weights):
+    """
+    Same noise, same core points, same partition of the core points, and
+    every border point in the cluster of one of its core neighbours (which
+    one is order-dependent in DBSCAN itself).
+    """
+    labels = np.asarray(labels)
+    expected, core = sklearn_dbscan(x, weights)
+    assert np.array_equal(labels == -1, expected == -1)
+
+    pairs = set(zip(labels[core].tolist(), expected[core].tolist()))
+    assert len(pairs) == len({a for a, _ in pairs}) == len({b for _, b in pairs})
+
+    within = 1.0 - x @ x.T <= EPS
+    for row in np.nonzero(~core & (expected != -1))[0]:
+        assert labels[row] in set(labels[within[row] & core].tolist())
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_matches_sklearn(seed):
+    x, weights = make_corpus(seed)
+    rng = np.random.default_rng(seed + 1000)
+    state = IncrementalDBSCAN(EPS, MIN_SAMPLES)
+    members = [(row, f"{row}-{k}") for row in range(len(x)) for k in range(weights[row])]
+    for i in rng.permutation(len(members)):
+        row, member = members[i]
+        state.insert(row, x[row], member=member)
+    assert_same_clustering([state.labels[state.row_of[row]] for row in range(len(x))], x, weights)
+
+    # Remove a third of the points (every member), plus one member of some others
+    removed = rng.choice(len(x), len(x) // 3, replace=False)
+    for row in removed:
+        for k in range(weights[row]):
+            state.remove(f"{row}-{k}")
+    kept = np.setdiff1d(np.arange(len(x)), removed)
+    kept_weights = weights[kept].copy()
+    for i in np.nonzero(kept_weights > 1)[0][::2]:
+        state.remove(f"{kept[i]}-{kept_weights[i] - 1}")
+        kept_weights[i] -= 1
+    assert_same_clustering([state.labels[state.row_of[row]] for row in kept], x[kept], kept_weights)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_snapshot_round_trip(seed, tmp_path):
+    x, weights = make_corpus(seed, n=60)
+    state = IncrementalDBSCAN(EPS, MIN_SAMPLES)
+    for row in range(len(x)):
+        for k in range(weights[row]):
+            state.insert(row, x[row], member=row * 10 + k)
+    path = str(tmp_path / "state.npz")
+    state.save(path)
+    restored = IncrementalDBSCAN.load(path, EPS, MIN_SAMPLES)
+    assert [restored.label_of(m) for m in state.member_row] == [state.label_of(m) for m in state.member_row]
+
+    # The restored state keeps clustering like a fresh one
+    extra, _ = make_corpus(seed + 500, n=20)
+    for i, vector in enumerate(extra):
+        restored.insert(len(x) + i, vector, member=(len(x) + i) * 10)
+    both = np.vstack([x, extra])
+    labels = [restored.labels[restored.row_of[row]] for row in range(len(both))]
+    assert_same_clustering(labels, both, np.concatenate([weights, np.ones(len(extra), dtype=weights.dtype)]))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dbscan_from_neighbors_matches_sklearn(seed):
+    x, weights = make_corpus(seed)
+    index = build_index("brute")
+    index.add_batch(x)
+    labels = dbscan_from_neighbors(index.query_radius_batch(x, EPS), MIN_SAMPLES, weights=weights)
+    assert np.array_equal(labels, sklearn_dbscan(x, weights)[0])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sharded_matches_sklearn(seed):
+    x, weights = make_corpus(seed)
+    labels = sharded_dbscan(x, EPS, MIN_SAMPLES, workers=1, n_shards=4, seed=seed, sample_weight=weights)
+    assert np.array_equal(labels, sklearn_dbscan(x, weights)[0])
+
+
+def test_sharded_process_pool_matches_sklearn():
+    x, weights = make_corpus(0, n=600)
+    labels = sharded_dbscan(x, EPS, MIN_SAMPLES, workers=2, n_shards=6, sample_weight=weights)
+    assert np.array_equal(labels, sklearn_dbscan(x, weights)[0])
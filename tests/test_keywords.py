@@ -0,0 +1,72 @@
+"""
+agent/keywords.py's single-pass scanner against the per-keyword `in` loops
+it replaced, on random texts dense in (overlapping, mixed-case, partial)
+keywords.
+"""
+import random
+
+import pytest
+
+from agent import keywords
+
+KEYWORDS = sorted({kw for kws in keywords.RULES.values() for kw in kws})
+FILLER = ["", " ", "the ", "my ", "x", "in", "err", "50", "time", "\n", "!", "ERROR", "Time", "PayMent"]
+
+
+def naive_keywords(text, words=KEYWORDS):
+    lowered = text.lower()
+    return frozenset(kw for kw in words if kw in lowered)
+
+
+def naive_rules(text):
+    lowered = text.lower()
+    return frozenset(rule for rule, kws in keywords.RULES.items() if any(kw in lowered for kw in kws))
+
+
+def random_text(rng, words=KEYWORDS):
+    parts = []
+    for _ in range(rng.randrange(0, 12)):
+        piece = rng.choice(words + FILLER)
+        if piece and rng.random() < 0.3:
+            start = rng.randrange(len(piece))
+            piece = piece[start:rng.randrange(start + 1, len(piece) + 1)]  # A fragment
+        if rng.random() < 0.2:
+            piece = piece.upper()
+        parts.append(piece)
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_scan_matches_substring_loop(seed):
+    rng = random.Random(seed)
+    for _ in range(5000):
+        text = random_text(rng)
+        hits = keywords.scan(text)
+        assert hits == naive_keywords(text), text
+        assert keywords.fired_rules(hits) == naive_rules(text), text
+
+
+def test_overlapping_keywords():
+    # Every keyword that occurs is found, including ones inside / overlapping longer ones
+    text = "Internal Error: timeout500 on /checkout, see docs example"
+    assert keywords.scan(text) == naive_keywords(text)
+    assert {"internal error", "error", "timeout", "500", "checkout", "docs", "example"} <= keywords.scan(text)
+
+
+def test_nested_keywords(monkeypatch):
+    # Keywords that are prefixes / substrings of one another at the same position
+    rules = {"a": ("ab", "abc"), "b": ("bcd", "b"), "c": ("cab",), "d": ("zz",)}
+    for name, value in zip(("RULES", "_PATTERN", "_IMPLIED", "_KEYWORD_RULES"), (rules, *keywords._compile(rules))):
+        monkeypatch.setattr(keywords, name, value)
+    words = sorted({kw for kws in rules.values() for kw in kws})
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice("abcdzAB ") for _ in range(rng.randrange(0, 10)))
+        hits = keywords.scan(text)
+        assert hits == naive_keywords(text, words), text
+        assert keywords.fired_rules(hits) == naive_rules(text), text
+
+
+def test_empty_text():
+    assert keywords.scan("") == frozenset()
+    assert keywords.fired_rules(frozenset()) == frozenset()
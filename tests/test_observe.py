@@ -0,0 +1,49 @@
+"""agent/observe.py's append-only ticket log: id assignment and recovery from a torn tail."""
+import json
+
+from agent import observe
+
+
+def ids(path):
+    return [t["ticket_id"] for t in observe.load_tickets(str(path))]
+
+
+def test_ids_are_sequential(tmp_path):
+    path = str(tmp_path / "tickets.ndjson")
+    assert [observe.append_ticket(1, "a", path)["ticket_id"] for _ in range(3)] == [1, 2, 3]
+
+
+def test_partial_trailing_line_is_dropped(tmp_path):
+    # A writer that crashed mid-line must not wedge every later append
+    path = tmp_path / "tickets.ndjson"
+    observe.append_ticket(1, "a", str(path))
+    with open(path, "ab") as f:
+        f.write(b'{"ticket_id": 2, "merchant_id": 1, "mess')
+    assert observe.append_ticket(2, "b", str(path))["ticket_id"] == 2
+    assert ids(path) == [1, 2]
+
+
+def test_partial_line_longer_than_a_chunk(tmp_path):
+    path = tmp_path / "tickets.ndjson"
+    for _ in range(3):
+        observe.append_ticket(1, "x" * 3000, str(path))
+    with open(path, "ab") as f:
+        f.write(b'{"ticket_id": 4, "message": "' + b"y" * 10000)
+    assert observe.append_ticket(1, "b", str(path))["ticket_id"] == 4
+    assert ids(path) == [1, 2, 3, 4]
+
+
+def test_whole_record_missing_its_newline_is_kept(tmp_path):
+    path = tmp_path / "tickets.ndjson"
+    observe.append_ticket(1, "a", str(path))
+    with open(path, "ab") as f:
+        f.write(json.dumps({"ticket_id": 2, "merchant_id": 1, "message": "b"}).encode("utf-8"))
+    assert observe.append_ticket(1, "c", str(path))["ticket_id"] == 3
+    assert ids(path) == [1, 2, 3]
+
+
+def test_log_holding_only_a_partial_line(tmp_path):
+    path = tmp_path / "tickets.ndjson"
+    path.write_bytes(b'{"tick')
+    assert observe.append_ticket(1, "a", str(path))["ticket_id"] == 1
+    assert ids(path) == [1]